@@ -0,0 +1,158 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Prueba de carga del servicio de cotización (logistica.servicio)
+# Abre N conexiones keep-alive concurrentes durante un tiempo fijo y reporta
+# peticiones/s, escenarios/s y latencia p50/p95/p99. Sin --url levanta el
+# servicio en un subproceso con un puerto libre:
+#
+#   python benchmarks/carga.py --conexiones 32 --duracion 10
+#   python benchmarks/carga.py --lote 2000 --conexiones 4
+#   python benchmarks/carga.py --url http://127.0.0.1:8765
+# ──────────────────────────────────────────────────────────────────────────────
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from rendimiento import RAIZ, percentil
+
+TAMANOS = ("SP", "XXS", "XS", "S", "M1", "M2", "L/XL")
+REGIONES = ("Región Metropolitana", "Otra región")
+CLASES = ("SP", "P1", "P2", "P3", "M", "G", "SG")
+
+
+def escenario_aleatorio(rng):
+    return {
+        "tamano": rng.choice(TAMANOS),
+        "region": rng.choice(REGIONES),
+        "volumen": rng.randint(0, 60),
+        "tiene_bodega": rng.choice(("Sí", "No")),
+        "alta_rotacion": rng.random() < 0.5,
+        "retiro_tienda": rng.random() < 0.5,
+        "foco_control_marca": rng.random() < 0.3,
+        "clase": rng.choice(CLASES),
+        "precio": rng.choice((9990, 19990, 29990, 129990)),
+    }
+
+
+def peticion(host, ruta, cuerpo):
+    datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+    return (f"POST {ruta} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(datos)}\r\n\r\n").encode("latin-1") + datos
+
+
+async def leer_respuesta(lector):
+    """(estado, cuerpo) de una respuesta con Content-Length o por trozos."""
+    estado = int((await lector.readline()).split()[1])
+    encabezados = {}
+    while (linea := await lector.readline()) not in (b"\r\n", b""):
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        encabezados[nombre.strip().lower()] = valor.strip()
+    if encabezados.get("transfer-encoding") == "chunked":
+        partes = []
+        while (largo := int((await lector.readline()).strip(), 16)):
+            partes.append(await lector.readexactly(largo))
+            await lector.readline()
+        await lector.readline()
+        return estado, b"".join(partes)
+    return estado, await lector.readexactly(int(encabezados.get("content-length", 0)))
+
+
+async def cliente(host, puerto, cargas, hasta, latencias, errores):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        for carga in itertools.cycle(cargas):
+            if time.perf_counter() >= hasta:
+                break
+            t0 = time.perf_counter()
+            escritor.write(carga)
+            await escritor.drain()
+            estado, _ = await leer_respuesta(lector)
+            latencias.append((time.perf_counter() - t0) * 1000)
+            if estado != 200:
+                errores.append(estado)
+    finally:
+        escritor.close()
+
+
+async def cargar(host, puerto, conexiones, duracion, lote, semilla):
+    rng = random.Random(semilla)
+    if lote:
+        ruta = "/cotizar/lote"
+        cargas = [peticion(host, ruta, {"escenarios": [escenario_aleatorio(rng) for _ in range(lote)]})
+                  for _ in range(8)]
+    else:
+        ruta = "/cotizar"
+        cargas = [peticion(host, ruta, escenario_aleatorio(rng)) for _ in range(512)]
+
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    hasta = inicio + duracion
+    await asyncio.gather(*(cliente(host, puerto, cargas[i::conexiones] or cargas, hasta, latencias, errores)
+                           for i in range(conexiones)))
+    transcurrido = time.perf_counter() - inicio
+
+    ordenadas = sorted(latencias)
+    n = len(ordenadas)
+    return {
+        "ruta": ruta,
+        "conexiones": conexiones,
+        "escenarios_por_peticion": lote or 1,
+        "peticiones": n,
+        "errores": len(errores),
+        "peticiones_s": round(n / transcurrido, 1),
+        "escenarios_s": round(n * (lote or 1) / transcurrido, 1),
+        "p50_ms": round(percentil(ordenadas, 0.50), 3) if n else None,
+        "p95_ms": round(percentil(ordenadas, 0.95), 3) if n else None,
+        "p99_ms": round(percentil(ordenadas, 0.99), 3) if n else None,
+        "max_ms": round(ordenadas[-1], 3) if n else None,
+    }
+
+
+def iniciar_servicio():
+    """Levanta `python -m logistica servir --puerto 0` y devuelve (proceso, puerto)."""
+    proceso = subprocess.Popen([sys.executable, "-m", "logistica", "servir", "--puerto", "0"],
+                               cwd=RAIZ, stderr=subprocess.PIPE, text=True)
+    linea = proceso.stderr.readline()
+    encontrado = re.search(r":(\d+)\s*$", linea)
+    if not encontrado:
+        proceso.kill()
+        raise RuntimeError(f"el servicio no inició: {linea!r}")
+    return proceso, int(encontrado.group(1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de cotización")
+    parser.add_argument("--url", help="servicio ya levantado (por defecto se inicia uno local)")
+    parser.add_argument("--conexiones", type=int, default=16)
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos")
+    parser.add_argument("--lote", type=int, default=0, help="escenarios por petición (0 = /cotizar)")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    proceso = None
+    if args.url:
+        partes = urlsplit(args.url)
+        host, puerto = partes.hostname, partes.port or 80
+    else:
+        proceso, puerto = iniciar_servicio()
+        host = "127.0.0.1"
+    try:
+        reporte = asyncio.run(cargar(host, puerto, args.conexiones, args.duracion, args.lote, args.semilla))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    for clave, valor in reporte.items():
+        print(f"{clave:>24}: {valor}")
+    return 1 if reporte["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Deltas y bytes enviados al navegador por rerun
+# Ejecuta cada app con AppTest, registra los ForwardMsg que produce el script
+# (los mismos que viajan por el websocket) y reporta cuántos deltas y bytes
+# genera la carga inicial y el envío del formulario. Para la app v6 compara el
+# render clásico (?render=clasico) con el render en un solo bloque HTML.
+#
+#   python benchmarks/deltas.py [--salida deltas.json]
+# ──────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from streamlit.testing.v1 import AppTest                       # noqa: E402
+from streamlit.testing.v1 import local_script_runner           # noqa: E402
+
+# (app, parámetros de consulta, etiqueta)
+CASOS = (
+    ("app.py", {}, "app.py"),
+    ("app(final).py", {}, "app(final).py"),
+    ("app(orden-desc).py", {}, "app(orden-desc).py"),
+    ("app(orden-desc-mejorado).py", {"render": "clasico"}, "v6 render clásico"),
+    ("app(orden-desc-mejorado).py", {}, "v6 render HTML"),
+)
+
+_mensajes = []
+
+
+def _registrar(run):
+    """Envuelve LocalScriptRunner.run para guardar los mensajes de cada rerun."""
+    def envoltura(self, *args, **kwargs):
+        arbol = run(self, *args, **kwargs)
+        _mensajes[:] = list(self.forward_msgs())
+        return arbol
+    return envoltura
+
+
+def contar():
+    deltas = [m for m in _mensajes if m.WhichOneof("type") == "delta"]
+    return {
+        "mensajes": len(_mensajes),
+        "deltas": len(deltas),
+        "bytes": sum(m.ByteSize() for m in _mensajes),
+    }
+
+
+def medir(app, parametros):
+    at = AppTest.from_file(str(RAIZ / app), default_timeout=60)
+    for clave, valor in parametros.items():
+        at.query_params[clave] = valor
+    at.run()
+    inicial = contar()
+    at.button[0].click().run()
+    if at.exception:
+        raise RuntimeError(f"{app}: {at.exception[0].message}")
+    return {"inicial": inicial, "envio": contar()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deltas y bytes por rerun de cada app")
+    parser.add_argument("--salida", type=Path, help="archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    local_script_runner.LocalScriptRunner.run = _registrar(local_script_runner.LocalScriptRunner.run)
+    resultados = {etiqueta: medir(app, parametros) for app, parametros, etiqueta in CASOS}
+
+    ancho = max(len(e) for e in resultados)
+    print(f"{'caso':<{ancho}}  {'deltas ini':>10} {'bytes ini':>10} {'deltas envío':>13} {'bytes envío':>12}")
+    for etiqueta, r in resultados.items():
+        print(f"{etiqueta:<{ancho}}  {r['inicial']['deltas']:>10} {r['inicial']['bytes']:>10} "
+              f"{r['envio']['deltas']:>13} {r['envio']['bytes']:>12}")
+    if args.salida:
+        args.salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
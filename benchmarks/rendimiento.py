@@ -0,0 +1,251 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Benchmarks de las cuatro variantes de la app
+# Mide las funciones puras de cada script (puntuación, tablas de costos,
+# beneficios) y un rerun completo sin navegador con streamlit.testing.AppTest.
+# Reporta p50/p95/p99, media y memoria pico, y guarda un JSON para comparar
+# entre commits:
+#
+#   python benchmarks/rendimiento.py --salida bench.json
+#   python benchmarks/rendimiento.py --salida nuevo.json --comparar bench.json
+# ──────────────────────────────────────────────────────────────────────────────
+import argparse
+import ast
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+APPS = ("app.py", "app(final).py", "app(orden-desc).py", "app(orden-desc-mejorado).py")
+
+CLASES = ("SP", "P1", "P2", "P3", "M", "G", "SG")
+TAMANOS = ("SP", "XXS", "XS", "S", "M1", "M2", "L/XL")
+REGIONES = ("Región Metropolitana", "Otra región")
+
+
+# ── Carga de funciones sin ejecutar la UI ────────────────────────────────────
+def cargar_funciones(app):
+    """
+    Ejecuta solo los imports (salvo streamlit), las constantes en MAYÚSCULAS y
+    las definiciones de funciones de un script, sin dibujar widgets.
+    """
+    ruta = RAIZ / app
+    arbol = ast.parse(ruta.read_text(encoding="utf-8"), filename=str(ruta))
+
+    # Funciones con decoradores de Streamlit (st.cache_resource, …) y lo que depende de ellas
+    omitidas = {
+        n.name for n in arbol.body
+        if isinstance(n, ast.FunctionDef) and any("st." in ast.unparse(d) for d in n.decorator_list)
+    }
+
+    def conservar(nodo):
+        if isinstance(nodo, ast.Import):
+            return all(a.name != "streamlit" for a in nodo.names)
+        if isinstance(nodo, ast.ImportFrom):
+            return not (nodo.module or "").startswith("streamlit")
+        if isinstance(nodo, ast.FunctionDef):
+            return nodo.name not in omitidas
+        if isinstance(nodo, ast.Assign):
+            usa_omitidas = any(isinstance(n, ast.Name) and n.id in omitidas for n in ast.walk(nodo.value))
+            return not usa_omitidas and all(isinstance(t, ast.Name) and t.id.isupper() for t in nodo.targets)
+        return False
+
+    modulo = ast.Module(body=[n for n in arbol.body if conservar(n)], type_ignores=[])
+    espacio = {"__name__": f"bench:{app}"}
+    exec(compile(modulo, str(ruta), "exec"), espacio)
+    return espacio
+
+
+# ── Medición ─────────────────────────────────────────────────────────────────
+def medir(nombre, funcion, casos, repeticiones):
+    """Tiempos por llamada (ms) recorriendo `casos` en ciclo, más memoria pico."""
+    ciclo = itertools.cycle(casos)
+    funcion(*casos[0])   # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        args = next(ciclo)
+        t0 = time.perf_counter()
+        funcion(*args)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    for args in casos[: max(1, min(len(casos), 50))]:
+        funcion(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resumen(nombre, tiempos, pico)
+
+
+def percentil(ordenados, q):
+    k = (len(ordenados) - 1) * q
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def resumen(nombre, tiempos, pico_bytes):
+    ordenados = sorted(tiempos)
+    return {
+        "nombre": nombre,
+        "n": len(tiempos),
+        "p50_ms": round(percentil(ordenados, 0.50), 4),
+        "p95_ms": round(percentil(ordenados, 0.95), 4),
+        "p99_ms": round(percentil(ordenados, 0.99), 4),
+        "media_ms": round(statistics.fmean(ordenados), 4),
+        "pico_kib": round(pico_bytes / 1024, 1),
+    }
+
+
+# ── Casos por variante ───────────────────────────────────────────────────────
+def casos_tres_preguntas():
+    return list(itertools.product((True, False), repeat=3))
+
+
+def casos_costos(modalidades):
+    return list(itertools.product(modalidades, CLASES, (9990.0, 29990.0)))
+
+
+def casos_v6():
+    return list(itertools.product(TAMANOS, REGIONES, (10, 25), ("Sí", "No"),
+                                  (True, False), (True, False), (True, False)))
+
+
+def bench_funciones(repeticiones):
+    resultados = []
+    ns = cargar_funciones("app.py")
+    resultados.append(medir("app.py::recomendar_modalidad", ns["recomendar_modalidad"],
+                            casos_tres_preguntas(), repeticiones))
+    resultados.append(medir("app.py::tabla_costos_modalidad", ns["tabla_costos_modalidad"],
+                            casos_costos(list(ns["MODALITY_EXPLAIN"])), repeticiones))
+
+    ns = cargar_funciones("app(final).py")
+    resultados.append(medir("app(final).py::puntuar_modalidades", ns["puntuar_modalidades"],
+                            casos_tres_preguntas(), repeticiones))
+    resultados.append(medir("app(final).py::tabla_costos_modalidad", ns["tabla_costos_modalidad"],
+                            casos_costos(list(ns["MODALITY_EXPLAIN"])), repeticiones))
+
+    ns = cargar_funciones("app(orden-desc).py")
+    resultados.append(medir("app(orden-desc).py::ordenar_modalidades", ns["ordenar_modalidades"],
+                            casos_tres_preguntas(), repeticiones))
+    resultados.append(medir("app(orden-desc).py::tabla_costos_modalidad", ns["tabla_costos_modalidad"],
+                            casos_costos(list(ns["MODALITY_EXPLAIN"])), repeticiones))
+
+    ns = cargar_funciones("app(orden-desc-mejorado).py")
+    v6 = casos_v6()
+    modalidades = ("Operador Logístico", "Crossdock", "Fulfillment", "Flota Propia")
+    resultados.append(medir("app(orden-desc-mejorado).py::rank_modalidades", ns["rank_modalidades"],
+                            v6, repeticiones))
+    resultados.append(medir("app(orden-desc-mejorado).py::costos_estimados", ns["costos_estimados"],
+                            list(itertools.product(modalidades, TAMANOS, REGIONES)), repeticiones))
+    resultados.append(medir("app(orden-desc-mejorado).py::beneficios_clave", ns["beneficios_clave"],
+                            [(m,) + c for m, c in zip(itertools.cycle(modalidades), v6)], repeticiones))
+    return resultados
+
+
+def rerun(app, etapa):
+    """Tiempo (ms) de un rerun: 'inicial' (primera carga) o 'envio' (clic en el botón/formulario)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(RAIZ / app), default_timeout=60)
+    t0 = time.perf_counter()
+    at.run()
+    if etapa == "envio":
+        t0 = time.perf_counter()
+        at.button[0].click().run()
+    ms = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(f"{app} falló en el rerun {etapa}: {at.exception[0].message}")
+    return ms
+
+
+def bench_reruns(repeticiones):
+    """Rerun completo de cada script sin navegador."""
+    resultados = []
+    for app in APPS:
+        for etapa in ("inicial", "envio"):
+            tiempos = [rerun(app, etapa) for _ in range(repeticiones)]
+            tracemalloc.start()
+            rerun(app, etapa)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            resultados.append(resumen(f"{app}::rerun_{etapa}", tiempos, pico))
+    return resultados
+
+
+# ── Reporte ──────────────────────────────────────────────────────────────────
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados):
+    ancho = max(len(r["nombre"]) for r in resultados)
+    print(f"{'benchmark':<{ancho}}  {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'pico KiB':>10}")
+    for r in resultados:
+        print(f"{r['nombre']:<{ancho}}  {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+              f"{r['p99_ms']:>9.3f} {r['pico_kib']:>10.1f}")
+
+
+def comparar(actual, anterior, tolerancia):
+    """Imprime la razón p50/p95 contra una corrida anterior; devuelve las regresiones."""
+    previos = {r["nombre"]: r for r in anterior["resultados"]}
+    regresiones = []
+    print(f"\nComparación contra {anterior.get('commit') or 'corrida anterior'} (tolerancia {tolerancia:.0%})")
+    for r in actual["resultados"]:
+        p = previos.get(r["nombre"])
+        if p is None or not p["p50_ms"]:
+            continue
+        razon50 = r["p50_ms"] / p["p50_ms"]
+        razon95 = r["p95_ms"] / p["p95_ms"] if p["p95_ms"] else float("nan")
+        marca = ""
+        if razon50 > 1 + tolerancia:
+            marca = "  ← regresión"
+            regresiones.append(r["nombre"])
+        print(f"  {r['nombre']}: p50 ×{razon50:.2f}  p95 ×{razon95:.2f}{marca}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las apps de operadores logísticos")
+    parser.add_argument("--repeticiones", type=int, default=2000, help="llamadas por función pura")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns por app (0 para omitir)")
+    parser.add_argument("--salida", type=Path, help="archivo JSON de resultados")
+    parser.add_argument("--comparar", type=Path, help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="regresión permitida en p50")
+    args = parser.parse_args(argv)
+
+    resultados = bench_funciones(args.repeticiones)
+    if args.reruns:
+        resultados += bench_reruns(args.reruns)
+
+    reporte = {
+        "commit": commit_actual(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    imprimir(resultados)
+    if args.salida:
+        args.salida.write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.comparar:
+        anterior = json.loads(args.comparar.read_text(encoding="utf-8"))
+        if comparar(reporte, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
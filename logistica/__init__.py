@@ -0,0 +1,56 @@
+"""
+Núcleo reutilizable de los recomendadores de operadores logísticos.
+Las apps de Streamlit siguen siendo la interfaz; este paquete expone la
+lógica de puntuación para procesos por lotes.
+
+Los nombres se cargan a pedido: `import logistica` no importa NumPy ni
+pandas, y `logistica.nucleo` (Python puro) tampoco. Los motores vectorizados
+se importan al primer acceso.
+"""
+import importlib
+
+_EXPORTADOS = {
+    "nucleo": (
+        "COLUMNAS_ESCENARIO", "CRITERIOS", "MODALIDADES", "REGIONES",
+        "rank_modalidades", "calcular_primera_milla", "costos_estimados",
+        "descripcion_mod", "beneficios_clave", "desventajas_clave",
+        "recomendar_modalidad", "puntuar_modalidades", "ordenar_modalidades",
+        "costo_flota_por_entrega", "flota_rentable",
+    ),
+    "datos": ("TAMANOS",),
+    "ranking": ("PERFILES", "PESOS", "puntuar_lote", "rank_modalidades_lote"),
+    "primera_milla": ("facturar_archivo", "primera_milla_ordenes"),
+    "tarifas": ("TARIFARIO", "Tarifario", "compilar"),
+    "fulfillment": ("cargar_serie", "simular_almacenamiento"),
+    "cache": ("CacheLRU", "cache_compartida", "memorizar"),
+    "cache_disco": ("CacheDisco",),
+    "estrategias": ("ESTRATEGIAS", "Estrategia", "registrar"),
+    "comparacion": ("comparar",),
+    "rutas": ("ArbolKD", "planificar"),
+    "retiros": ("programar",),
+    "consolidacion": ("consolidar",),
+    "devoluciones": ("acumular", "proyectar"),
+    "despacho": ("MatrizDespacho", "cotizar_tabla"),
+    "resultados": ("Resultados", "compactar"),
+    "incremental": ("actualizar",),
+    "historial": ("HistorialTarifas", "repreciar"),
+    "catalogo": ("lanzar", "puntuar_catalogo"),
+}
+# Sin nombres iguales a un submódulo (sensibilidad.sensibilidad,
+# equilibrio.equilibrio): tras importarlo, el submódulo ocupa ese atributo.
+_MODULO_DE = {nombre: modulo for modulo, nombres in _EXPORTADOS.items() for nombre in nombres}
+
+__all__ = sorted(_MODULO_DE)
+
+
+def __getattr__(nombre):
+    modulo = _MODULO_DE.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,177 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Memoización acotada para tablas de costos
+# Cada rerun de Streamlit vuelve a pedir las mismas tablas; con esta capa se
+# construyen al primer uso y se reutilizan entre sesiones del mismo proceso.
+# La clave incluye la versión del tarifario, así un cambio de tarifas nunca
+# devuelve tablas viejas; también incluye una huella de la configuración de
+# logistica.datos y del código del paquete (ver huella), así los valores
+# guardados en disco no sobreviven a otros parámetros ni a un despliegue.
+# Tamaño acotado con desalojo LRU y contadores.
+# Detrás de cada cache compartida va, si está activa, la cache en disco de
+# logistica.cache_disco, común a todos los procesos del servidor.
+# ──────────────────────────────────────────────────────────────────────────────
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from . import tarifas
+
+MAX_ENTRADAS = 256
+# Formato de las claves y valores memorizados; subirla invalida todas las caches
+VERSION_ESQUEMA = 1
+
+
+class CacheLRU:
+    """
+    Diccionario acotado con desalojo del menos usado; seguro entre hilos.
+    Con `respaldo` (p. ej. una CacheDisco) los fallos se buscan ahí antes de
+    construir el valor.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, respaldo=None):
+        self.max_entradas = max_entradas
+        self.respaldo = respaldo
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def __len__(self):
+        return len(self._datos)
+
+    def obtener(self, clave, construir):
+        """Devuelve el valor de `clave`, construyéndolo con `construir()` si falta."""
+        with self._candado:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+        valor = self.respaldo.obtener(clave, construir) if self.respaldo is not None else construir()
+        with self._candado:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+        return valor
+
+    def limpiar(self):
+        with self._candado:
+            self._datos.clear()
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        resultado = {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+        if self.respaldo is not None:
+            resultado["disco"] = self.respaldo.estadisticas()
+        return resultado
+
+
+# Caches compartidas por nombre: el módulo vive en sys.modules, así que
+# sobreviven a los reruns y las comparten todas las sesiones del servidor.
+_COMPARTIDAS = {}
+_CANDADO_COMPARTIDAS = threading.Lock()
+
+
+def cache_compartida(nombre, max_entradas=MAX_ENTRADAS):
+    with _CANDADO_COMPARTIDAS:
+        if nombre not in _COMPARTIDAS:
+            _COMPARTIDAS[nombre] = CacheLRU(max_entradas, _respaldo_disco(nombre))
+        return _COMPARTIDAS[nombre]
+
+
+def _respaldo_disco(nombre):
+    """CacheDisco del espacio `nombre`, o None si está desactivada o no se puede abrir."""
+    from . import cache_disco
+
+    if not cache_disco.RUTA_CACHE:
+        return None
+    try:
+        return cache_disco.CacheDisco(cache_disco.RUTA_CACHE, espacio=nombre, version=version_cache())
+    except (OSError, sqlite3.Error):
+        # Disco de solo lectura o archivo bloqueado: queda solo la cache en memoria
+        return None
+
+
+def estadisticas_compartidas():
+    return {nombre: c.estadisticas() for nombre, c in _COMPARTIDAS.items()}
+
+
+# ── Claves ───────────────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def huella():
+    """
+    Hash corto de lo que, además de las tarifas, determina los valores
+    memorizados: VERSION_ESQUEMA, las constantes de logistica.datos
+    (FLOTA_RUTAS, KM_RUTAS_RM, INVENTARIO_FULFILLMENT, UMBRAL_PRECIO_SP, …)
+    y el código fuente del paquete (reglas, pesos, modelos).
+    """
+    from . import datos
+
+    constantes = {k: v for k, v in vars(datos).items() if k.isupper() and not k.startswith("_")}
+    h = hashlib.sha1(json.dumps([VERSION_ESQUEMA, constantes], sort_keys=True, default=str,
+                                ensure_ascii=False).encode("utf-8"))
+    for ruta in sorted(Path(__file__).parent.glob("*.py")):
+        h.update(ruta.name.encode("utf-8"))
+        h.update(ruta.read_bytes())
+    return h.hexdigest()[:12]
+
+
+def version_cache():
+    """Versión del tarifario más huella(): cambia con cualquier tarifa, parámetro o código."""
+    return f"{tarifas.TARIFARIO.version}-{huella()}"
+
+
+def _huella_funcion(funcion):
+    """Hash del código de la función memorizada (p. ej. las de las apps, fuera del paquete)."""
+    try:
+        fuente = inspect.getsource(funcion)
+    except (OSError, TypeError):
+        return ""
+    return hashlib.sha1(fuente.encode("utf-8")).hexdigest()[:12]
+
+
+def tramo_precio(precio):
+    """0 bajo el corte de primera milla SP, 1 desde el corte."""
+    return int(precio >= tarifas.UMBRAL_PRECIO_SP)
+
+
+def clave_costos(modalidad, clase, precio):
+    """Clave de tabla_costos_modalidad: el precio solo importa por su tramo."""
+    return (modalidad, clase, tramo_precio(precio))
+
+
+def memorizar(cache=None, clave=None):
+    """
+    Decorador: memoriza la función en `cache` (una CacheLRU nueva si no se
+    indica). La clave es (nombre de la función, hash de su código,
+    version_cache(), clave(*args)), o los argumentos tal cual si no hay
+    `clave`. Los valores se comparten entre llamadas, por lo que no deben
+    modificarse.
+    """
+    def decorador(funcion):
+        destino = cache if cache is not None else CacheLRU()
+        codigo = _huella_funcion(funcion)
+
+        @functools.wraps(funcion)
+        def envoltura(*args):
+            k = (funcion.__qualname__, codigo, version_cache()) + (clave(*args) if clave else args)
+            return destino.obtener(k, lambda: funcion(*args))
+
+        envoltura.cache = destino
+        return envoltura
+    return decorador
@@ -0,0 +1,252 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Cache persistente compartida entre procesos
+# Los servidores Streamlit detrás del balanceador y los procesos nocturnos
+# recalculan las mismas tablas de ranking y costos. Esta capa las guarda en un
+# SQLite en modo WAL (varios lectores y un escritor a la vez, sin servidor):
+#   clave     hash SHA-256 canónico de la clave de memorizar, que ya incluye
+#             el nombre y el código de la función y cache.version_cache()
+#   valor     pickle del resultado
+#   version   cache.version_cache() con que se calculó (para invalidar)
+# Un cambio en FIRST_MILE, REVERSE, CROSSDOCK_SCL, FLOTA_ENV, en otra
+# constante de logistica.datos o en el código cambia la versión y deja las
+# entradas viejas inalcanzables. No se borran al abrir (durante un despliegue
+# conviven procesos con versiones distintas): el tamaño total se acota en
+# bytes desalojando las entradas usadas hace más tiempo, y
+# `python -m logistica cache --invalidar` borra las de otras versiones.
+# Cada proceso lleva la cuenta de bytes de sus escrituras y solo la
+# recalcula con SUM(bytes) al abrir, al pasar el máximo y cada
+# RESINCRONIZAR_CADA inserciones (para ver lo que escribieron los demás).
+#
+#   LOGISTICA_CACHE_DISCO    ruta del archivo (sin definir o "" = solo cache en memoria)
+#   LOGISTICA_CACHE_MAX_MB   tamaño máximo (256 MB por defecto)
+# ──────────────────────────────────────────────────────────────────────────────
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RUTA_CACHE = os.environ.get("LOGISTICA_CACHE_DISCO", "")
+MAX_BYTES = int(float(os.environ.get("LOGISTICA_CACHE_MAX_MB", 256)) * 1024 * 1024)
+# Al superar el máximo se desaloja hasta esta fracción (no en cada inserción)
+FRACCION_TRAS_DESALOJO = 0.9
+RESINCRONIZAR_CADA = 1000
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    clave       TEXT PRIMARY KEY,
+    espacio     TEXT NOT NULL,
+    version     TEXT NOT NULL,
+    valor       BLOB NOT NULL,
+    bytes       INTEGER NOT NULL,
+    creado      REAL NOT NULL,
+    ultimo_uso  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entradas_uso ON entradas (ultimo_uso);
+CREATE INDEX IF NOT EXISTS entradas_version ON entradas (version);
+"""
+
+
+# ── Claves canónicas ─────────────────────────────────────────────────────────
+def _canonica(valor, h):
+    """Alimenta `h` con una representación estable de `valor` (independiente del proceso)."""
+    if valor is None or isinstance(valor, (bool, int, float, str, bytes)):
+        h.update(f"{type(valor).__name__}:{valor!r};".encode("utf-8"))
+    elif isinstance(valor, np.generic):
+        h.update(f"{valor.dtype.str}:{valor.item()!r};".encode("utf-8"))
+    elif isinstance(valor, (tuple, list)):
+        h.update(f"{type(valor).__name__}[{len(valor)}](".encode("utf-8"))
+        for v in valor:
+            _canonica(v, h)
+        h.update(b")")
+    elif isinstance(valor, dict):
+        h.update(f"dict[{len(valor)}](".encode("utf-8"))
+        for k in sorted(valor, key=repr):
+            _canonica(k, h)
+            _canonica(valor[k], h)
+        h.update(b")")
+    elif isinstance(valor, np.ndarray):
+        h.update(f"ndarray:{valor.dtype.str}:{valor.shape}:".encode("utf-8"))
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, (pd.DataFrame, pd.Series)):
+        nombres = list(valor.columns) if isinstance(valor, pd.DataFrame) else [valor.name]
+        h.update(f"{type(valor).__name__}:{valor.shape}:".encode("utf-8"))
+        _canonica(nombres, h)
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    else:
+        raise TypeError(f"Clave de cache no canónica: {type(valor).__name__}")
+
+
+def hash_clave(clave):
+    """SHA-256 (hex) de una clave de memorizar: tuplas de textos, números, arreglos o DataFrames."""
+    h = hashlib.sha256()
+    _canonica(clave, h)
+    return h.hexdigest()
+
+
+# ── Cache en disco ───────────────────────────────────────────────────────────
+class CacheDisco:
+    """
+    Cache SQLite con la misma interfaz que CacheLRU (`obtener(clave,
+    construir)`), segura entre hilos (una conexión por hilo) y entre procesos.
+    `espacio` separa las caches compartidas que usan el mismo archivo, y
+    `version` forma parte de cada clave: solo se leen entradas de la propia.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE, espacio="", max_bytes=MAX_BYTES, version=None):
+        from .cache import version_cache
+
+        if not ruta:
+            raise ValueError("CacheDisco necesita una ruta (LOGISTICA_CACHE_DISCO no está definida)")
+        self.ruta = str(ruta)
+        self.espacio = espacio
+        self.max_bytes = max_bytes
+        self.version = version or version_cache()
+        self._local = threading.local()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.errores = 0
+        # Bytes del archivo según este proceso (None = recalcular con SUM)
+        self._bytes = None
+        self._inserciones = 0
+        self._cuenta = threading.Lock()
+        Path(self.ruta).parent.mkdir(parents=True, exist_ok=True)
+        with self._conexion() as con:
+            con.executescript(_ESQUEMA)
+
+    def _conexion(self):
+        con = getattr(self._local, "conexion", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = con
+        return con
+
+    def obtener(self, clave, construir):
+        """Devuelve el valor de `clave`, construyéndolo con `construir()` y guardándolo si falta."""
+        h = hash_clave((self.espacio, self.version, clave))
+        valor = self._leer(h)
+        if valor is not _FALTA:
+            self.aciertos += 1
+            return valor
+        self.fallos += 1
+        valor = construir()
+        self._escribir(h, valor)
+        return valor
+
+    def _leer(self, h):
+        try:
+            con = self._conexion()
+            fila = con.execute("SELECT valor FROM entradas WHERE clave = ?", (h,)).fetchone()
+            if fila is None:
+                return _FALTA
+            valor = pickle.loads(fila[0])
+            con.execute("UPDATE entradas SET ultimo_uso = ? WHERE clave = ?", (time.time(), h))
+            return valor
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, ImportError, EOFError, TypeError):
+            # Archivo bloqueado o valor de una versión del código incompatible: se recalcula
+            self.errores += 1
+            return _FALTA
+
+    def _escribir(self, h, valor):
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self.errores += 1
+            return
+        ahora = time.time()
+        try:
+            con = self._conexion()
+            anterior = con.execute("SELECT bytes FROM entradas WHERE clave = ?", (h,)).fetchone()
+            con.execute(
+                "INSERT OR REPLACE INTO entradas (clave, espacio, version, valor, bytes, creado, ultimo_uso) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (h, self.espacio, self.version, datos, len(datos), ahora, ahora))
+            with self._cuenta:
+                self._inserciones += 1
+                if self._bytes is None or self._inserciones % RESINCRONIZAR_CADA == 0:
+                    self._bytes = self._total(con)
+                else:
+                    self._bytes += len(datos) - (anterior[0] if anterior else 0)
+                if self._bytes > self.max_bytes:
+                    self._desalojar(con)
+        except sqlite3.Error:
+            self._bytes = None
+            self.errores += 1
+
+    @staticmethod
+    def _total(con):
+        return con.execute("SELECT COALESCE(SUM(bytes), 0) FROM entradas").fetchone()[0]
+
+    def _desalojar(self, con):
+        # La cuenta propia no ve los borrados de otros procesos: se confirma antes de borrar
+        total = self._bytes = self._total(con)
+        if total <= self.max_bytes:
+            return
+        objetivo = total - int(self.max_bytes * FRACCION_TRAS_DESALOJO)
+        liberados = 0
+        claves = []
+        for clave, n in con.execute("SELECT clave, bytes FROM entradas ORDER BY ultimo_uso"):
+            claves.append((clave,))
+            liberados += n
+            if liberados >= objetivo:
+                break
+        con.executemany("DELETE FROM entradas WHERE clave = ?", claves)
+        self._bytes = total - liberados
+        self.desalojos += len(claves)
+
+    def invalidar(self, version=None):
+        """Borra las entradas calculadas con otra versión (por defecto, la de esta cache); devuelve cuántas."""
+        con = self._conexion()
+        self._bytes = None
+        return con.execute("DELETE FROM entradas WHERE version != ?", (version or self.version,)).rowcount
+
+    def limpiar(self):
+        """Borra las entradas de este espacio."""
+        self._bytes = None
+        self._conexion().execute("DELETE FROM entradas WHERE espacio = ?", (self.espacio,))
+
+    def vaciar(self):
+        """Borra todas las entradas del archivo y devuelve el espacio al disco."""
+        con = self._conexion()
+        self._bytes = None
+        con.execute("DELETE FROM entradas")
+        con.execute("VACUUM")
+
+    def estadisticas(self):
+        entradas, total = self._conexion().execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas WHERE espacio = ?",
+            (self.espacio,)).fetchone()
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": entradas,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "errores": self.errores,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+_FALTA = object()
+
+
+def resumen_archivo(ruta=RUTA_CACHE):
+    """Entradas y bytes por espacio y versión de un archivo de cache (para la CLI)."""
+    con = sqlite3.connect(str(ruta), timeout=30)
+    try:
+        return pd.read_sql_query(
+            "SELECT espacio, version, COUNT(*) AS entradas, SUM(bytes) AS bytes, "
+            "MAX(ultimo_uso) AS ultimo_uso FROM entradas GROUP BY espacio, version "
+            "ORDER BY espacio, version", con)
+    finally:
+        con.close()
@@ -0,0 +1,221 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Evaluación del catálogo completo de un seller
+# Cada SKU (clase logística, precio, rotación y unidades) se lleva a las tres
+# preguntas de las apps (bodega del seller, voluminoso = clase G/SG, alta
+# rotación), se le asigna la modalidad de una estrategia del registro y los
+# costos del tarifario en CLP enteros. El catálogo se parte en bloques que
+# corren en un ThreadPoolExecutor compartido (los gathers de NumPy liberan el
+# GIL y no hay que serializar bloques a otros procesos): `lanzar` vuelve de
+# inmediato con un Trabajo que informa su progreso, así la app no se bloquea.
+# ──────────────────────────────────────────────────────────────────────────────
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .datos import EQUIVALENCIA_TAMANO_CLASE, MODALIDADES_PRIMERA_MILLA
+from .estrategias import ESTRATEGIAS, SIN_MODALIDAD, TAMANOS_VOLUMINOSOS
+from .nucleo import EscenarioInvalido, a_booleano
+from .ranking import MODALIDADES
+from .tarifas import CLASES, TARIFARIO
+
+COLUMNAS_REQUERIDAS = ("sku", "clase", "precio", "rotacion")
+TAMANO_BLOQUE = 8192
+
+# Clases que las apps de tres preguntas tratan como voluminosas (G, SG)
+CLASES_VOLUMINOSAS = tuple(EQUIVALENCIA_TAMANO_CLASE[t] for t in TAMANOS_VOLUMINOSOS)
+_VOLUMINOSA = np.array([c in CLASES_VOLUMINOSAS for c in CLASES])
+_PAGAN_PRIMERA_MILLA = np.array([m in MODALIDADES_PRIMERA_MILLA for m in MODALIDADES])
+
+_ROTACION = {"alta": True, "baja": False}
+
+
+# ── Lectura y validación ─────────────────────────────────────────────────────
+def leer_catalogo(archivo, nombre=None):
+    """
+    Catálogo desde una ruta o un archivo abierto (p. ej. el de st.file_uploader):
+    Parquet si el nombre termina en .parquet, si no CSV.
+    """
+    nombre = str(nombre or archivo)
+    if Path(nombre).suffix.lower() in (".parquet", ".pq"):
+        return pd.read_parquet(archivo)
+    return pd.read_csv(archivo, dtype={"sku": str, "clase": "category", "rotacion": "category"})
+
+
+def _rotacion(valores):
+    """Alta rotación por SKU: booleanos, 0/1, Sí/No o alta/baja."""
+    serie = pd.Series(valores)
+    if serie.dtype.kind in "biuf":
+        return serie.to_numpy().astype(bool)
+    unicos = pd.unique(serie.astype(str))
+    try:
+        mapa = {u: _ROTACION.get(u.strip().lower(), None) for u in unicos}
+        mapa = {u: a_booleano(u, "rotacion") if v is None else v for u, v in mapa.items()}
+    except EscenarioInvalido as e:
+        raise ValueError(f"{e} ni alta/baja") from None
+    return serie.astype(str).map(mapa).to_numpy(dtype=bool)
+
+
+def validar(catalogo):
+    """Columnas numéricas y códigos de un catálogo; lanza ValueError si no sirve."""
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in catalogo.columns]
+    if faltantes:
+        raise ValueError(f"faltan columnas: {', '.join(faltantes)}")
+    if not len(catalogo):
+        raise ValueError("el catálogo no tiene filas")
+    clases = catalogo["clase"]
+    if hasattr(clases, "cat"):
+        codigos = clases.cat.codes.to_numpy()
+        if (codigos < 0).any():
+            raise ValueError("hay SKU sin clase")
+        categorias = np.array([str(c).strip() for c in clases.cat.categories], dtype=object)
+        clase = TARIFARIO.codigo_clase(categorias)[codigos]
+    else:
+        clase = TARIFARIO.codigo_clase(clases.astype(str).str.strip().to_numpy())
+    precio = pd.to_numeric(catalogo["precio"], errors="coerce").to_numpy(np.float64)
+    if np.isnan(precio).any():
+        raise ValueError("hay precios vacíos o no numéricos")
+    unidades = (pd.to_numeric(catalogo["unidades"], errors="coerce").fillna(0).to_numpy(np.int64)
+                if "unidades" in catalogo.columns else np.ones(len(catalogo), dtype=np.int64))
+    return {"clase": clase, "precio": precio, "alta_rot": _rotacion(catalogo["rotacion"]),
+            "unidades": unidades}
+
+
+# ── Puntuación ───────────────────────────────────────────────────────────────
+def _puntuar_bloque(codigos, tiene_bodega, estrategia, tasa_devolucion):
+    clase = codigos["clase"]
+    n = len(clase)
+    entradas = {"tiene_bodega": np.full(n, tiene_bodega), "voluminoso": _VOLUMINOSA[clase],
+                "alta_rot": codigos["alta_rot"]}
+    # Las entradas ya son las dimensiones de la tabla (sin pasar por el escenario v6)
+    modalidad = estrategia.tabla.buscar_lote(entradas)["orden"][:, 0]
+    paga = _PAGAN_PRIMERA_MILLA[modalidad] & (modalidad != SIN_MODALIDAD)
+    primera = np.where(paga, TARIFARIO.primera_milla(clase, codigos["precio"]), 0).astype(np.int64)
+    inversa = TARIFARIO.logistica_inversa(clase).astype(np.int64)
+    unidades = codigos["unidades"]
+    return {
+        "modalidad": modalidad,
+        "primera_milla": primera,
+        "logistica_inversa": inversa,
+        "costo_primera_milla": primera * unidades,
+        "costo_inversa_esperado": np.rint(inversa * unidades * tasa_devolucion).astype(np.int64),
+    }
+
+
+# Columnas de _puntuar_bloque, para armar el resultado aun sin bloques
+COLUMNAS_RESULTADO = ("modalidad", "primera_milla", "logistica_inversa", "costo_primera_milla",
+                      "costo_inversa_esperado")
+
+
+def _resultado(catalogo, codigos, partes):
+    columnas = {k: (np.concatenate([p[k] for p in partes]) if partes
+                    else np.empty(0, dtype=np.int8 if k == "modalidad" else np.int64))
+                for k in COLUMNAS_RESULTADO}
+    resultado = pd.DataFrame({
+        "sku": catalogo["sku"].to_numpy(),
+        "clase": pd.Categorical.from_codes(codigos["clase"], categories=CLASES),
+        "precio": codigos["precio"],
+        "unidades": codigos["unidades"],
+    })
+    for k, v in columnas.items():
+        resultado[k] = pd.Categorical.from_codes(v, categories=MODALIDADES) if k == "modalidad" else v
+    return resultado
+
+
+class Trabajo:
+    """
+    Puntuación de un catálogo en curso: `progreso` (0 a 1) según las filas de
+    bloques terminados, `listo` y `resultado()` (bloquea hasta terminar; relanza
+    el error de un bloque si lo hubo).
+    """
+
+    def __init__(self, catalogo, codigos, futuros, filas):
+        self.catalogo = catalogo
+        self.codigos = codigos
+        self.futuros = futuros
+        self.filas = filas
+        self.total = len(catalogo)
+        self._resultado = None
+        self._candado = threading.Lock()
+
+    @property
+    def progreso(self):
+        if not self.total:
+            return 1.0
+        return sum(n for f, n in zip(self.futuros, self.filas) if f.done()) / self.total
+
+    @property
+    def listo(self):
+        return all(f.done() for f in self.futuros)
+
+    def resultado(self):
+        with self._candado:
+            if self._resultado is None:
+                self._resultado = _resultado(self.catalogo, self.codigos, [f.result() for f in self.futuros])
+            return self._resultado
+
+    def cancelar(self):
+        for f in self.futuros:
+            f.cancel()
+
+
+_EJECUTOR = None
+_CANDADO_EJECUTOR = threading.Lock()
+
+
+def ejecutor():
+    """ThreadPoolExecutor del proceso, compartido por todas las sesiones."""
+    global _EJECUTOR
+    with _CANDADO_EJECUTOR:
+        if _EJECUTOR is None:
+            _EJECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                           thread_name_prefix="catalogo")
+        return _EJECUTOR
+
+
+def lanzar(catalogo, tiene_bodega, estrategia="recomendar_modalidad", tasa_devolucion=0.0,
+           tamano_bloque=TAMANO_BLOQUE, pool=None):
+    """
+    Valida `catalogo` (aquí, de modo que los errores de entrada se ven al
+    instante) y reparte su puntuación en bloques en `pool` (por defecto el
+    ejecutor compartido). Devuelve un Trabajo sin esperar.
+      tiene_bodega     respuesta del seller, común a todo el catálogo
+      estrategia       nombre o Estrategia de tres preguntas del registro
+      tasa_devolucion  fracción esperada de unidades devueltas (costo de inversa)
+    """
+    estrategia = ESTRATEGIAS[estrategia] if isinstance(estrategia, str) else estrategia
+    codigos = validar(catalogo)
+    pool = pool or ejecutor()
+    futuros, filas = [], []
+    for inicio in range(0, len(catalogo), tamano_bloque):
+        bloque = {k: v[inicio:inicio + tamano_bloque] for k, v in codigos.items()}
+        futuros.append(pool.submit(_puntuar_bloque, bloque, bool(tiene_bodega), estrategia, tasa_devolucion))
+        filas.append(len(bloque["clase"]))
+    return Trabajo(catalogo, codigos, futuros, filas)
+
+
+def puntuar_catalogo(catalogo, tiene_bodega, estrategia="recomendar_modalidad", tasa_devolucion=0.0):
+    """Versión síncrona de lanzar(): DataFrame por SKU con modalidad y costos."""
+    return lanzar(catalogo, tiene_bodega, estrategia, tasa_devolucion).resultado()
+
+
+# ── Reportes ─────────────────────────────────────────────────────────────────
+def resumen(resultado):
+    """SKU, unidades y costos totales por modalidad recomendada."""
+    agregados = {"skus": ("modalidad", "size"), "unidades": ("unidades", "sum"),
+                 "costo_primera_milla": ("costo_primera_milla", "sum"),
+                 "costo_inversa_esperado": ("costo_inversa_esperado", "sum")}
+    return resultado.groupby("modalidad", observed=True).agg(**agregados).reset_index()
+
+
+def exportar(resultado, formato):
+    """Bytes del resultado en 'parquet' o 'csv' (para descargas)."""
+    if formato == "parquet":
+        destino = io.BytesIO()
+        resultado.to_parquet(destino, index=False)
+        return destino.getvalue()
+    return resultado.to_csv(index=False).encode("utf-8")
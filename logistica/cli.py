@@ -0,0 +1,454 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Línea de comandos
+#   python -m logistica puntuar escenarios.csv -o ranking.csv
+# Lee un CSV con las columnas de COLUMNAS_ESCENARIO y agrega el orden de
+# modalidades (Primero … Cuarto) y el puntaje de cada una. El motor por
+# defecto es el núcleo escalar en Python puro (arranque sin NumPy ni pandas);
+# --motor vectorizado usa rank_modalidades_lote para archivos grandes.
+#   python -m logistica servir --puerto 8765
+# Levanta el servicio HTTP de cotización (logistica.servicio).
+#   python -m logistica comparar [escenarios.csv] --diferencias difs.csv
+# Desacuerdo entre estrategias de recomendación (logistica.comparacion).
+#   python -m logistica rutas entregas.csv --vehiculos 8 -o rutas.csv
+# Rutas de Flota Propia del día y costo por entrega (logistica.rutas).
+#   python -m logistica retiros sellers.csv -o retiros.csv
+# Ventana y camión de retiro Crossdock por seller y utilización (logistica.retiros).
+#   python -m logistica consolidar lineas.csv --max-items 5 --grupo cliente
+# Envíos que minimizan primera milla + logística inversa (logistica.consolidacion).
+#   python -m logistica devoluciones ventas.parquet --devoluciones devs.parquet -o proyeccion.csv
+# Tasas de devolución suavizadas y costo mensual de inversa (logistica.devoluciones).
+#   python -m logistica despacho cotizaciones.csv -o con_despacho.csv
+# Despacho final al cliente por comuna/zona, tamaño y precio (logistica.despacho).
+#   python -m logistica equilibrio --tamano M1 --precio 30000
+# Cruces de costo entre modalidades por órdenes diarias (logistica.equilibrio).
+#   python -m logistica actualizar cartera.arrow --reporte cambios.csv
+# Recalcula solo las filas afectadas por tarifas o reglas cambiadas (logistica.incremental).
+#   python -m logistica tarifas historial.arrow --agregar 2025-07-01
+#   python -m logistica tarifas historial.arrow --repreciar lineas.csv -o repreciadas.csv
+# Historial de tarifas con vigencia por fecha y repreciado de líneas (logistica.historial).
+#   python -m logistica cache [--invalidar | --vaciar]
+# Resume la cache en disco y borra las entradas de otras versiones (logistica.cache_disco).
+# ──────────────────────────────────────────────────────────────────────────────
+import argparse
+import csv
+import os
+import sys
+from functools import lru_cache
+
+from . import nucleo
+
+
+class ErrorEntrada(ValueError):
+    """Fila o encabezado del archivo de escenarios inválido."""
+
+
+def normalizar(fila, linea=0):
+    """Fila del CSV → tupla de argumentos de rank_modalidades (en COLUMNAS_ESCENARIO)."""
+    try:
+        return nucleo.normalizar_escenario(fila)
+    except nucleo.EscenarioInvalido as e:
+        raise ErrorEntrada(f"línea {linea}: {e}") from None
+
+
+@lru_cache(maxsize=4096)
+def _puntuar(escenario):
+    """(orden de modalidades, score por modalidad en el orden de MODALIDADES)."""
+    ranking = nucleo.rank_modalidades(*escenario)
+    score = dict(ranking)
+    return tuple(m for m, _ in ranking), tuple(score[m] for m in nucleo.MODALIDADES)
+
+
+def _puntuar_vectorizado(escenarios):
+    from .ranking import puntuar_lote
+
+    columnas = {c: [e[i] for e in escenarios] for i, c in enumerate(nucleo.COLUMNAS_ESCENARIO)}
+    score, orden = puntuar_lote(columnas)
+    for s, o in zip(score.tolist(), orden.tolist()):
+        yield tuple(nucleo.MODALIDADES[i] for i in o), tuple(s)
+
+
+def puntuar_archivo(entrada, salida, motor="escalar"):
+    """Puntúa cada fila de `entrada` (archivo de texto CSV) y escribe en `salida`. Devuelve las filas."""
+    lector = csv.DictReader(entrada)
+    encabezado = lector.fieldnames or []
+    faltantes = [c for c in nucleo.COLUMNAS_ESCENARIO if c not in encabezado and c not in nucleo.OPCIONALES]
+    if faltantes:
+        raise ErrorEntrada(f"faltan columnas: {', '.join(faltantes)}")
+
+    filas = list(lector)
+    escenarios = [normalizar(f, i) for i, f in enumerate(filas, start=2)]
+    if motor == "vectorizado" and escenarios:
+        resultados = _puntuar_vectorizado(escenarios)
+    else:
+        resultados = map(_puntuar, escenarios)
+
+    escritor = csv.writer(salida, lineterminator="\n")
+    escritor.writerow(list(encabezado) + list(nucleo.ORDINALES)
+                      + [f"score {m}" for m in nucleo.MODALIDADES])
+    for fila, (orden, score) in zip(filas, resultados):
+        escritor.writerow([fila[c] for c in encabezado] + list(orden) + [repr(s) for s in score])
+    return len(filas)
+
+
+def puntuar_compacto(args):
+    """puntuar con salida .arrow / .parquet: resultados compactos (ver logistica.resultados)."""
+    from .resultados import compactar_archivo
+
+    try:
+        resultados = compactar_archivo(args.entrada)
+    except (ValueError, KeyError) as e:
+        raise ErrorEntrada(str(e)) from None
+    resultados.guardar(args.salida)
+    print(f"{len(resultados)} escenarios puntuados ({resultados.nbytes / 1e6:.1f} MB) → {args.salida}",
+          file=sys.stderr)
+    return 0
+
+
+def comparar(args):
+    import pandas as pd
+    from .comparacion import comparar as comparar_estrategias
+
+    estrategias = args.estrategias.split(",") if args.estrategias else None
+    try:
+        resultado = comparar_estrategias(args.entrada, estrategias)
+    except (ValueError, KeyError) as e:
+        raise ErrorEntrada(str(e)) from None
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(f"{resultado.total} escenarios, {len(resultado.filas)} clases distintas\n")
+        print("Desacuerdo en la modalidad primera (fracción de filas):")
+        print(resultado.desacuerdo().round(4), end="\n\n")
+        print("Distancia de Kendall entre órdenes:")
+        print(resultado.kendall().round(4))
+    if args.diferencias:
+        resultado.diferencias().to_csv(args.diferencias, index=False)
+        print(f"\nDiferencias → {args.diferencias}", file=sys.stderr)
+    return 0
+
+
+def rutas(args):
+    import json
+
+    import pandas as pd
+    from . import rutas as modulo_rutas
+
+    if args.calibrar:
+        coeficientes, filas = modulo_rutas.calibrar()
+        print(pd.DataFrame(filas).to_string(index=False), end="\n\n")
+        print("KM_RUTAS_RM =", coeficientes)
+        return 0
+    if not args.entrada or not args.vehiculos:
+        raise ErrorEntrada("se requieren el archivo de entregas y --vehiculos")
+    entregas = pd.read_csv(args.entrada)
+    faltantes = [c for c in ("latitud", "longitud") if c not in entregas.columns]
+    if faltantes:
+        raise ErrorEntrada(f"faltan columnas: {', '.join(faltantes)}")
+    deposito = tuple(float(v) for v in args.deposito.split(",")) if args.deposito else modulo_rutas.DEPOSITO_RM
+    plan = modulo_rutas.planificar(entregas[["latitud", "longitud"]].to_numpy(), args.vehiculos, deposito)
+    print(json.dumps(plan.resumen(), ensure_ascii=False))
+    if args.salida:
+        vehiculo = [0] * len(entregas)
+        parada = [0] * len(entregas)
+        for v, ruta in enumerate(plan.rutas, start=1):
+            for p, i in enumerate(ruta.tolist(), start=1):
+                vehiculo[i], parada[i] = v, p
+        entregas.assign(vehiculo=vehiculo, parada=parada).to_csv(args.salida, index=False)
+        print(f"Rutas → {args.salida}", file=sys.stderr)
+    return 0
+
+
+def _camiones(texto):
+    """'furgon:8:12:6,camion:18:10:4' → 6 furgones de 8 m³/12 paradas y 4 camiones de 18 m³/10 paradas."""
+    camiones = []
+    for parte in texto.split(","):
+        try:
+            nombre, capacidad, paradas, cantidad = parte.split(":")
+            camiones += [(nombre, float(capacidad), int(paradas))] * int(cantidad)
+        except ValueError:
+            raise ErrorEntrada(f"camión mal especificado: {parte!r} (nombre:m3:paradas:cantidad)") from None
+    return tuple(camiones)
+
+
+def retiros(args):
+    import pandas as pd
+    from . import retiros as modulo_retiros
+
+    opciones = {}
+    if args.camiones:
+        opciones["camiones"] = _camiones(args.camiones)
+    if args.ventanas:
+        opciones["ventanas"] = tuple(v.strip() for v in args.ventanas.split(","))
+    try:
+        sellers = modulo_retiros.leer_sellers(args.entrada)
+        programa = modulo_retiros.programar(sellers, **opciones)
+    except ValueError as e:
+        raise ErrorEntrada(str(e)) from None
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(programa.reporte().to_string(index=False))
+    antes, despues = programa.dispersion
+    print(f"\nDistancia media bodega–camión: {antes:.1f} km (greedy) → {despues:.1f} km (mejorado)")
+    if programa.no_asignados:
+        print(f"{len(programa.no_asignados)} sellers sin capacidad en sus ventanas", file=sys.stderr)
+    if args.salida:
+        programa.piezas.join(sellers.drop(columns=["ventanas"], errors="ignore"), on="fila") \
+            .to_csv(args.salida, index=False)
+        print(f"Retiros → {args.salida}", file=sys.stderr)
+    return 0
+
+
+def consolidar(args):
+    import json
+
+    import pandas as pd
+    from .consolidacion import consolidar as consolidar_lineas
+
+    lineas = pd.read_csv(args.entrada)
+    try:
+        resultado = consolidar_lineas(lineas, args.max_items, args.tasa_devolucion, args.grupo.split(","))
+    except ValueError as e:
+        raise ErrorEntrada(str(e)) from None
+    print(json.dumps(resultado.resumen(), ensure_ascii=False))
+    if args.salida:
+        lineas.iloc[resultado.piezas["linea"]].reset_index(drop=True) \
+            .assign(paquete=resultado.piezas["paquete"].to_numpy(),
+                    unidades_en_paquete=resultado.piezas["unidades"].to_numpy()) \
+            .to_csv(args.salida, index=False)
+        print(f"Envíos → {args.salida}", file=sys.stderr)
+    return 0
+
+
+def devoluciones(args):
+    import pandas as pd
+    from . import devoluciones as modulo
+
+    try:
+        agregado = modulo.acumular(args.entrada, args.devoluciones, args.columna_devuelto)
+    except (ValueError, KeyError) as e:
+        raise ErrorEntrada(str(e)) from None
+    proyeccion = modulo.proyectar(agregado, args.meses, args.peso_previo)
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        costo = f"{proyeccion['costo_mes'].sum():,.0f}".replace(",", ".")
+        print(f"{int(agregado['lineas'].sum())} líneas, {int(agregado['devueltas'].sum())} devueltas; "
+              f"costo mensual proyectado ${costo}")
+        print(proyeccion.groupby("modalidad", observed=True)[["lineas_mes", "costo_mes"]].sum().round(0))
+    if args.tasas:
+        modulo.tasas(agregado, args.peso_previo).to_csv(args.tasas, index=False)
+        print(f"Tasas → {args.tasas}", file=sys.stderr)
+    if args.salida:
+        proyeccion.to_csv(args.salida, index=False)
+        print(f"Proyección → {args.salida}", file=sys.stderr)
+    return 0
+
+
+def despacho(args):
+    import pandas as pd
+    from .datos import DESPACHO
+    from .despacho import cotizar_tabla
+
+    tabla = pd.read_csv(args.entrada, dtype={"comuna": "category", "zona": "category", "tamano": "category"})
+    try:
+        columnas = cotizar_tabla(tabla)
+    except (ValueError, KeyError) as e:
+        raise ErrorEntrada(str(e)) from None
+    resultado = tabla.assign(**columnas)
+    if DESPACHO["referencial"]:
+        print("Aviso: logistica/despacho.json tiene tarifas y promociones referenciales, no la matriz vigente",
+              file=sys.stderr)
+    print(resultado.groupby("zona")[["tarifa_lista", "despacho"]].agg(["count", "mean"]).round(0))
+    if args.salida:
+        resultado.to_csv(args.salida, index=False)
+        print(f"{len(resultado)} cotizaciones → {args.salida}", file=sys.stderr)
+    return 0
+
+
+def equilibrio(args):
+    import pandas as pd
+    from .equilibrio import VOLUMEN_MAX, equilibrio_tamano
+    from .equilibrio import equilibrio as calcular
+
+    tamanos = args.tamano or list(nucleo.TAMANOS)
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        for tamano in tamanos:
+            # Con la rejilla por defecto se usa la versión memorizada (y la cache en disco)
+            curvas = (equilibrio_tamano(tamano, args.precio) if args.volumen_max == VOLUMEN_MAX
+                      else calcular(tamano, args.precio, volumen_max=args.volumen_max))
+            print(f"── {tamano} (precio ${args.precio:,.0f})".replace(",", "."))
+            print(curvas.cruces.round({"volumen": 1, "costo_dia": 0}).to_string(index=False))
+            print("Más barata por tramo de órdenes diarias:")
+            print(curvas.tramos().round({"desde": 1, "hasta": 1, "costo_por_orden": 0}).to_string(index=False))
+    return 0
+
+
+def actualizar(args):
+    import pandas as pd
+    from .incremental import actualizar as recalcular
+    from .resultados import cargar
+
+    try:
+        actualizacion = recalcular(cargar(args.entrada))
+    except (ValueError, KeyError, OSError) as e:
+        raise ErrorEntrada(str(e)) from None
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(actualizacion.cambios.to_string(index=False) if len(actualizacion.cambios) else "Sin cambios")
+    print(f"{len(actualizacion.filas)} filas recalculadas; "
+          f"{len(actualizacion.recomendaciones)} cambian de modalidad recomendada")
+    salida = args.salida or args.entrada
+    if len(actualizacion.cambios) or args.salida:
+        actualizacion.resultados.guardar(salida)
+        print(f"Resultados → {salida}", file=sys.stderr)
+    if args.reporte:
+        actualizacion.recomendaciones.to_csv(args.reporte, index=False)
+        print(f"Recomendaciones cambiadas → {args.reporte}", file=sys.stderr)
+    return 0
+
+
+def tarifas(args):
+    import pandas as pd
+    from . import historial as modulo
+
+    try:
+        existe = os.path.exists(args.historial)
+        if args.agregar:
+            historial = (modulo.cargar(args.historial).agregar(args.agregar) if existe
+                         else modulo.HistorialTarifas.desde_tarifarios([(args.agregar, modulo.TARIFARIO)]))
+            historial.guardar(args.historial)
+        elif existe:
+            historial = modulo.cargar(args.historial)
+        else:
+            raise ErrorEntrada(f"{args.historial} no existe (créalo con --agregar FECHA)")
+        print(historial.versiones().to_string(index=False))
+        if args.repreciar:
+            lineas = pd.read_csv(args.repreciar, dtype={c: "category" for c in
+                                                        ("fecha", "clase", "modalidad", "tamano")})
+            resultado = lineas.assign(**modulo.repreciar(historial, lineas))
+            with pd.option_context("display.width", 160, "display.max_columns", None):
+                print(resultado.groupby("desde")[["primera_milla", "logistica_inversa"]].agg(["count", "sum"]))
+            if args.salida:
+                resultado.to_csv(args.salida, index=False)
+                print(f"{len(resultado)} líneas → {args.salida}", file=sys.stderr)
+    except (ValueError, KeyError, OSError) as e:
+        raise ErrorEntrada(str(e)) from None
+    return 0
+
+
+def cache(args):
+    import pandas as pd
+    from . import cache_disco
+
+    ruta = args.ruta or cache_disco.RUTA_CACHE
+    if not ruta:
+        raise ErrorEntrada("la cache en disco está desactivada (define LOGISTICA_CACHE_DISCO o usa --ruta)")
+    if not os.path.exists(ruta):
+        raise ErrorEntrada(f"no hay cache en disco en {ruta!r}")
+    disco = cache_disco.CacheDisco(ruta, max_bytes=cache_disco.MAX_BYTES)
+    print(f"Versión vigente: {disco.version}", file=sys.stderr)
+    if args.vaciar:
+        disco.vaciar()
+        print(f"Cache vaciada: {ruta}", file=sys.stderr)
+    elif args.invalidar:
+        print(f"{disco.invalidar()} entradas de otras versiones borradas", file=sys.stderr)
+    resumen = cache_disco.resumen_archivo(ruta)
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(resumen.to_string(index=False) if len(resumen) else "(vacía)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m logistica",
+                                     description="Herramientas por lotes de operadores logísticos")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("puntuar", help="ranking de modalidades para un CSV de escenarios")
+    p.add_argument("entrada", help="CSV con columnas " + ", ".join(nucleo.COLUMNAS_ESCENARIO) + " ('-' = stdin)")
+    p.add_argument("-o", "--salida", default="-",
+                   help="CSV de salida ('-' = stdout); .arrow o .parquet = resultados compactos")
+    p.add_argument("--motor", choices=("escalar", "vectorizado"), default="escalar",
+                   help="vectorizado importa NumPy; conviene sobre ~100 mil filas")
+
+    p = sub.add_parser("servir", help="servicio HTTP local de cotización (ver logistica.servicio)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8765, help="0 = puerto libre cualquiera")
+    p = sub.add_parser("comparar", help="desacuerdo entre estrategias (ver logistica.comparacion)")
+    p.add_argument("entrada", nargs="?", help="CSV/Parquet de escenarios (por defecto, el espacio completo)")
+    p.add_argument("--estrategias", help="nombres separados por coma (por defecto, todas)")
+    p.add_argument("--diferencias", help="CSV con las clases de escenario en que difiere la primera")
+    p = sub.add_parser("rutas", help="rutas y costo por entrega de Flota Propia (ver logistica.rutas)")
+    p.add_argument("entrada", nargs="?", help="CSV de entregas del día con columnas latitud, longitud")
+    p.add_argument("--vehiculos", type=int)
+    p.add_argument("--deposito", help="'latitud,longitud' de la bodega (por defecto, DEPOSITO_RM)")
+    p.add_argument("-o", "--salida", help="CSV de entregas con vehículo y orden de parada")
+    p.add_argument("--calibrar", action="store_true", help="reajusta KM_RUTAS_RM sobre días simulados")
+    p = sub.add_parser("retiros", help="ventanas y camiones de retiro Crossdock (ver logistica.retiros)")
+    p.add_argument("entrada", help="CSV de sellers: latitud, longitud, paquetes por tamaño, ventanas (opcional)")
+    p.add_argument("--camiones", help="flota por ventana, 'nombre:m3:paradas:cantidad,…' (por defecto, CAMIONES_RETIRO)")
+    p.add_argument("--ventanas", help="ventanas separadas por coma (por defecto, VENTANAS_RETIRO)")
+    p.add_argument("-o", "--salida", help="CSV con ventana, camión y orden de parada por seller")
+    p = sub.add_parser("consolidar", help="agrupa líneas pendientes en envíos (ver logistica.consolidacion)")
+    p.add_argument("entrada", help="CSV de líneas: order_id, clase, precio, modalidad (+ cantidad, grupo)")
+    p.add_argument("--max-items", type=int, help="unidades máximas por envío")
+    p.add_argument("--tasa-devolucion", type=float, default=0.0, help="fracción de envíos devueltos (0-1)")
+    p.add_argument("--grupo", default="order_id",
+                   help="columna(s) de líneas consolidables, separadas por coma (por defecto, order_id)")
+    p.add_argument("-o", "--salida", help="CSV de líneas con el envío asignado")
+    p = sub.add_parser("devoluciones", help="proyección de costo de logística inversa (ver logistica.devoluciones)")
+    p.add_argument("entrada", help="CSV/Parquet de líneas vendidas: seller, modalidad, categoria, clase, fecha")
+    p.add_argument("--devoluciones", help="CSV/Parquet de líneas devueltas con las mismas columnas")
+    p.add_argument("--columna-devuelto", help="o bien, columna booleana de la entrada que marca la devolución")
+    p.add_argument("--meses", type=int, default=3, help="meses recientes para el volumen proyectado")
+    p.add_argument("--peso-previo", type=float, default=50.0, help="pseudo-líneas del suavizado")
+    p.add_argument("--tasas", help="CSV con las tasas por categoría y clase")
+    p.add_argument("-o", "--salida", help="CSV con la proyección por seller y modalidad")
+    p = sub.add_parser("despacho", help="despacho final al cliente por zona y tamaño (ver logistica.despacho)")
+    p.add_argument("entrada", help="CSV con comuna o zona, tamano y (opcional) precio")
+    p.add_argument("-o", "--salida", help="CSV de entrada con zona, tarifa_lista y despacho")
+    p = sub.add_parser("equilibrio", help="cruces de costo entre modalidades por volumen (ver logistica.equilibrio)")
+    p.add_argument("--tamano", action="append", choices=nucleo.TAMANOS, help="tamaño v6 (repetible; por defecto todos)")
+    p.add_argument("--precio", type=float, default=0.0, help="precio del producto (corte SP en $24.990)")
+    p.add_argument("--volumen-max", type=float, default=2000, help="órdenes diarias máximas de la rejilla")
+    p = sub.add_parser("actualizar", help="recalcula resultados compactos tras cambiar tarifas (ver logistica.incremental)")
+    p.add_argument("entrada", help=".arrow / .parquet de `puntuar -o`")
+    p.add_argument("-o", "--salida", help="archivo de salida (por defecto, reescribe la entrada)")
+    p.add_argument("--reporte", help="CSV con las filas cuya modalidad recomendada cambió")
+    p = sub.add_parser("tarifas", help="historial de tarifas por fecha de vigencia (ver logistica.historial)")
+    p.add_argument("historial", help="archivo .arrow del historial")
+    p.add_argument("--agregar", metavar="FECHA", help="registra las tarifas de logistica.datos vigentes desde FECHA")
+    p.add_argument("--repreciar", help="CSV de líneas: fecha, clase, precio (+ modalidad, tamano)")
+    p.add_argument("-o", "--salida", help="CSV de líneas con las tarifas de su fecha")
+    p = sub.add_parser("cache", help="invalida y resume la cache en disco (ver logistica.cache_disco)")
+    p.add_argument("--ruta", help="archivo SQLite (por defecto, LOGISTICA_CACHE_DISCO)")
+    p.add_argument("--invalidar", action="store_true", help="borra las entradas de otras versiones")
+    p.add_argument("--vaciar", action="store_true", help="borra todas las entradas")
+    args = parser.parse_args(argv)
+
+    if args.comando in ("comparar", "rutas", "retiros", "consolidar", "devoluciones", "despacho", "equilibrio", "actualizar", "tarifas", "cache"):
+        try:
+            return {"comparar": comparar, "rutas": rutas, "retiros": retiros, "consolidar": consolidar,
+                    "devoluciones": devoluciones, "despacho": despacho,
+                    "equilibrio": equilibrio, "actualizar": actualizar,
+                    "tarifas": tarifas, "cache": cache}[args.comando](args)
+        except ErrorEntrada as e:
+            parser.exit(2, f"{parser.prog}: error: {e}\n")
+
+    if args.comando == "servir":
+        from .servicio import main as servir
+        return servir(args.host, args.puerto)
+
+    if args.salida.lower().endswith((".arrow", ".feather", ".parquet", ".pq")):
+        try:
+            return puntuar_compacto(args)
+        except ErrorEntrada as e:
+            parser.exit(2, f"{parser.prog}: error: {e}\n")
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, newline="", encoding="utf-8-sig")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", newline="", encoding="utf-8")
+    try:
+        n = puntuar_archivo(entrada, salida, args.motor)
+    except ErrorEntrada as e:
+        parser.exit(2, f"{parser.prog}: error: {e}\n")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    if salida is not sys.stdout:
+        print(f"{n} escenarios puntuados → {args.salida}", file=sys.stderr)
+    return 0
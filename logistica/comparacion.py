@@ -0,0 +1,195 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Comparación entre estrategias de recomendación
+# Evalúa las estrategias registradas sobre todo el espacio de entradas del
+# formulario v6 o sobre archivos reales de sellers (CSV/Parquet, por bloques).
+# Cada estrategia depende solo de su índice en la tabla, así que las filas se
+# agrupan por la combinación de índices ("clase de escenario"): las métricas
+# se calculan sobre las clases ponderadas por su cantidad de filas.
+# ──────────────────────────────────────────────────────────────────────────────
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .estrategias import ESTRATEGIAS, SIN_MODALIDAD
+from .nucleo import COLUMNAS_ESCENARIO, OPCIONALES
+from .ranking import MODALIDADES
+from .tabla_decision import DIMENSIONES_RANK_V6, TablaDecision
+
+TAMANO_BLOQUE = 1_000_000
+
+
+def iterar_escenarios(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Itera un CSV o Parquet de escenarios en DataFrames de `tamano_bloque` filas.
+    Las columnas de OPCIONALES que falten se completan con su valor por defecto.
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        columnas = _presentes(archivo.schema_arrow.names, ruta)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield _completar(lote.to_pandas())
+    else:
+        columnas = _presentes(pd.read_csv(ruta, nrows=0).columns, ruta)
+        for bloque in pd.read_csv(ruta, usecols=columnas, chunksize=tamano_bloque,
+                                  dtype={"tamano": "category", "region": "category", "volumen": "float64"}):
+            yield _completar(bloque)
+
+
+def _presentes(encabezado, ruta):
+    """Columnas de COLUMNAS_ESCENARIO en `encabezado`; ValueError si falta alguna obligatoria."""
+    faltantes = [c for c in COLUMNAS_ESCENARIO if c not in encabezado and c not in OPCIONALES]
+    if faltantes:
+        raise ValueError(f"{ruta}: faltan columnas: {', '.join(faltantes)}")
+    return [c for c in COLUMNAS_ESCENARIO if c in encabezado]
+
+
+def _completar(bloque):
+    for columna, valor in OPCIONALES.items():
+        if columna not in bloque.columns:
+            bloque[columna] = valor
+    return bloque
+
+
+def espacio_completo():
+    """Todas las combinaciones del formulario v6 (TablaDecision.tamano) como DataFrame de escenarios."""
+    return pd.DataFrame(TablaDecision(DIMENSIONES_RANK_V6, None).rejilla())
+
+
+def _bloques(fuente, tamano_bloque):
+    if fuente is None:
+        yield espacio_completo()
+    elif isinstance(fuente, (str, Path)):
+        yield from iterar_escenarios(fuente, tamano_bloque)
+    else:
+        datos = fuente if isinstance(fuente, pd.DataFrame) else pd.DataFrame(fuente)
+        faltantes = {c: v for c, v in OPCIONALES.items() if c not in datos.columns}
+        if faltantes:
+            datos = datos.assign(**faltantes)
+        for inicio in range(0, len(datos), tamano_bloque):
+            yield datos.iloc[inicio:inicio + tamano_bloque]
+
+
+class Comparacion:
+    """
+    Resultado de comparar(): por clase de escenario, un escenario
+    representativo, sus filas y el orden de cada estrategia (ver tabla());
+    más las métricas de desacuerdo entre pares de estrategias.
+    """
+
+    def __init__(self, estrategias, indices, filas, representantes):
+        self.estrategias = estrategias
+        self.nombres = [e.nombre for e in estrategias]
+        self.filas = filas
+        self.ordenes = {e.nombre: e.tabla.resultados["orden"][indices[:, k]]
+                        for k, e in enumerate(estrategias)}
+        self.representantes = representantes.reset_index(drop=True)
+
+    @property
+    def total(self):
+        return int(self.filas.sum())
+
+    def primera(self, nombre):
+        return self.ordenes[nombre][:, 0]
+
+    def desacuerdo(self):
+        """Fracción de filas en que dos estrategias recomiendan distinta modalidad primera."""
+        n = len(self.nombres)
+        m = np.zeros((n, n))
+        for i, a in enumerate(self.nombres):
+            for j, b in enumerate(self.nombres[:i]):
+                m[i, j] = m[j, i] = self.filas[self.primera(a) != self.primera(b)].sum() / self.total
+        return pd.DataFrame(m, index=self.nombres, columns=self.nombres)
+
+    def kendall(self):
+        """
+        Distancia de Kendall normalizada entre órdenes: fracción de pares de
+        modalidades rankeadas por ambas estrategias que quedan invertidos
+        (promedio ponderado por filas; NaN si no comparten pares).
+        """
+        k = len(MODALIDADES)
+        posiciones = {}
+        for nombre, orden in self.ordenes.items():
+            pos = np.full(orden.shape, k, dtype=np.int8)      # k = no rankeada
+            filas, lugares = np.nonzero(orden != SIN_MODALIDAD)
+            pos[filas, orden[filas, lugares]] = lugares
+            posiciones[nombre] = pos
+
+        pares = [(x, y) for x in range(k) for y in range(x + 1, k)]
+        n = len(self.nombres)
+        m = np.zeros((n, n))
+        for i, a in enumerate(self.nombres):
+            for j, b in enumerate(self.nombres[:i]):
+                pa, pb = posiciones[a], posiciones[b]
+                invertidos = comparables = 0
+                for x, y in pares:
+                    ambos = (pa[:, x] < k) & (pa[:, y] < k) & (pb[:, x] < k) & (pb[:, y] < k)
+                    distinto = (pa[:, x] < pa[:, y]) != (pb[:, x] < pb[:, y])
+                    comparables += self.filas[ambos].sum()
+                    invertidos += self.filas[ambos & distinto].sum()
+                m[i, j] = m[j, i] = invertidos / comparables if comparables else np.nan
+        return pd.DataFrame(m, index=self.nombres, columns=self.nombres)
+
+    def confusion(self, a, b):
+        """Filas por (primera según a, primera según b)."""
+        k = len(MODALIDADES)
+        conteo = np.bincount(self.primera(a).astype(np.int64) * k + self.primera(b),
+                             weights=self.filas, minlength=k * k).reshape(k, k)
+        return pd.DataFrame(conteo.astype(np.int64),
+                            index=pd.Index(MODALIDADES, name=a), columns=pd.Index(MODALIDADES, name=b))
+
+    def tabla(self):
+        """Clases de escenario con el orden de cada estrategia ('A > B > C')."""
+        resultado = self.representantes.copy()
+        resultado.insert(0, "filas", self.filas)
+        for nombre, orden in self.ordenes.items():
+            resultado[nombre] = [" > ".join(MODALIDADES[i] for i in fila if i != SIN_MODALIDAD)
+                                 for fila in orden.tolist()]
+        return resultado
+
+    def diferencias(self, a=None, b=None):
+        """
+        Clases de escenario en que `a` y `b` (o cualquier par, sin argumentos)
+        difieren en la modalidad primera, de más a menos filas.
+        """
+        nombres = [a, b] if a and b else self.nombres
+        primeras = np.stack([self.primera(n) for n in nombres], axis=1)
+        difieren = (primeras != primeras[:, :1]).any(axis=1)
+        tabla = self.tabla()
+        return tabla.loc[difieren, list(self.representantes.columns) + ["filas"] + nombres] \
+            .sort_values("filas", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def comparar(fuente=None, estrategias=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Compara estrategias (nombres o Estrategia; por defecto todo el registro)
+    sobre `fuente`: None = espacio completo del formulario v6; DataFrame /
+    dict de columnas; o ruta a CSV/Parquet con COLUMNAS_ESCENARIO.
+    """
+    estrategias = [ESTRATEGIAS[e] if isinstance(e, str) else e
+                   for e in (estrategias or list(ESTRATEGIAS))]
+    tamanos = np.array([e.tabla.tamano for e in estrategias], dtype=np.int64)
+    # Índice mixto de la combinación de índices de todas las estrategias
+    pasos = np.cumprod(np.concatenate(([1], tamanos[:0:-1])))[::-1]
+
+    conteos = {}
+    representantes = {}
+    for bloque in _bloques(fuente, tamano_bloque):
+        clave = sum(e.indices_lote(bloque).astype(np.int64) * p for e, p in zip(estrategias, pasos))
+        unicas, primera_fila, conteo = np.unique(clave, return_index=True, return_counts=True)
+        for c, i, n in zip(unicas.tolist(), primera_fila.tolist(), conteo.tolist()):
+            if c in conteos:
+                conteos[c] += n
+            else:
+                conteos[c] = n
+                representantes[c] = bloque.iloc[i][list(COLUMNAS_ESCENARIO)]
+
+    claves = np.array(sorted(conteos), dtype=np.int64)
+    indices = (claves[:, None] // pasos) % tamanos
+    filas = np.array([conteos[c] for c in claves.tolist()], dtype=np.int64)
+    tabla_representantes = pd.DataFrame([representantes[c] for c in claves.tolist()],
+                                        columns=list(COLUMNAS_ESCENARIO))
+    return Comparacion(estrategias, indices, filas, tabla_representantes)
@@ -0,0 +1,162 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Consolidación de líneas pendientes en envíos
+# La primera milla se cobra por envío al valor de la clase más alta que
+# contiene, y una devolución vuelve como el envío completo (REVERSE de esa
+# clase). Con un costo por envío g(nivel máximo) creciente en el nivel, el
+# óptimo dentro de cada grupo consolidable (p. ej. mismo cliente y dirección)
+# con a lo más `max_items` unidades por envío es: ordenar las unidades de
+# mayor a menor nivel y cortarlas en envíos llenos consecutivos. Así se usa
+# el mínimo de envíos y el k-ésimo envío tiene el menor máximo posible (la
+# programación dinámica sobre cortes colapsa a este orden). Los cortes se
+# hacen sobre sumas acumuladas de cantidades por línea, sin una fila por
+# unidad: memoria y tiempo proporcionales a líneas + envíos.
+# ──────────────────────────────────────────────────────────────────────────────
+import numpy as np
+import pandas as pd
+
+from .primera_milla import NIVELES, ORDINAL_NIVEL, TARIFA_NIVEL, nivel_tarifa
+from .tarifas import CLASES, TARIFARIO
+
+# Logística inversa por nivel de tarifa (SP bajo y alto comparten tarifa)
+REVERSA_NIVEL = TARIFARIO.reversa[ORDINAL_NIVEL]
+
+COLUMNAS_REQUERIDAS = ("order_id", "clase", "precio", "modalidad")
+
+
+def _empacar(grupos, niveles, cantidades, max_items):
+    """
+    Corta las líneas de cada grupo en envíos de `max_items` unidades, de
+    mayor a menor nivel, sin expandir unidades: cada línea ocupa el tramo
+    [inicio, fin) de unidades acumuladas de su grupo y cae en los paquetes
+    inicio // max_items … (fin - 1) // max_items.
+    `grupos` son códigos enteros. Devuelve (piezas, nivel máximo de cada
+    paquete, línea que abre cada paquete); piezas son arreglos (línea,
+    paquete, unidades) con paquetes numerados en orden de grupo.
+    """
+    vacio = np.zeros(0, dtype=np.int64)
+    if not len(grupos):
+        return (vacio, vacio, vacio), niveles[:0], vacio
+    orden = np.lexsort((-niveles.astype(np.int64), grupos))
+    g, c = grupos[orden], cantidades[orden]
+    nuevo_grupo = np.r_[True, g[1:] != g[:-1]]
+    id_grupo = np.cumsum(nuevo_grupo) - 1
+    acumulado = np.cumsum(c)
+    inicio = acumulado - c
+    inicio = inicio - inicio[nuevo_grupo][id_grupo]
+    fin = inicio + c
+    if max_items:
+        primero, ultimo = inicio // max_items, (fin - 1) // max_items
+    else:
+        primero = ultimo = np.zeros(len(g), dtype=np.int64)
+    # Paquetes por grupo: los de su última línea
+    fin_grupo = np.r_[nuevo_grupo[1:], True]
+    base_grupo = np.cumsum(np.r_[0, ultimo[fin_grupo] + 1])[:-1]
+
+    # Una pieza por (línea, paquete): a lo más líneas + paquetes
+    n_piezas = ultimo - primero + 1
+    linea = np.repeat(np.arange(len(g)), n_piezas)
+    k = np.arange(len(linea)) - np.repeat(np.cumsum(n_piezas) - n_piezas, n_piezas)
+    local = primero[linea] + k
+    if max_items:
+        unidades = (np.minimum(fin[linea], (local + 1) * max_items)
+                    - np.maximum(inicio[linea], local * max_items))
+    else:
+        unidades = c[linea]
+    paquete = base_grupo[id_grupo[linea]] + local
+
+    # La primera pieza de cada paquete (orden descendente) lleva su nivel máximo
+    abre = np.r_[True, paquete[1:] != paquete[:-1]]
+    return (orden[linea], paquete, unidades), niveles[orden[linea[abre]]], orden[linea[abre]]
+
+
+def _costos(niveles, tasa_devolucion):
+    primera = TARIFA_NIVEL[niveles]
+    reversa = tasa_devolucion * REVERSA_NIVEL[niveles]
+    return primera, reversa
+
+
+class Consolidacion:
+    """
+    Resultado de consolidar(): `paquetes` propuestos (columnas de grupo,
+    unidades, clase cobrada y costos), `piezas` (posición de la línea, paquete,
+    unidades) y totales frente al envío por orden de compra.
+    """
+
+    def __init__(self, paquetes, piezas, total_actual, envios_actuales, excluidas):
+        self.paquetes = paquetes
+        self.piezas = piezas
+        self.total_actual = total_actual
+        self.envios_actuales = envios_actuales
+        self.excluidas = excluidas          # líneas sin primera milla (Fulfillment, Flota Propia)
+
+    @property
+    def total_propuesto(self):
+        return float(self.paquetes["costo"].sum())
+
+    def resumen(self):
+        return {
+            "envios_actuales": self.envios_actuales,
+            "envios_propuestos": len(self.paquetes),
+            "costo_actual": round(self.total_actual),
+            "costo_propuesto": round(self.total_propuesto),
+            "ahorro": round(self.total_actual - self.total_propuesto),
+            "lineas_sin_primera_milla": self.excluidas,
+        }
+
+
+def consolidar(lineas, max_items=None, tasa_devolucion=0.0, grupo="order_id"):
+    """
+    Propone envíos para las líneas pendientes de un seller.
+      lineas           DataFrame con order_id, clase, precio, modalidad (+ 'cantidad'
+                       opcional, 1 por defecto)
+      max_items        unidades máximas por envío (None = sin límite)
+      tasa_devolucion  fracción esperada de envíos devueltos (costo REVERSE de la clase)
+      grupo            columna (o lista) de líneas consolidables entre sí; por
+                       defecto la orden de compra, con lo que solo se parten
+                       órdenes sobre max_items
+    El costo actual es un envío por orden de compra (como se factura hoy),
+    partido solo si excede max_items.
+    """
+    if max_items is not None and max_items < 1:
+        raise ValueError("max_items debe ser al menos 1")
+    columnas_grupo = [grupo] if isinstance(grupo, str) else list(grupo)
+    faltantes = [c for c in dict.fromkeys(COLUMNAS_REQUERIDAS + tuple(columnas_grupo))
+                 if c not in lineas.columns]
+    if faltantes:
+        raise ValueError(f"faltan columnas: {', '.join(faltantes)}")
+
+    niveles_linea = nivel_tarifa(lineas["clase"], lineas["precio"], lineas["modalidad"])
+    cantidades = (lineas["cantidad"].to_numpy(np.int64) if "cantidad" in lineas.columns
+                  else np.ones(len(lineas), dtype=np.int64))
+    aplica = (niveles_linea >= 0) & (cantidades > 0)
+    filas = np.flatnonzero(aplica)
+
+    # Por línea (no por unidad): grupos y orden de compra de las líneas que aplican
+    lineas_ap = lineas.iloc[filas]
+    nivel_l, cantidad_l = niveles_linea[filas], cantidades[filas]
+    grupo_l = lineas_ap.groupby(columnas_grupo, sort=False, dropna=False).ngroup().to_numpy()
+    orden_l = pd.factorize(lineas_ap["order_id"].to_numpy())[0]
+
+    # Actual: un envío por orden de compra
+    _, nivel_actual, _ = _empacar(orden_l, nivel_l, cantidad_l, max_items)
+    total_actual = float(sum(c.sum() for c in _costos(nivel_actual, tasa_devolucion)))
+
+    # Propuesto: consolidado por grupo
+    (linea_p, paquete_p, unidades_p), nivel_paq, abre = _empacar(grupo_l, nivel_l, cantidad_l, max_items)
+    primera, reversa = _costos(nivel_paq, tasa_devolucion)
+    paquetes = lineas_ap.iloc[abre][columnas_grupo].reset_index(drop=True)
+    paquetes = paquetes.assign(
+        paquete=np.arange(len(nivel_paq)),
+        unidades=np.bincount(paquete_p, weights=unidades_p, minlength=len(nivel_paq)).astype(np.int64),
+        clase_cobrada=pd.Categorical.from_codes(ORDINAL_NIVEL[nivel_paq], categories=CLASES),
+        tarifa=pd.Categorical.from_codes(nivel_paq, categories=NIVELES),
+        primera_milla=primera,
+        reversa_esperada=reversa.round(1),
+        costo=primera + reversa,
+    )
+
+    por_linea = np.lexsort((paquete_p, linea_p))
+    piezas = pd.DataFrame({"linea": filas[linea_p[por_linea]],
+                           "paquete": paquete_p[por_linea],
+                           "unidades": unidades_p[por_linea]})
+    return Consolidacion(paquetes, piezas, total_actual, int(len(nivel_actual)), int((~aplica).sum()))
@@ -0,0 +1,198 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Tablas fuente de tarifas (mismos valores que muestran las apps)
+# Python puro, sin NumPy ni pandas: las leen tanto el núcleo escalar
+# (logistica.nucleo, CLI) como el tarifario compilado (logistica.tarifas).
+# ──────────────────────────────────────────────────────────────────────────────
+import json
+import os
+import re
+from pathlib import Path
+
+# Clases logísticas de primera milla / logística inversa / Envíame, de menor a mayor
+CLASES = ("SP", "P1", "P2", "P3", "M", "G", "SG")
+
+# Tamaños de la comparativa Crossdock (formulario v6), de menor a mayor
+TAMANOS = ("SP", "XXS", "XS", "S", "M1", "M2", "L/XL")
+
+# Equivalencia entre taxonomías (tamaño v6 → clase logística), por posición en
+# la escala de menor a mayor. VALOR DE REFERENCIA, sin fuente oficial: se usa
+# para estimar (umbrales de Flota Propia, catálogo, punto de equilibrio), no
+# para mostrar tarifas Envíame de un tamaño que no es clase (eso es "Consultar").
+EQUIVALENCIA_TAMANO_CLASE = {
+    "SP": "SP", "XXS": "P1", "XS": "P2", "S": "P3", "M1": "M", "M2": "G", "L/XL": "SG",
+}
+
+# Corte de precio para la primera milla SP
+UMBRAL_PRECIO_SP = 24990
+
+FIRST_MILE = {
+    "SP": {"lt_24990": 1000, "ge_24990": 2690},
+    "P1": {"flat": 4590},
+    "P2": {"flat": 6690},
+    "P3": {"flat": 7790},
+    "M": {"flat": 8790},
+    "G": {"flat": 12990},
+    "SG": {"flat": 21490},
+}
+
+REVERSE = {
+    "SP": 2800, "P1": 2800, "P2": 6000, "P3": 11000,
+    "M": 20000, "G": 23900, "SG": 23900
+}
+
+# Comparativa de despacho para la Región Metropolitana (Crossdock vs operadores externos)
+CROSSDOCK_SCL = {
+    "SP":   {"ripley": 3990,  "externo": 3990},
+    "XXS":  {"ripley": 4990,  "externo": 7990},
+    "XS":   {"ripley": 9990,  "externo": 14990},
+    "S":    {"ripley": 9990,  "externo": 19990},
+    "M1":   {"ripley": 10990, "externo": 39990},
+    "M2":   {"ripley": 13990, "externo": 79990},
+    "L/XL": {"ripley": 16990, "externo": 199990},
+}
+
+# Fulfillment: almacenamiento (arriendo) + cofinanciamiento por venta (tabla oficial)
+FULF_STORAGE = [
+    "XXXS: $0,3 por día + $1.000 / $2.600 por venta",
+    "S: $7 por día + $4.500 por venta",
+    "M1: $20 por día + $6.800 por venta",
+    "XXL: $260 por día + $8.500 por venta",
+    "XXXL: $400 por día + $11.000 por venta",
+]
+
+# Tamaño de Fulfillment que corresponde a cada tamaño v6 (por posición en la escala)
+EQUIVALENCIA_TAMANO_FULFILLMENT = {
+    "SP": "XXXS", "XXS": "XXXS", "XS": "S", "S": "S", "M1": "M1", "M2": "XXL", "L/XL": "XXXL",
+}
+
+# Inventario supuesto en Fulfillment para las curvas de equilibrio
+# (logistica.equilibrio): stock fijo de skus × stock_minimo unidades más
+# dias_cobertura días de venta.
+INVENTARIO_FULFILLMENT = {"skus": 20, "stock_minimo": 5, "dias_cobertura": 30}
+
+# Flota propia (Ripley – Envíame) para la Región Metropolitana
+FLOTA_ENV = {
+    "SP": 3200, "P1": 3200, "P2": 4990, "P3": 5990, "M": 5990, "G": 6990, "SG": 18740
+}
+
+# Rutas de Flota Propia en la RM (logistica.rutas): costo fijo por vehículo
+# y día (conductor, arriendo o depreciación, seguro), costo variable por km
+# (combustible, mantención, peajes) y supuestos operativos de la jornada.
+# VALORES DE REFERENCIA, sin fuente oficial: definen los umbrales de volumen
+# del ajuste de Flota Propia (nucleo.UMBRALES_VOLUMEN_FLOTA). Se reemplazan
+# con un JSON en LOGISTICA_FLOTA_RUTAS (ver _configuracion_flota).
+FLOTA_RUTAS = {
+    "costo_vehiculo_dia": 65000,
+    "costo_km": 320,
+    "velocidad_kmh": 28,
+    "minutos_parada": 5,
+    "horas_jornada": 9,
+    "entregas_max_vehiculo": 30,
+    "factor_circuito": 1.3,     # km por calle / km en línea recta
+}
+
+# Bodega de referencia para las rutas (zona industrial de Quilicura)
+DEPOSITO_RM = (-33.36, -70.73)
+
+# Modelo continuo de km diarios: por_ruta·rutas + por_raiz_entrega·√entregas.
+# Ajustado sobre las rutas de logistica.rutas (python -m logistica rutas --calibrar).
+KM_RUTAS_RM = {"por_ruta": 47.03, "por_raiz_entrega": 25.86}
+
+
+def _configuracion_flota(ruta):
+    """
+    Aplica sobre FLOTA_RUTAS y KM_RUTAS_RM los valores de un JSON
+    {"FLOTA_RUTAS": {...}, "KM_RUTAS_RM": {...}} (ambas secciones y todas sus
+    claves son opcionales; claves desconocidas son un error).
+    """
+    with open(ruta, encoding="utf-8") as f:
+        fuente = json.load(f)
+    for nombre, destino in (("FLOTA_RUTAS", FLOTA_RUTAS), ("KM_RUTAS_RM", KM_RUTAS_RM)):
+        valores = fuente.pop(nombre, {})
+        desconocidas = sorted(set(valores) - set(destino))
+        if desconocidas:
+            raise ValueError(f"Claves desconocidas de {nombre} en {ruta}: {desconocidas}")
+        destino.update({k: type(destino[k])(v) for k, v in valores.items()})
+    if fuente:
+        raise ValueError(f"Secciones desconocidas en {ruta}: {sorted(fuente)}")
+
+
+if os.environ.get("LOGISTICA_FLOTA_RUTAS"):
+    _configuracion_flota(os.environ["LOGISTICA_FLOTA_RUTAS"])
+
+# Retiros Crossdock en bodegas de sellers (logistica.retiros): volumen de
+# referencia por paquete de cada tamaño (m³), ventanas de retiro del día y
+# camiones disponibles en cada ventana (nombre, capacidad m³, paradas máximas).
+VOLUMEN_TAMANO_M3 = {
+    "SP": 0.002, "XXS": 0.005, "XS": 0.015, "S": 0.03, "M1": 0.06, "M2": 0.15, "L/XL": 0.5,
+}
+VENTANAS_RETIRO = ("08:00-10:00", "10:00-12:00", "12:00-14:00", "14:00-16:00", "16:00-18:00")
+CAMIONES_RETIRO = (("furgon", 8.0, 12),) * 6 + (("camion", 18.0, 10),) * 4
+
+# Centro de distribución que recibe los retiros (referencial, Pudahuel)
+CD_CROSSDOCK_RM = (-33.43, -70.78)
+
+# Modalidades en que el vendedor paga primera milla (por orden de compra)
+MODALIDADES_PRIMERA_MILLA = ("Operador Logístico", "Crossdock")
+
+# Matriz de despacho final al cliente (zona × tamaño + promociones), en un
+# archivo editable junto al paquete; ver cargar_despacho.
+RUTA_DESPACHO = Path(__file__).with_name("despacho.json")
+
+
+# ── Lectura de la tabla de Fulfillment ───────────────────────────────────────
+def _monto(texto):
+    """'$1.000' → 1000.0 ; '$0,3' → 0.3 (formato chileno)."""
+    return float(texto.strip().lstrip("$").replace(".", "").replace(",", "."))
+
+
+_PATRON_FULF = re.compile(r"^(?P<tamano>[^:]+):\s*(?P<dia>\S+) por día \+ (?P<venta>.+) por venta$")
+
+
+def parsear_fulfillment(linea):
+    """
+    'XXXS: $0,3 por día + $1.000 / $2.600 por venta'
+    → ('XXXS', 0.3, 1000, 2600). Con un solo monto por venta, mínimo = máximo.
+    """
+    m = _PATRON_FULF.match(linea)
+    if m is None:
+        raise ValueError(f"Tarifa de Fulfillment no reconocida: {linea!r}")
+    ventas = [int(_monto(v)) for v in m.group("venta").split("/")]
+    return m.group("tamano"), _monto(m.group("dia")), min(ventas), max(ventas)
+
+
+# ── Lectura de la matriz de despacho ─────────────────────────────────────────
+def cargar_despacho(ruta=RUTA_DESPACHO):
+    """
+    Lee y valida la matriz de despacho final:
+      referencial  true mientras las tarifas y promociones sean valores de
+                   ejemplo y no la matriz vigente (las apps los rotulan así)
+      zonas        [{zona, region, tarifas: {tamaño: CLP}, comunas: [...]}]
+      promociones  [{nombre, precio_minimo, descuento (0–1), zonas?, tamanos?}]
+                   (sin zonas / tamanos, la promoción aplica a todos)
+    """
+    with open(ruta, encoding="utf-8") as f:
+        fuente = json.load(f)
+    zonas = [z["zona"] for z in fuente["zonas"]]
+    if len(set(zonas)) != len(zonas):
+        raise ValueError(f"Zonas repetidas en {ruta}")
+    vistas = {}
+    for z in fuente["zonas"]:
+        faltantes = [t for t in TAMANOS if t not in z["tarifas"]]
+        if faltantes:
+            raise ValueError(f"Zona {z['zona']!r} sin tarifa para {faltantes}")
+        for comuna in z.get("comunas", ()):
+            if vistas.setdefault(comuna, z["zona"]) != z["zona"]:
+                raise ValueError(f"Comuna {comuna!r} en {vistas[comuna]!r} y {z['zona']!r}")
+    for promo in fuente.get("promociones", ()):
+        if not 0 <= promo["descuento"] <= 1:
+            raise ValueError(f"Descuento fuera de [0, 1] en {promo['nombre']!r}")
+        desconocidas = set(promo.get("zonas", ())) - set(zonas) | set(promo.get("tamanos", ())) - set(TAMANOS)
+        if desconocidas:
+            raise ValueError(f"Promoción {promo['nombre']!r} con zonas o tamaños desconocidos: {sorted(desconocidas)}")
+    fuente.setdefault("promociones", [])
+    fuente.setdefault("referencial", False)
+    return fuente
+
+
+DESPACHO = cargar_despacho()
@@ -0,0 +1,143 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Despacho final al cliente: matriz zona × tamaño con promociones
+# La fuente editable es logistica/despacho.json (ver datos.cargar_despacho).
+# `MatrizDespacho` la compila a arreglos NumPy: comuna → código de zona por
+# diccionario, tarifa de lista en una matriz plana [zona · tamaño] y, por
+# celda, los umbrales de precio de las promociones con el mejor descuento
+# vigente desde cada umbral. Cotizar millones de despachos es un gather de
+# la celda más una comparación contra a lo más unas pocas columnas de umbrales.
+# ──────────────────────────────────────────────────────────────────────────────
+import unicodedata
+
+import numpy as np
+
+from .datos import TAMANOS
+from .nucleo import REGIONES
+
+
+def normalizar_comuna(nombre):
+    """'  Ñuñoa ' → 'nunoa': sin tildes, mayúsculas ni espacios de borde."""
+    sin_tildes = unicodedata.normalize("NFKD", str(nombre)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sin_tildes.lower().split())
+
+
+def _codigos(valores, posicion, normalizar, que):
+    """Códigos int16 de `valores` (escalar o arreglo) según el dict `posicion`."""
+    if isinstance(valores, str):
+        try:
+            return np.int16(posicion[normalizar(valores)])
+        except KeyError:
+            raise ValueError(f"{que} desconocida: {valores!r}") from None
+    if hasattr(valores, "cat"):
+        # Columna categórica de pandas: se normalizan solo las categorías
+        unicos, inversa = np.asarray(valores.cat.categories, dtype=object).astype(str), valores.cat.codes.to_numpy()
+        if (inversa < 0).any():
+            raise ValueError(f"{que}s vacías")
+    else:
+        unicos, inversa = np.unique(np.asarray(valores, dtype=object).astype(str), return_inverse=True)
+    claves = [normalizar(u) for u in unicos.tolist()]
+    faltantes = [u for u, k in zip(unicos.tolist(), claves) if k not in posicion]
+    if faltantes:
+        raise ValueError(f"{que}s desconocidas: {faltantes[:20]}")
+    mapa = np.array([posicion[k] for k in claves], dtype=np.int16)
+    return mapa[inversa.reshape(-1)]
+
+
+class MatrizDespacho:
+    """
+    Matriz de despacho compilada:
+      zonas, region_zona  nombres de zona y código de región (REGIONES) de cada una
+      tarifa              int64 [zona, tamaño] de lista (columnas en orden TAMANOS)
+      umbrales            float64 [celda, k] precios mínimos de promoción (inf de relleno)
+      descuento           float64 [celda, k + 1] mejor descuento con k umbrales alcanzados
+    donde celda = zona · len(TAMANOS) + tamaño.
+    """
+
+    def __init__(self, fuente):
+        zonas = fuente["zonas"]
+        self.zonas = tuple(z["zona"] for z in zonas)
+        self.region_zona = np.array([REGIONES.index(z["region"]) for z in zonas], dtype=np.int8)
+        self.tarifa = np.array([[z["tarifas"][t] for t in TAMANOS] for z in zonas], dtype=np.int64)
+        self._tarifa_celda = self.tarifa.ravel()
+
+        self._zona = {normalizar_comuna(z): i for i, z in enumerate(self.zonas)}
+        self._comuna = {normalizar_comuna(c): i for i, z in enumerate(zonas) for c in z.get("comunas", ())}
+        self.promociones = tuple(p["nombre"] for p in fuente["promociones"])
+
+        # Por celda: umbrales ordenados y descuento acumulado (el mejor entre las
+        # promociones cuyo mínimo ya se alcanzó)
+        por_celda = [[] for _ in range(self.tarifa.size)]
+        for promo in fuente["promociones"]:
+            zs = [self.zonas.index(z) for z in promo.get("zonas", self.zonas)]
+            ts = [TAMANOS.index(t) for t in promo.get("tamanos", TAMANOS)]
+            for z in zs:
+                for t in ts:
+                    por_celda[z * len(TAMANOS) + t].append((promo["precio_minimo"], promo["descuento"]))
+        ancho = max(map(len, por_celda), default=0)
+        self.umbrales = np.full((self.tarifa.size, ancho), np.inf)
+        self.descuento = np.zeros((self.tarifa.size, ancho + 1))
+        for celda, reglas in enumerate(por_celda):
+            mejor = 0.0
+            for k, (minimo, descuento) in enumerate(sorted(reglas)):
+                mejor = max(mejor, descuento)
+                self.umbrales[celda, k] = minimo
+                self.descuento[celda, k + 1] = mejor
+
+    # Códigos
+    def codigo_zona(self, zonas):
+        return _codigos(zonas, self._zona, normalizar_comuna, "Zona")
+
+    def zona_de_comuna(self, comunas):
+        return _codigos(comunas, self._comuna, normalizar_comuna, "Comuna")
+
+    def celda(self, codigos_zona, codigos_tamano):
+        return np.asarray(codigos_zona, dtype=np.int64) * len(TAMANOS) + codigos_tamano
+
+    # Gathers
+    def lista(self, codigos_zona, codigos_tamano):
+        """Tarifa de lista (sin promociones) por zona y tamaño."""
+        return self._tarifa_celda[self.celda(codigos_zona, codigos_tamano)]
+
+    def cotizar(self, codigos_zona, codigos_tamano, precios=None):
+        """
+        Despacho que paga el cliente (CLP enteros): tarifa de lista con el mejor
+        descuento de promoción cuyo precio mínimo alcanza `precios`. Sin
+        precios, la tarifa de lista.
+        """
+        celda = self.celda(codigos_zona, codigos_tamano)
+        tarifa = self._tarifa_celda[celda]
+        if precios is None or not self.umbrales.shape[1]:
+            return tarifa
+        alcanzados = (self.umbrales[celda] <= np.asarray(precios, dtype=np.float64)[..., None]).sum(axis=-1)
+        return np.rint(tarifa * (1.0 - self.descuento[celda, alcanzados])).astype(np.int64)
+
+    def rango(self, codigo_tamano, region):
+        """(mínimo, máximo) de lista para un tamaño entre las zonas de `region`."""
+        columna = self.tarifa[self.region_zona == REGIONES.index(region), codigo_tamano]
+        return int(columna.min()), int(columna.max())
+
+
+def cotizar_tabla(tabla, matriz=None):
+    """
+    Columnas zona, tarifa_lista y despacho (dict de arreglos) para una tabla
+    (DataFrame o dict de columnas) con `comuna` o `zona`, `tamano` y,
+    opcionalmente, `precio`. Por defecto usa la matriz del TARIFARIO.
+    """
+    from .tarifas import TARIFARIO, codificar
+
+    matriz = TARIFARIO.despacho if matriz is None else matriz
+    if "comuna" in tabla:
+        zona = matriz.zona_de_comuna(tabla["comuna"])
+    elif "zona" in tabla:
+        zona = matriz.codigo_zona(tabla["zona"])
+    else:
+        raise ValueError("falta la columna comuna o zona")
+    tamanos = tabla["tamano"]
+    tamano = (codificar(np.asarray(tamanos.cat.categories, dtype=object), TAMANOS)[tamanos.cat.codes.to_numpy()]
+              if hasattr(tamanos, "cat") else codificar(tamanos, TAMANOS))
+    precios = np.asarray(tabla["precio"], dtype=np.float64) if "precio" in tabla else None
+    return {
+        "zona": np.asarray(matriz.zonas, dtype=object)[zona],
+        "tarifa_lista": matriz.lista(zona, tamano),
+        "despacho": matriz.cotizar(zona, tamano, precios),
+    }
@@ -0,0 +1,216 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Proyección de costo de logística inversa desde el historial de devoluciones
+# Lee exportaciones de líneas de orden (y de devoluciones) por bloques y las
+# reduce a conteos por (seller, modalidad, categoría, clase, mes) con una
+# clave compuesta int64: la memoria queda acotada por la cantidad de claves
+# distintas, no por las filas.
+# Sobre esos conteos:
+#   - tasa de devolución por categoría y clase con suavizado jerárquico
+#     (global → clase → categoría × clase, con PESO_PREVIO pseudo-líneas de
+#     la tasa superior), para que las combinaciones con pocas ventas no
+#     salten a 0 % o 100 %;
+#   - proyección mensual por seller y modalidad: líneas promedio de los
+#     últimos meses × tasa suavizada × REVERSE de la clase.
+# ──────────────────────────────────────────────────────────────────────────────
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .nucleo import EscenarioInvalido, a_booleano
+from .tarifas import CLASES, TARIFARIO
+
+CLAVES = ("seller", "modalidad", "categoria", "clase", "mes")
+COLUMNAS_LINEA = ("seller", "modalidad", "categoria", "clase", "fecha")
+
+PESO_PREVIO = 50.0
+MESES_PROYECCION = 3
+TAMANO_BLOQUE = 1_000_000
+
+
+# ── Lectura y agregación por bloques ─────────────────────────────────────────
+def iterar_lineas(ruta, columnas, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Itera un CSV o Parquet en DataFrames de `tamano_bloque` filas con
+    `columnas`; las claves de texto se leen como categorías (la fecha y la
+    marca de devolución, no).
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_bloque, columns=list(columnas)):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(
+            ruta, usecols=list(columnas), chunksize=tamano_bloque,
+            dtype={c: "category" for c in columnas if c in CLAVES},
+        )
+
+
+class _Diccionario:
+    """Códigos enteros estables entre bloques para una columna de texto."""
+
+    def __init__(self, nombre, bits):
+        self.nombre = nombre
+        self.bits = bits
+        self.valores = []
+        self._codigo = {}
+
+    def codificar(self, columna):
+        codigos, unicos = pd.factorize(columna)
+        mapa = [self._codigo.setdefault(str(v), len(self._codigo)) for v in unicos.tolist() + [""]]
+        self.valores = list(self._codigo)
+        if len(self.valores) > 1 << self.bits:
+            raise ValueError(f"Demasiados valores distintos de {self.nombre} (máximo {1 << self.bits})")
+        return np.asarray(mapa, dtype=np.int64)[codigos]     # -1 (vacío) toma el último: ""
+
+
+# Bits de cada clave dentro de la clave compuesta int64
+BITS_CLAVE = {"seller": 24, "modalidad": 4, "categoria": 16, "clase": 4, "mes": 12}
+
+
+class _Acumulador:
+    """
+    Conteos (lineas, devueltas) por clave compuesta: cada parte es un trío de
+    arreglos ya reducidos; se compactan con np.unique cada `max_partes`.
+    """
+
+    def __init__(self, max_partes):
+        self.diccionarios = {c: _Diccionario(c, BITS_CLAVE[c]) for c in CLAVES}
+        self.partes = []
+        self.max_partes = max_partes
+
+    def agregar(self, bloque, devuelto):
+        """
+        `devuelto` es la columna del bloque (historial con marca por línea)
+        o una constante: 0 para un archivo de ventas, 1 para uno de
+        devoluciones (que no suma líneas vendidas).
+        """
+        n = len(bloque)
+        if isinstance(devuelto, str):
+            devueltas = _marcas(bloque[devuelto], devuelto).astype(np.int64)
+            vendidas = np.ones(n, dtype=np.int64)
+        else:
+            devueltas = np.full(n, int(bool(devuelto)), dtype=np.int64)
+            vendidas = np.full(n, 0 if devuelto else 1, dtype=np.int64)
+        # Fechas ISO (AAAA-MM-DD…): el mes es el prefijo, sin parsear fechas
+        columnas = {c: bloque[c] for c in CLAVES[:-1]}
+        columnas["mes"] = bloque["fecha"].astype(str).str.slice(0, 7)
+        clave = np.zeros(n, dtype=np.int64)
+        for c in CLAVES:
+            clave = (clave << BITS_CLAVE[c]) | self.diccionarios[c].codificar(columnas[c])
+        self.partes.append(_reducir(clave, vendidas, devueltas))
+        if len(self.partes) >= self.max_partes:
+            self.partes = [_reducir(*(np.concatenate(x) for x in zip(*self.partes)))]
+
+    def resultado(self):
+        if not self.partes:
+            return pd.DataFrame(columns=list(CLAVES) + ["lineas", "devueltas"])
+        clave, lineas, devueltas = _reducir(*(np.concatenate(x) for x in zip(*self.partes)))
+        columnas = {}
+        for c in reversed(CLAVES):
+            d = self.diccionarios[c]
+            columnas[c] = pd.Categorical.from_codes(clave & ((1 << d.bits) - 1), categories=d.valores)
+            clave = clave >> d.bits
+        agregado = pd.DataFrame({c: columnas[c] for c in CLAVES})
+        agregado["lineas"] = lineas
+        agregado["devueltas"] = devueltas
+        return agregado
+
+
+def _marcas(columna, nombre):
+    """Marca de devolución por línea: booleanos, números (≠ 0) o texto Sí/No, true/false, 1/0."""
+    if columna.dtype.kind in "biuf":
+        if columna.isna().any():
+            raise ValueError(f"{nombre}: hay marcas vacías")
+        return columna.to_numpy() != 0
+    texto = columna.astype(str)
+    try:
+        mapa = {v: a_booleano(v, nombre) for v in pd.unique(texto)}
+    except EscenarioInvalido as e:
+        raise ValueError(str(e)) from None
+    return texto.map(mapa).to_numpy(dtype=bool)
+
+
+def _reducir(clave, lineas, devueltas):
+    unicas, inversa = np.unique(clave, return_inverse=True)
+    return (unicas, np.bincount(inversa, lineas, len(unicas)).astype(np.int64),
+            np.bincount(inversa, devueltas, len(unicas)).astype(np.int64))
+
+
+def acumular(ventas, devoluciones=None, columna_devuelto=None, tamano_bloque=TAMANO_BLOQUE,
+             max_partes=16):
+    """
+    Conteos (lineas, devueltas) por CLAVES a partir de:
+      ventas            archivo (o DataFrame) de líneas vendidas con COLUMNAS_LINEA
+      devoluciones      archivo (o DataFrame) de líneas devueltas con las mismas columnas
+      columna_devuelto  o bien, una columna booleana de `ventas` que marca la devolución
+    Las claves se codifican como un int64 compuesto (memoria ~24 bytes por
+    clave distinta) y las partes se compactan cada `max_partes` bloques.
+    """
+    fuentes = [(ventas, columna_devuelto if columna_devuelto else 0)]
+    if devoluciones is not None:
+        fuentes.append((devoluciones, 1))
+
+    acumulador = _Acumulador(max_partes)
+    for fuente, devuelto in fuentes:
+        columnas = COLUMNAS_LINEA + ((devuelto,) if isinstance(devuelto, str) else ())
+        bloques = ([fuente.iloc[i:i + tamano_bloque] for i in range(0, len(fuente), tamano_bloque)]
+                   if isinstance(fuente, pd.DataFrame) else iterar_lineas(fuente, columnas, tamano_bloque))
+        for bloque in bloques:
+            acumulador.agregar(bloque, devuelto)
+    agregado = acumulador.resultado()
+    desconocidas = sorted(set(agregado["clase"].unique()) - set(CLASES))
+    if desconocidas:
+        raise ValueError(f"Clases no reconocidas: {desconocidas}")
+    return agregado
+
+
+# ── Tasas y proyección ───────────────────────────────────────────────────────
+def _suavizar(devueltas, lineas, previa, peso):
+    return (devueltas + peso * previa) / (lineas + peso)
+
+
+def tasas(agregado, peso_previo=PESO_PREVIO):
+    """
+    Tasa de devolución por (categoria, clase): cruda y suavizada hacia la de
+    la clase, que a su vez se suaviza hacia la global.
+    """
+    total = agregado[["lineas", "devueltas"]].sum()
+    global_ = total["devueltas"] / total["lineas"] if total["lineas"] else 0.0
+
+    por_clase = agregado.groupby("clase", observed=True)[["lineas", "devueltas"]].sum()
+    por_clase["tasa_clase"] = _suavizar(por_clase["devueltas"], por_clase["lineas"], global_, peso_previo)
+
+    resultado = agregado.groupby(["categoria", "clase"], observed=True)[["lineas", "devueltas"]].sum().reset_index()
+    resultado = resultado.join(por_clase["tasa_clase"], on="clase")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado["tasa_cruda"] = np.where(resultado["lineas"] > 0,
+                                           resultado["devueltas"] / resultado["lineas"], np.nan)
+    resultado["tasa"] = _suavizar(resultado["devueltas"], resultado["lineas"],
+                                  resultado["tasa_clase"], peso_previo)
+    return resultado
+
+
+def proyectar(agregado, meses=MESES_PROYECCION, peso_previo=PESO_PREVIO):
+    """
+    Costo mensual proyectado de logística inversa por (seller, modalidad):
+    líneas por mes (promedio de los últimos `meses` meses del historial,
+    contando 0 en los meses sin ventas) × tasa suavizada de su categoría y
+    clase × REVERSE de la clase.
+    """
+    ultimos = sorted(agregado["mes"].unique())[-meses:]
+    recientes = agregado[agregado["mes"].isin(ultimos)]
+    volumen = recientes.groupby(["seller", "modalidad", "categoria", "clase"], observed=True)["lineas"].sum() / max(len(ultimos), 1)
+    detalle = volumen.rename("lineas_mes").reset_index()
+    detalle = detalle.merge(tasas(agregado, peso_previo)[["categoria", "clase", "tasa"]],
+                            on=["categoria", "clase"], how="left")
+    detalle["devoluciones_mes"] = detalle["lineas_mes"] * detalle["tasa"]
+    tarifa = TARIFARIO.logistica_inversa(TARIFARIO.codigo_clase(detalle["clase"].to_numpy()))
+    detalle["costo_mes"] = detalle["devoluciones_mes"] * tarifa
+
+    proyeccion = detalle.groupby(["seller", "modalidad"], observed=True)[["lineas_mes", "devoluciones_mes", "costo_mes"]].sum()
+    proyeccion["tasa_efectiva"] = proyeccion["devoluciones_mes"] / proyeccion["lineas_mes"]
+    return proyeccion.reset_index().sort_values("costo_mes", ascending=False, kind="stable") \
+        .reset_index(drop=True)
@@ -0,0 +1,179 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Curvas de equilibrio entre modalidades por volumen y precio
+# Costo diario de cada modalidad para un tamaño v6 y un precio, en función de
+# las órdenes diarias v (Región Metropolitana, despacho incluido para que las
+# curvas sean comparables):
+#   Operador Logístico      v · (primera milla + despacho de operadores externos)
+#   Crossdock               v · (primera milla + despacho Ripley)
+#   Fulfillment             arriendo del inventario (stock fijo + v · días de
+#                           cobertura) + v · (cofinanciamiento + despacho Ripley)
+#   Flota Propia            rutas propias (modelo de nucleo.costo_flota_por_entrega)
+#   Flota Propia (Envíame)  v · tarifa por paquete, la flota sin rutas propias
+# Todas son afines en v salvo las rutas. Se evalúan sobre una rejilla
+# geométrica densa; los cruces se ubican por cambio de signo de la diferencia
+# y se refinan con una bisección vectorizada sobre todos los tramos a la vez.
+# ──────────────────────────────────────────────────────────────────────────────
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from .cache import cache_compartida, memorizar, tramo_precio
+from .datos import (
+    EQUIVALENCIA_TAMANO_FULFILLMENT,
+    FLOTA_RUTAS,
+    INVENTARIO_FULFILLMENT,
+    KM_RUTAS_RM,
+    UMBRAL_PRECIO_SP,
+)
+from .nucleo import MODALIDADES
+from .tarifas import TARIFARIO, codificar
+
+FLOTA_ENVIAME = "Flota Propia (Envíame)"
+CURVAS = MODALIDADES + (FLOTA_ENVIAME,)
+RUTAS = CURVAS.index("Flota Propia")
+
+VOLUMEN_MAX = 2000
+PUNTOS = 4000
+ITERACIONES_BISECCION = 60
+
+
+# ── Modelo de costos ─────────────────────────────────────────────────────────
+def coeficientes(tamano, precio=0.0, tarifario=TARIFARIO, inventario=INVENTARIO_FULFILLMENT):
+    """
+    (fijo, por_orden) en CLP/día y CLP/orden de cada curva afín, en orden
+    CURVAS (la de rutas queda en 0: se evalúa aparte). En Fulfillment el
+    cofinanciamiento alto de la tabla (p. ej. XXXS $2.600) aplica desde el
+    mismo corte de precio que la primera milla SP.
+    """
+    t = tarifario.codigo_tamano(tamano)
+    clase = tarifario.clase_de_tamano[t]
+    primera = float(tarifario.primera_milla(clase, precio))
+    ripley, externo = (float(x) for x in tarifario.crossdock(t))
+
+    f = codificar(EQUIVALENCIA_TAMANO_FULFILLMENT[tamano], tarifario.fulfillment_tamanos)
+    por_dia = float(tarifario.fulfillment_dia[f])
+    venta = float(tarifario.fulfillment_venta_max[f] if precio >= UMBRAL_PRECIO_SP
+                  else tarifario.fulfillment_venta_min[f])
+    stock_fijo = inventario["skus"] * inventario["stock_minimo"]
+
+    fijo = np.zeros(len(CURVAS))
+    por_orden = np.zeros(len(CURVAS))
+    por_orden[CURVAS.index("Operador Logístico")] = primera + externo
+    por_orden[CURVAS.index("Crossdock")] = primera + ripley
+    fijo[CURVAS.index("Fulfillment")] = por_dia * stock_fijo
+    por_orden[CURVAS.index("Fulfillment")] = por_dia * inventario["dias_cobertura"] + venta + ripley
+    por_orden[CURVAS.index(FLOTA_ENVIAME)] = float(tarifario.flota_propia(clase))
+    return fijo, por_orden
+
+
+def costo_rutas(volumenes, parametros=FLOTA_RUTAS, km=KM_RUTAS_RM):
+    """Costo diario de rutas propias; versión vectorizada de nucleo.costo_flota_por_entrega · v."""
+    v = np.asarray(volumenes, dtype=np.float64)
+    rutas = np.maximum(1.0, v / parametros["entregas_max_vehiculo"])
+    km_dia = km["por_ruta"] * rutas + km["por_raiz_entrega"] * np.sqrt(v)
+    return rutas * parametros["costo_vehiculo_dia"] + km_dia * parametros["costo_km"]
+
+
+def _evaluar(fijo, por_orden, curvas, volumenes):
+    """Costo diario (len(curvas) × len(volumenes)) de las curvas indicadas."""
+    curvas = np.asarray(curvas)
+    costos = fijo[curvas, None] + por_orden[curvas, None] * volumenes
+    es_rutas = curvas == RUTAS
+    if es_rutas.any():
+        costos[es_rutas] = costo_rutas(volumenes)
+    return costos
+
+
+# ── Cruces ───────────────────────────────────────────────────────────────────
+def _cruces(fijo, por_orden, volumenes, costos):
+    """
+    Cambios de signo de costo_a - costo_b sobre la rejilla (ignorando ceros
+    exactos), refinados por bisección. Curvas idénticas no se cruzan.
+    """
+    filas = []
+    for a, b in combinations(range(len(CURVAS)), 2):
+        diferencia = costos[a] - costos[b]
+        no_nulos = np.flatnonzero(diferencia)
+        if not len(no_nulos):
+            continue
+        signo = np.sign(diferencia[no_nulos])
+        cambio = np.flatnonzero(signo[1:] != signo[:-1])
+        if not len(cambio):
+            continue
+        bajo, alto = volumenes[no_nulos[cambio]], volumenes[no_nulos[cambio + 1]]
+        signo_bajo = signo[cambio]
+        for _ in range(ITERACIONES_BISECCION):
+            medio = 0.5 * (bajo + alto)
+            d = np.diff(_evaluar(fijo, por_orden, (b, a), medio), axis=0)[0]
+            mismo = np.sign(d) == signo_bajo
+            bajo = np.where(mismo, medio, bajo)
+            alto = np.where(mismo, alto, medio)
+        cruce = 0.5 * (bajo + alto)
+        for v, s, c in zip(cruce.tolist(), signo_bajo.tolist(),
+                           _evaluar(fijo, por_orden, (a,), cruce)[0].tolist()):
+            antes, despues = (CURVAS[b], CURVAS[a]) if s > 0 else (CURVAS[a], CURVAS[b])
+            filas.append((CURVAS[a], CURVAS[b], v, c, antes, despues))
+    return pd.DataFrame(filas, columns=["curva_a", "curva_b", "volumen", "costo_dia",
+                                        "conviene_antes", "conviene_despues"]) \
+        .sort_values("volumen", kind="stable").reset_index(drop=True)
+
+
+# ── Resultado ────────────────────────────────────────────────────────────────
+class Equilibrio:
+    """
+    Curvas de un tamaño y precio: `volumenes` (rejilla de órdenes diarias),
+    `costos` (CURVAS × volúmenes, CLP/día) y `cruces` entre pares de curvas
+    (volumen, costo diario, cuál conviene antes y después).
+    """
+
+    def __init__(self, tamano, precio, volumenes, costos, cruces):
+        self.tamano = tamano
+        self.precio = precio
+        self.volumenes = volumenes
+        self.costos = costos
+        self.cruces = cruces
+
+    def por_orden(self, puntos=None):
+        """CLP por orden (índice volumen, una columna por curva); `puntos` submuestrea para graficar."""
+        idx = (np.unique(np.linspace(0, len(self.volumenes) - 1, puntos).round().astype(np.int64))
+               if puntos else slice(None))
+        v = self.volumenes[idx]
+        return pd.DataFrame((self.costos[:, idx] / v).T, index=pd.Index(v, name="volumen"),
+                            columns=list(CURVAS))
+
+    def tramos(self):
+        """Curva más barata por tramo de volumen (desde, hasta, curva, costo por orden al inicio)."""
+        mejor = self.costos.argmin(axis=0)
+        inicio = np.flatnonzero(np.r_[True, mejor[1:] != mejor[:-1]])
+        fin = np.r_[inicio[1:], len(mejor)] - 1
+        desde = self.volumenes[inicio]
+        # Los bordes interiores son los cruces exactos de la envolvente
+        for k in range(1, len(inicio)):
+            par = self.cruces[(self.cruces["conviene_antes"] == CURVAS[mejor[inicio[k - 1]]])
+                              & (self.cruces["conviene_despues"] == CURVAS[mejor[inicio[k]]])]
+            cerca = par["volumen"].to_numpy()
+            cerca = cerca[(cerca >= self.volumenes[fin[k - 1]]) & (cerca <= self.volumenes[inicio[k]])]
+            if len(cerca):
+                desde[k] = cerca[0]
+        return pd.DataFrame({
+            "desde": desde,
+            "hasta": np.r_[desde[1:], self.volumenes[-1]],
+            "curva": [CURVAS[m] for m in mejor[inicio]],
+            "costo_por_orden": self.costos[mejor[inicio], inicio] / self.volumenes[inicio],
+        })
+
+
+def equilibrio(tamano, precio=0.0, tarifario=TARIFARIO, inventario=INVENTARIO_FULFILLMENT,
+               volumen_max=VOLUMEN_MAX, puntos=PUNTOS):
+    """Curvas y cruces de `tamano` (v6) a `precio` entre 1 y `volumen_max` órdenes diarias."""
+    fijo, por_orden = coeficientes(tamano, precio, tarifario, inventario)
+    volumenes = np.geomspace(1.0, volumen_max, puntos)
+    costos = _evaluar(fijo, por_orden, np.arange(len(CURVAS)), volumenes)
+    return Equilibrio(tamano, precio, volumenes, costos, _cruces(fijo, por_orden, volumenes, costos))
+
+
+@memorizar(cache_compartida("equilibrio"), clave=lambda tamano, precio: (tamano, tramo_precio(precio)))
+def equilibrio_tamano(tamano, precio):
+    """equilibrio() con los supuestos por defecto, memorizado por tamaño y tramo de precio."""
+    return equilibrio(tamano, precio)
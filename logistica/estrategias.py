@@ -0,0 +1,103 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Estrategias de recomendación intercambiables
+# Cada recomendador (cascada de reglas, puntos enteros, orden por reglas,
+# perfiles ponderados) se describe con la misma interfaz: una función escalar,
+# el dominio discreto de sus argumentos y un adaptador desde el escenario
+# común (COLUMNAS_ESCENARIO). Para evaluar lotes, la función se compila a una
+# TablaDecision con el orden de modalidades codificado en int8, y cada fila
+# queda en un gather por índice.
+# ──────────────────────────────────────────────────────────────────────────────
+import numpy as np
+
+from . import nucleo
+from .ranking import MODALIDADES, _columna, a_booleanos
+from .tabla_decision import DIMENSIONES_RANK_V6, DIMENSIONES_TRES_PREGUNTAS, TablaDecision
+
+# Posición vacía en un orden (la estrategia no rankea esa modalidad)
+SIN_MODALIDAD = -1
+
+# Tamaños que las apps de tres preguntas tratan como "grandes/voluminosos"
+TAMANOS_VOLUMINOSOS = nucleo.GRANDES
+
+
+class Estrategia:
+    """
+    Recomendador enchufable.
+      nombre       identificador (y columna en los reportes)
+      funcion      versión escalar; recibe un valor por dimensión, en orden
+      dimensiones  dominio discreto de `funcion` (ver tabla_decision)
+      entradas     escenarios → dict de columnas con los nombres de las dimensiones
+      orden        resultado de `funcion` → modalidades de mejor a peor
+                   (puede ser parcial, p. ej. solo la recomendada)
+    """
+
+    def __init__(self, nombre, funcion, dimensiones, entradas, orden):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.dimensiones = tuple(dimensiones)
+        self.entradas = entradas
+        self.orden = orden
+        self._tabla = None
+
+    def __repr__(self):
+        return f"Estrategia({self.nombre!r})"
+
+    @property
+    def tabla(self):
+        """TablaDecision con 'orden' int8 (combinaciones, modalidades), SIN_MODALIDAD de relleno."""
+        if self._tabla is None:
+            construida = TablaDecision.construir(self.funcion, self.dimensiones)
+            codigos = np.full((construida.tamano, len(MODALIDADES)), SIN_MODALIDAD, dtype=np.int8)
+            for i, resultado in enumerate(construida.resultados):
+                orden = [MODALIDADES.index(m) for m in self.orden(resultado)]
+                codigos[i, :len(orden)] = orden
+            self._tabla = TablaDecision(self.dimensiones, {"orden": codigos})
+        return self._tabla
+
+    def indices_lote(self, escenarios):
+        """Índice de la tabla para cada escenario."""
+        return self.tabla.indices_lote(self.entradas(escenarios))
+
+    def ordenar_lote(self, escenarios):
+        """Orden int8 (n, modalidades) para un DataFrame / tabla Arrow / dict de columnas."""
+        return self.tabla.resultados["orden"][self.indices_lote(escenarios)]
+
+
+# ── Adaptadores desde el escenario común ─────────────────────────────────────
+def entradas_tres_preguntas(escenarios):
+    """Bodega, voluminoso (tamaño grande) y alta rotación de las apps de tres preguntas."""
+    tamanos = _columna(escenarios, "tamano").astype(str)
+    return {
+        "tiene_bodega": a_booleanos(_columna(escenarios, "tiene_bodega"), "tiene_bodega"),
+        "voluminoso": np.isin(tamanos, TAMANOS_VOLUMINOSOS),
+        "alta_rot": a_booleanos(_columna(escenarios, "alta_rotacion"), "alta_rotacion"),
+    }
+
+
+def entradas_v6(escenarios):
+    columnas = {c: _columna(escenarios, c) for c in nucleo.COLUMNAS_ESCENARIO}
+    bodega = a_booleanos(columnas["tiene_bodega"], "tiene_bodega")
+    columnas["tiene_bodega"] = np.where(bodega, "Sí", "No")
+    for c in ("alta_rotacion", "retiro_tienda", "foco_control_marca"):
+        columnas[c] = a_booleanos(columnas[c], c)
+    return columnas
+
+
+# ── Registro ─────────────────────────────────────────────────────────────────
+ESTRATEGIAS = {}
+
+
+def registrar(estrategia):
+    """Agrega (o reemplaza) una estrategia del registro y la devuelve."""
+    ESTRATEGIAS[estrategia.nombre] = estrategia
+    return estrategia
+
+
+registrar(Estrategia("recomendar_modalidad", nucleo.recomendar_modalidad, DIMENSIONES_TRES_PREGUNTAS,
+                     entradas_tres_preguntas, lambda r: (r[0],)))
+registrar(Estrategia("puntuar_modalidades", nucleo.puntuar_modalidades, DIMENSIONES_TRES_PREGUNTAS,
+                     entradas_tres_preguntas, lambda r: tuple(m for m, _ in r)))
+registrar(Estrategia("ordenar_modalidades", nucleo.ordenar_modalidades, DIMENSIONES_TRES_PREGUNTAS,
+                     entradas_tres_preguntas, tuple))
+registrar(Estrategia("rank_modalidades", nucleo.rank_modalidades, DIMENSIONES_RANK_V6,
+                     entradas_v6, lambda r: tuple(m for m, _ in r)))
@@ -0,0 +1,10 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Formato de montos para mostrar (solo en la capa de presentación)
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def clp(valor):
+    """Monto en pesos chilenos: 1000 → '$1.000' ; 0.3 → '$0,3'."""
+    if float(valor).is_integer():
+        valor = int(valor)
+    return "$" + f"{valor:,}".replace(",", "_").replace(".", ",").replace("_", ".")
@@ -0,0 +1,91 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Simulador de costos de Fulfillment sobre series diarias de inventario
+# Con stock y ventas diarias por SKU (matrices SKU × día) calcula el arriendo
+# acumulado por día, el cofinanciamiento por venta y el costo por unidad
+# vendida. Se recorre por bloques de SKUs con operaciones acumuladas de NumPy,
+# de modo que las series pueden venir de archivos .npy mapeados en memoria.
+# ──────────────────────────────────────────────────────────────────────────────
+import numpy as np
+import pandas as pd
+
+from .tarifas import TARIFARIO, codificar
+
+TAMANO_BLOQUE = 8192
+
+
+def cargar_serie(ruta):
+    """Abre una matriz SKU × día guardada con np.save sin cargarla en RAM."""
+    return np.load(ruta, mmap_mode="r")
+
+
+def tarifas_sku(tamanos, venta_alta=None, tarifario=TARIFARIO):
+    """
+    Tarifa diaria por unidad almacenada y cofinanciamiento por venta para cada
+    SKU según su tamaño de Fulfillment (XXXS, S, M1, XXL, XXXL). Cuando la tabla
+    oficial da dos montos por venta (p. ej. XXXS $1.000 / $2.600), `venta_alta`
+    indica por SKU si corresponde el monto mayor.
+    """
+    codigos = codificar(tamanos, tarifario.fulfillment_tamanos)
+    por_dia = tarifario.fulfillment_dia[codigos]
+    por_venta = tarifario.fulfillment_venta_min[codigos]
+    if venta_alta is not None:
+        por_venta = np.where(np.asarray(venta_alta, dtype=bool),
+                             tarifario.fulfillment_venta_max[codigos], por_venta)
+    return por_dia, por_venta
+
+
+def simular_almacenamiento(stock, ventas, tamanos, venta_alta=None, acumulado=None,
+                           tamano_bloque=TAMANO_BLOQUE, tarifario=TARIFARIO):
+    """
+    Simula el costo de Fulfillment de un catálogo.
+
+    stock, ventas: matrices (SKUs × días) de unidades en bodega y vendidas por
+    día (ndarray o memmap; ver cargar_serie). tamanos: tamaño de Fulfillment
+    por SKU. Si se entrega `acumulado` (matriz float64 SKU × día, p. ej. creada
+    con np.lib.format.open_memmap), se escribe ahí el arriendo acumulado día a día.
+
+    Devuelve un DataFrame por SKU con unidades vendidas, días con stock,
+    arriendo total, cofinanciamiento total, costo total y costo por unidad
+    vendida (NaN si no hubo ventas). Una serie sin días da arriendo 0; ventas
+    no enteras son un ValueError.
+    """
+    if stock.shape != ventas.shape:
+        raise ValueError(f"stock {stock.shape} y ventas {ventas.shape} deben tener la misma forma")
+    n_sku = stock.shape[0]
+    por_dia, por_venta = tarifas_sku(tamanos, venta_alta, tarifario)
+    if len(por_dia) != n_sku:
+        raise ValueError(f"Se esperaban {n_sku} tamaños, llegaron {len(por_dia)}")
+
+    unidades = np.empty(n_sku, dtype=np.int64)
+    dias_stock = np.empty(n_sku, dtype=np.int64)
+    arriendo = np.empty(n_sku, dtype=np.float64)
+
+    for inicio in range(0, n_sku, tamano_bloque):
+        fin = min(inicio + tamano_bloque, n_sku)
+        bloque_stock = np.asarray(stock[inicio:fin], dtype=np.float64)
+        bloque_ventas = np.asarray(ventas[inicio:fin])
+        if bloque_ventas.dtype.kind == "f" and (np.modf(bloque_ventas)[0] != 0).any():
+            raise ValueError("las ventas deben ser unidades enteras")
+
+        costo_diario = bloque_stock * por_dia[inicio:fin, None]
+        if acumulado is not None and costo_diario.shape[1]:
+            np.cumsum(costo_diario, axis=1, out=acumulado[inicio:fin])
+            arriendo[inicio:fin] = acumulado[inicio:fin, -1]
+        else:
+            arriendo[inicio:fin] = costo_diario.sum(axis=1)
+        unidades[inicio:fin] = bloque_ventas.sum(axis=1)
+        dias_stock[inicio:fin] = np.count_nonzero(bloque_stock > 0, axis=1)
+
+    cofinanciamiento = unidades * por_venta
+    total = arriendo + cofinanciamiento
+    with np.errstate(divide="ignore", invalid="ignore"):
+        por_unidad = np.where(unidades > 0, total / unidades, np.nan)
+
+    return pd.DataFrame({
+        "unidades_vendidas": unidades,
+        "dias_con_stock": dias_stock,
+        "arriendo": arriendo,
+        "cofinanciamiento": cofinanciamiento,
+        "costo_total": total,
+        "costo_por_unidad": por_unidad,
+    })
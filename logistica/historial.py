@@ -0,0 +1,222 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Historial de tarifas con vigencia por fecha
+# Cada versión es un Tarifario con su fecha de inicio de vigencia; rige hasta
+# el inicio de la siguiente. Sirve para repreciar órdenes pasadas con las
+# tarifas de su fecha.
+# En disco es una tabla Arrow IPC sin compresión, una fila por versión:
+#   desde                          date32, ordenada
+#   primera_milla_bajo / _alto,    listas de largo fijo (una celda por clase
+#   reversa, flota                 o tamaño, en el orden de CLASES / TAMANOS
+#   crossdock_ripley / _externo    o de los tamaños de Fulfillment)
+#   fulfillment_dia / _venta_min / _venta_max
+#   fuente                         Tarifario.fuente, para reconstruir la versión
+# Las listas de largo fijo guardan sus valores contiguos: al cargar mapeando
+# el archivo, cada campo es una matriz (versiones × celdas) sin copia.
+# Búsquedas: bisect sobre las fechas para una fecha suelta; np.searchsorted y
+# gathers sobre las matrices para millones de líneas con fecha.
+# ──────────────────────────────────────────────────────────────────────────────
+import bisect
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .datos import CLASES, MODALIDADES_PRIMERA_MILLA, TAMANOS, UMBRAL_PRECIO_SP
+from .nucleo import MODALIDADES
+from .tarifas import TARIFARIO, codificar, desde_fuente
+
+# Campos por versión: nombre del atributo del Tarifario y tipo Arrow
+CAMPOS = {
+    "primera_milla_bajo": pa.int64(),
+    "primera_milla_alto": pa.int64(),
+    "reversa": pa.int64(),
+    "flota": pa.int64(),
+    "crossdock_ripley": pa.int64(),
+    "crossdock_externo": pa.int64(),
+    "fulfillment_dia": pa.float64(),
+    "fulfillment_venta_min": pa.int64(),
+    "fulfillment_venta_max": pa.int64(),
+}
+
+
+def a_dias(fechas):
+    """Días desde 1970-01-01 (int64) de una fecha o de un arreglo de fechas (texto ISO, date o datetime)."""
+    if isinstance(fechas, (str, np.datetime64)) or not hasattr(fechas, "__len__"):
+        return int(np.datetime64(pd.Timestamp(fechas).date(), "D").astype(np.int64))
+    if hasattr(fechas, "cat"):
+        # Columna categórica: se convierten solo las categorías
+        dias = a_dias(np.asarray(fechas.cat.categories, dtype=object))
+        codigos = fechas.cat.codes.to_numpy()
+        if (codigos < 0).any():
+            raise ValueError("hay fechas vacías")
+        return dias[codigos]
+    valores = pd.to_datetime(pd.Series(fechas), format="ISO8601")
+    if valores.isna().any():
+        raise ValueError("hay fechas vacías")
+    return valores.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+class HistorialTarifas:
+    """
+    Versiones del tarifario ordenadas por `desde` (int64, días desde 1970):
+    por cada campo de CAMPOS, una matriz (versiones × celdas) con el mismo
+    nombre. `tarifario(fecha)` reconstruye la versión completa (incluido el
+    despacho) desde su fuente.
+    """
+
+    def __init__(self, desde, campos, fuentes, fulfillment_tamanos):
+        self.desde = np.asarray(desde, dtype=np.int64)
+        if len(self.desde) and (np.diff(self.desde) <= 0).any():
+            raise ValueError("las fechas de vigencia deben ser crecientes y distintas")
+        self._desde = self.desde.tolist()
+        for nombre, matriz in campos.items():
+            setattr(self, nombre, matriz)
+        self.fuentes = fuentes
+        self.fulfillment_tamanos = tuple(fulfillment_tamanos)
+        self.tarifario_version = lru_cache(maxsize=None)(lambda i: desde_fuente(self.fuentes[i]))
+
+    def __len__(self):
+        return len(self.desde)
+
+    @classmethod
+    def desde_tarifarios(cls, vigencias):
+        """Desde pares (fecha de inicio, Tarifario), en cualquier orden."""
+        vigencias = sorted(((a_dias(f), t) for f, t in vigencias), key=lambda v: v[0])
+        tamanos_f = {t.fulfillment_tamanos for _, t in vigencias}
+        if len(tamanos_f) > 1:
+            raise ValueError("todas las versiones deben tener los mismos tamaños de Fulfillment")
+        campos = {c: np.stack([getattr(t, c) for _, t in vigencias]) if vigencias
+                  else np.empty((0, 0)) for c in CAMPOS}
+        return cls([d for d, _ in vigencias], campos, [t.fuente for _, t in vigencias],
+                   tamanos_f.pop() if tamanos_f else ())
+
+    def agregar(self, fecha, tarifario=TARIFARIO):
+        """Nuevo historial con `tarifario` vigente desde `fecha` (reemplaza la versión de esa misma fecha)."""
+        dia = a_dias(fecha)
+        vigencias = [(np.datetime64(d, "D"), self.tarifario_version(i))
+                     for i, d in enumerate(self._desde) if d != dia]
+        return HistorialTarifas.desde_tarifarios(vigencias + [(np.datetime64(dia, "D"), tarifario)])
+
+    # Búsquedas
+    def indice(self, fecha):
+        """Versión vigente en `fecha` (bisect sobre las fechas de inicio)."""
+        i = bisect.bisect_right(self._desde, a_dias(fecha)) - 1
+        if i < 0:
+            raise ValueError(f"sin tarifas vigentes el {fecha}")
+        return i
+
+    def indices(self, fechas):
+        """Versión vigente por fecha (arreglo); vectorizado con np.searchsorted."""
+        idx = np.searchsorted(self.desde, a_dias(fechas), side="right") - 1
+        if len(idx) and idx.min() < 0:
+            raise ValueError(f"sin tarifas vigentes antes del {np.datetime64(self._desde[0], 'D')}"
+                             if len(self) else "historial vacío")
+        return idx
+
+    def tarifario(self, fecha):
+        return self.tarifario_version(self.indice(fecha))
+
+    def versiones(self):
+        """Tabla de versiones: desde, hasta (exclusivo; vacío en la vigente) y versión del tarifario."""
+        desde = pd.Series(self.desde.astype("datetime64[D]"))
+        return pd.DataFrame({
+            "desde": desde,
+            "hasta": desde.shift(-1),
+            "version": [self.tarifario_version(i).version for i in range(len(self))],
+        })
+
+    # Gathers por versión (`v` = indices(fechas))
+    def primera_milla(self, v, codigos_clase, precios):
+        return np.where(np.asarray(precios) >= UMBRAL_PRECIO_SP,
+                        self.primera_milla_alto[v, codigos_clase],
+                        self.primera_milla_bajo[v, codigos_clase])
+
+    def logistica_inversa(self, v, codigos_clase):
+        return self.reversa[v, codigos_clase]
+
+    def flota_propia(self, v, codigos_clase):
+        return self.flota[v, codigos_clase]
+
+    def crossdock(self, v, codigos_tamano):
+        return self.crossdock_ripley[v, codigos_tamano], self.crossdock_externo[v, codigos_tamano]
+
+    def fulfillment(self, v, codigos_fulfillment, precios):
+        """(CLP/día por unidad, CLP por venta) con el cofinanciamiento alto desde UMBRAL_PRECIO_SP."""
+        venta = np.where(np.asarray(precios) >= UMBRAL_PRECIO_SP,
+                         self.fulfillment_venta_max[v, codigos_fulfillment],
+                         self.fulfillment_venta_min[v, codigos_fulfillment])
+        return self.fulfillment_dia[v, codigos_fulfillment], venta
+
+    # Disco
+    def a_arrow(self):
+        columnas = {"desde": pa.array(self.desde.astype("datetime64[D]"), type=pa.date32())}
+        for nombre, tipo in CAMPOS.items():
+            matriz = np.ascontiguousarray(getattr(self, nombre))
+            columnas[nombre] = pa.FixedSizeListArray.from_arrays(
+                pa.array(matriz.ravel(), type=tipo), max(matriz.shape[1], 1) if matriz.size else 1)
+        columnas["fuente"] = pa.array(self.fuentes, type=pa.string())
+        metadatos = {"clases": json.dumps(CLASES), "tamanos": json.dumps(TAMANOS),
+                     "fulfillment_tamanos": json.dumps(self.fulfillment_tamanos)}
+        return pa.table(columnas).replace_schema_metadata(metadatos)
+
+    @classmethod
+    def desde_arrow(cls, tabla):
+        metadatos = {k.decode(): json.loads(v) for k, v in (tabla.schema.metadata or {}).items()}
+        if tuple(metadatos.get("clases", ())) != CLASES or tuple(metadatos.get("tamanos", ())) != TAMANOS:
+            raise ValueError("el historial usa otras clases o tamaños que logistica.datos")
+        tabla = tabla.combine_chunks()
+        campos = {}
+        for nombre in CAMPOS:
+            lista = tabla.column(nombre).chunk(0) if tabla.num_rows else None
+            campos[nombre] = (lista.values.to_numpy().reshape(len(lista), lista.type.list_size)
+                              if lista is not None else np.empty((0, 0)))
+        desde = tabla.column("desde").to_numpy().astype("datetime64[D]").astype(np.int64)
+        return cls(desde, campos, tabla.column("fuente").to_pylist(), metadatos["fulfillment_tamanos"])
+
+    def guardar(self, ruta):
+        tabla = self.a_arrow()
+        with pa.OSFile(str(ruta), "wb") as destino, pa.ipc.new_file(destino, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+
+
+def cargar(ruta):
+    """Historial desde un archivo Arrow IPC, mapeado en memoria."""
+    return HistorialTarifas.desde_arrow(pa.ipc.open_file(pa.memory_map(str(ruta), "r")).read_all())
+
+
+# ── Repreciar líneas ─────────────────────────────────────────────────────────
+_PAGAN_PRIMERA_MILLA = np.array([m in MODALIDADES_PRIMERA_MILLA for m in MODALIDADES])
+
+
+def repreciar(historial, lineas):
+    """
+    Tarifas vigentes a la fecha de cada línea (DataFrame o dict de columnas
+    con `fecha`, `clase` y `precio`; opcionales `modalidad` y `tamano`):
+    desde (inicio de la versión aplicada), primera_milla (0 si la modalidad no
+    la paga), logistica_inversa, flota_propia (SIN_TARIFA si falta) y, con
+    tamaño, crossdock_ripley / crossdock_externo.
+    """
+    v = historial.indices(lineas["fecha"])
+    clase = _codigos(lineas["clase"], CLASES)
+    columnas = {"desde": historial.desde[v].astype("datetime64[D]")}
+    primera = historial.primera_milla(v, clase, np.asarray(lineas["precio"], dtype=np.float64))
+    if "modalidad" in lineas:
+        primera = np.where(_PAGAN_PRIMERA_MILLA[_codigos(lineas["modalidad"], MODALIDADES)], primera, 0)
+    columnas["primera_milla"] = primera
+    columnas["logistica_inversa"] = historial.logistica_inversa(v, clase)
+    columnas["flota_propia"] = historial.flota_propia(v, clase)
+    if "tamano" in lineas:
+        columnas["crossdock_ripley"], columnas["crossdock_externo"] = \
+            historial.crossdock(v, _codigos(lineas["tamano"], TAMANOS))
+    return columnas
+
+
+def _codigos(valores, dominio):
+    if hasattr(valores, "cat"):
+        if (valores.cat.codes.to_numpy() < 0).any():
+            raise ValueError("hay valores vacíos")
+        return codificar(np.asarray(valores.cat.categories, dtype=object), dominio)[valores.cat.codes.to_numpy()]
+    return codificar(valores, dominio)
+
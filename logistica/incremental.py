@@ -0,0 +1,178 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Recálculo incremental de resultados compactos al cambiar tarifas o reglas
+# Unos Resultados (logistica.resultados) guardan en sus metadatos las tablas
+# fuente del tarifario y las reglas (pesos, perfiles, deltas) con que se
+# calcularon. Al comparar con las vigentes se obtienen las celdas cambiadas,
+# y cada fila depende de pocas celdas, deducibles de sus propias columnas:
+#   primera milla   (clase del tamaño, tramo de precio), si la modalidad
+#                   recomendada la paga
+#   REVERSE         clase del tamaño
+#   FLOTA_ENV,      umbral de volumen de Flota Propia del tamaño: solo filas
+#   FLOTA_RUTAS,    RM con foco en control cuyo volumen queda entre el umbral
+#   KM_RUTAS_RM     anterior y el nuevo (la regla cambia de valor)
+#   regla k         filas en que la condición k se cumple; pesos o perfiles
+#                   cambiados afectan a todas
+# CROSSDOCK_SCL, Fulfillment y despacho no se leen al puntuar ni se guardan
+# en los resultados: sus cambios se informan con 0 filas afectadas.
+# Un cambio de UMBRAL_PRECIO_SP no se puede aplicar: los resultados guardan
+# el tramo de precio, no el precio. Hay que volver a compactarlos.
+# Solo las filas afectadas se recalculan (resultados.desde_codigos).
+# ──────────────────────────────────────────────────────────────────────────────
+import json
+
+import numpy as np
+import pandas as pd
+
+from .datos import CLASES, FLOTA_RUTAS, KM_RUTAS_RM, TAMANOS, UMBRAL_PRECIO_SP
+from .nucleo import MODALIDADES, ORDINALES, REGIONES
+from .ranking import DELTAS, PERFILES, PESOS, REGLAS, mascaras_reglas, umbrales_flota
+from .resultados import _PAGAN_PRIMERA_MILLA, COLUMNAS_CLP, COLUMNAS_SCORE, desde_codigos, metadatos_calculo
+from .tarifas import TARIFARIO, desde_fuente
+
+TRAMOS = ("lt_24990", "ge_24990")
+# Columnas que se reescriben al recalcular (el resto son entradas del escenario)
+COLUMNAS_CALCULADAS = ORDINALES + COLUMNAS_SCORE + COLUMNAS_CLP
+
+
+# ── Diferencias ──────────────────────────────────────────────────────────────
+def _cambios_por_celda(tabla, celdas, antes, despues):
+    cambiadas = np.flatnonzero(antes != despues)
+    return [(tabla, celdas[i], antes[i].item(), despues[i].item()) for i in cambiadas.tolist()]
+
+
+def diferencias(anterior, nuevo):
+    """
+    Celdas distintas entre dos Tarifario: lista de (tabla, celda, antes,
+    después); `celda` es la clase, 'clase/tramo' o el tamaño.
+    """
+    filas = []
+    filas += _cambios_por_celda("FIRST_MILE", [f"{c}/{TRAMOS[0]}" for c in CLASES],
+                                anterior.primera_milla_bajo, nuevo.primera_milla_bajo)
+    filas += _cambios_por_celda("FIRST_MILE", [f"{c}/{TRAMOS[1]}" for c in CLASES],
+                                anterior.primera_milla_alto, nuevo.primera_milla_alto)
+    filas += _cambios_por_celda("REVERSE", CLASES, anterior.reversa, nuevo.reversa)
+    filas += _cambios_por_celda("FLOTA_ENV", CLASES, anterior.flota, nuevo.flota)
+    for nombre in ("crossdock_ripley", "crossdock_externo"):
+        filas += _cambios_por_celda("CROSSDOCK_SCL", [f"{t}/{nombre.split('_')[1]}" for t in TAMANOS],
+                                    getattr(anterior, nombre), getattr(nuevo, nombre))
+    if (anterior.fulfillment_tamanos != nuevo.fulfillment_tamanos
+            or not all(np.array_equal(getattr(anterior, a), getattr(nuevo, a))
+                       for a in ("fulfillment_dia", "fulfillment_venta_min", "fulfillment_venta_max"))):
+        filas.append(("FULF_STORAGE", "*", None, None))
+    if not (np.array_equal(anterior.despacho.tarifa, nuevo.despacho.tarifa)
+            and np.array_equal(anterior.despacho.umbrales, nuevo.despacho.umbrales)
+            and np.array_equal(anterior.despacho.descuento, nuevo.despacho.descuento)):
+        filas.append(("DESPACHO", "*", None, None))
+    return filas
+
+
+# ── Filas afectadas ──────────────────────────────────────────────────────────
+class Actualizacion:
+    """
+    Resultado de actualizar(): `resultados` recalculados, `cambios` (tabla,
+    celda, antes, después, filas afectadas), `filas` (índices recalculados)
+    y `recomendaciones` (filas cuya modalidad recomendada cambió).
+    """
+
+    def __init__(self, resultados, cambios, filas, recomendaciones):
+        self.resultados = resultados
+        self.cambios = cambios
+        self.filas = filas
+        self.recomendaciones = recomendaciones
+
+
+def actualizar(resultados, tarifario=TARIFARIO):
+    """
+    Recalcula solo las filas de `resultados` que leen alguna tarifa, regla o
+    parámetro distinto entre los guardados en sus metadatos y los vigentes
+    (`tarifario`, las reglas de logistica.ranking y FLOTA_RUTAS, KM_RUTAS_RM
+    y UMBRAL_PRECIO_SP de logistica.datos). No modifica `resultados`.
+    """
+    if ("parametros" not in resultados.metadatos or "tarifario" not in resultados.metadatos
+            or "escenario" not in resultados.columnas):
+        raise ValueError("resultados sin tarifas, parámetros ni escenarios guardados: vuelve a compactarlos")
+    anterior = desde_fuente(resultados.metadatos["tarifario"])
+    reglas = json.loads(resultados.metadatos["reglas"])
+    parametros = json.loads(resultados.metadatos["parametros"])
+    if parametros["UMBRAL_PRECIO_SP"] != UMBRAL_PRECIO_SP:
+        raise ValueError(f"UMBRAL_PRECIO_SP cambió ({parametros['UMBRAL_PRECIO_SP']} → {UMBRAL_PRECIO_SP}): "
+                         "vuelve a compactar los resultados")
+
+    col = resultados.columnas
+    n = len(resultados)
+    clase = anterior.clase_de_tamano[col["tamano"]]
+    bits = col["escenario"]
+    precio_alto = (bits >> 3 & 1).astype(bool)
+    afectadas = np.zeros(n, dtype=bool)
+    cambios = []
+
+    def marcar(tabla, celda, antes, despues, mascara):
+        afectadas[mascara] = True
+        cambios.append((tabla, celda, antes, despues, int(np.count_nonzero(mascara))))
+
+    for tabla, celda, antes, despues in diferencias(anterior, tarifario):
+        if tabla == "FIRST_MILE":
+            c, tramo = celda.split("/")
+            paga = _PAGAN_PRIMERA_MILLA[col["Primero"]]
+            marcar(tabla, celda, antes, despues,
+                   (clase == CLASES.index(c)) & (precio_alto == (tramo == TRAMOS[1])) & paga)
+        elif tabla == "REVERSE":
+            marcar(tabla, celda, antes, despues, clase == CLASES.index(celda))
+        else:
+            # FLOTA_ENV afecta filas a través de los umbrales por tamaño (abajo)
+            cambios.append((tabla, celda, antes, despues, 0))
+
+    for nombre, vigentes in (("FLOTA_RUTAS", FLOTA_RUTAS), ("KM_RUTAS_RM", KM_RUTAS_RM)):
+        # Afectan filas a través de los umbrales por tamaño (abajo)
+        for clave in sorted(set(parametros[nombre]) | set(vigentes)):
+            if parametros[nombre].get(clave) != vigentes.get(clave):
+                cambios.append((nombre, clave, parametros[nombre].get(clave), vigentes.get(clave), 0))
+
+    umbral_antes = umbrales_flota(anterior, parametros["FLOTA_RUTAS"], parametros["KM_RUTAS_RM"])
+    umbral_nuevo = umbrales_flota(tarifario)
+    candidatas = None
+    for t in np.flatnonzero(umbral_antes != umbral_nuevo).tolist():
+        if candidatas is None:
+            # Filas en que la regla de Flota Propia depende del volumen
+            candidatas = (col["region"] == 0) & (bits >> 2 & 1).astype(bool)
+        bajo, alto = sorted((umbral_antes[t], umbral_nuevo[t]))
+        v = col["volumen"]
+        marcar("umbral Flota Propia", TAMANOS[t], umbral_antes[t].item(), umbral_nuevo[t].item(),
+               candidatas & (col["tamano"] == t) & (v >= bajo) & (v < alto))
+
+    if not (np.array_equal(reglas["pesos"], PESOS) and np.array_equal(reglas["perfiles"], PERFILES)):
+        marcar("reglas", "pesos/perfiles", None, None, np.ones(n, dtype=bool))
+    else:
+        distintas = [k for k in range(len(REGLAS)) if not np.array_equal(reglas["deltas"][k], DELTAS[k])]
+        if distintas:
+            mascaras = mascaras_reglas(resultados.escenarios(), umbral_antes)
+            for k in distintas:
+                marcar("reglas", REGLAS[k][0], None, None, mascaras[:, k])
+
+    filas = np.flatnonzero(afectadas)
+    nuevos = _recalcular(resultados, filas, tarifario)
+    antes, despues = col["Primero"][filas], nuevos.columnas["Primero"][filas]
+    cambio = antes != despues
+    recomendaciones = pd.DataFrame({
+        "fila": filas[cambio],
+        "tamano": pd.Categorical.from_codes(col["tamano"][filas][cambio], categories=TAMANOS),
+        "region": pd.Categorical.from_codes(col["region"][filas][cambio], categories=REGIONES),
+        "antes": pd.Categorical.from_codes(antes[cambio], categories=MODALIDADES),
+        "despues": pd.Categorical.from_codes(despues[cambio], categories=MODALIDADES),
+    })
+    tabla_cambios = pd.DataFrame(cambios, columns=["tabla", "celda", "antes", "despues", "filas"])
+    return Actualizacion(nuevos, tabla_cambios, filas, recomendaciones)
+
+
+def _recalcular(resultados, filas, tarifario):
+    """Copia de `resultados` con `filas` recalculadas y los metadatos del cálculo nuevo."""
+    columnas = dict(resultados.columnas)
+    if len(filas):
+        parcial = desde_codigos(resultados.escenarios(filas), tarifario=tarifario)
+        for c in COLUMNAS_CALCULADAS:
+            columnas[c] = columnas[c].copy()
+            columnas[c][filas] = parcial.columnas[c]
+        metadatos = parcial.metadatos
+    else:
+        metadatos = metadatos_calculo(tarifario)
+    return type(resultados)(columnas, metadatos)
@@ -0,0 +1,226 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Tiempos por etapa de cada rerun
+# Las funciones del camino caliente se decoran con @medir("etapa") y los
+# bloques sueltos se envuelven en `with tramo("etapa")`. Mientras un rerun
+# está abierto (`with rerun(app)`) se acumulan llamadas, total y
+# máximo por etapa; al cerrar se agrega una línea al JSONL rotativo
+# logs/tiempos.jsonl. Fuera de un rerun el costo es una lectura de ContextVar.
+#
+# Parámetros de la URL:
+#   ?perf=1                panel de tiempos al final de la página
+#   ?perfil=cprofile       cProfile de este rerun (top por tiempo acumulado)
+#   ?perfil=tracemalloc    memoria asignada por línea en este rerun
+# ──────────────────────────────────────────────────────────────────────────────
+import contextvars
+import functools
+import io
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# Ruta del log (LOGISTICA_LOG_TIEMPOS="" lo desactiva) y su rotación
+RUTA_LOG = os.environ.get("LOGISTICA_LOG_TIEMPOS",
+                          str(Path(__file__).resolve().parent.parent / "logs" / "tiempos.jsonl"))
+MAX_BYTES_LOG = 5 * 1024 * 1024
+RESPALDOS_LOG = 3
+
+PERFILES = ("cprofile", "tracemalloc")
+LINEAS_PERFIL = 25
+
+_ACTUAL = contextvars.ContextVar("registro_rerun", default=None)
+
+
+class Registro:
+    """Tiempos de un rerun: {etapa: [llamadas, total_ms, max_ms]} más el total."""
+
+    def __init__(self, app, perfil=None):
+        self.app = app
+        self.perfil = perfil
+        self.etapas = {}
+        self.profundidad = 0
+        self.en_raiz_ms = 0.0        # tiempo de etapas no anidadas en otra etapa
+        self.total_ms = None
+        self.reporte_perfil = None
+        self._inicio = time.perf_counter()
+        self._perfilador = None
+
+    def anotar(self, etapa, ms, raiz):
+        e = self.etapas.get(etapa)
+        if e is None:
+            self.etapas[etapa] = [1, ms, ms]
+        else:
+            e[0] += 1
+            e[1] += ms
+            e[2] = max(e[2], ms)
+        if raiz:
+            self.en_raiz_ms += ms
+
+    def filas(self):
+        """[(etapa, llamadas, total_ms, max_ms)] de mayor a menor total, con el resto del rerun."""
+        filas = sorted(((k, n, t, m) for k, (n, t, m) in self.etapas.items()), key=lambda f: -f[2])
+        if self.total_ms is not None:
+            filas.append(("sin instrumentar (Streamlit, widgets)", 1,
+                          max(self.total_ms - self.en_raiz_ms, 0.0), None))
+            filas.append(("rerun", 1, self.total_ms, self.total_ms))
+        return filas
+
+    def como_dict(self):
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "app": self.app,
+            "pid": os.getpid(),
+            "total_ms": round(self.total_ms, 3),
+            "perfil": self.perfil,
+            "etapas": {k: {"n": n, "total_ms": round(t, 3), "max_ms": round(m, 3)}
+                       for k, (n, t, m) in self.etapas.items()},
+        }
+
+
+# ── Medición ─────────────────────────────────────────────────────────────────
+@contextmanager
+def tramo(etapa):
+    registro = _ACTUAL.get()
+    if registro is None:
+        yield
+        return
+    raiz = registro.profundidad == 0
+    registro.profundidad += 1
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro.profundidad -= 1
+        registro.anotar(etapa, (time.perf_counter() - t0) * 1000, raiz)
+
+
+def medir(etapa=None):
+    """Decorador: registra cada llamada bajo `etapa` (por defecto, el nombre de la función)."""
+    def decorador(funcion):
+        nombre = etapa or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _ACTUAL.get() is None:
+                return funcion(*args, **kwargs)
+            with tramo(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# ── Ciclo de un rerun ────────────────────────────────────────────────────────
+def iniciar_rerun(app, parametros=None):
+    """
+    Abre el registro del rerun actual. `parametros` son los query params de
+    la página; ?perfil=cprofile|tracemalloc activa la captura de este rerun.
+    """
+    perfil = (parametros or {}).get("perfil")
+    registro = Registro(app, perfil if perfil in PERFILES else None)
+    if registro.perfil == "cprofile":
+        import cProfile
+        registro._perfilador = cProfile.Profile()
+        try:
+            registro._perfilador.enable()
+        except ValueError:
+            # Otro rerun ya está perfilando en este proceso
+            registro.perfil, registro._perfilador = None, None
+            registro.reporte_perfil = "cProfile ocupado por otra sesión; reintente."
+    elif registro.perfil == "tracemalloc":
+        # Captura global del proceso: incluye lo que asignen otras sesiones a la vez
+        import tracemalloc
+        tracemalloc.start()
+    _ACTUAL.set(registro)
+    registro._inicio = time.perf_counter()
+    return registro
+
+
+def cerrar_rerun(registro):
+    """Cierra el registro, detiene el perfilador y agrega la línea al log."""
+    registro.total_ms = (time.perf_counter() - registro._inicio) * 1000
+    _ACTUAL.set(None)
+    if registro.perfil == "cprofile":
+        import pstats
+        registro._perfilador.disable()
+        salida = io.StringIO()
+        pstats.Stats(registro._perfilador, stream=salida).sort_stats("cumulative").print_stats(LINEAS_PERFIL)
+        registro.reporte_perfil = salida.getvalue()
+        registro._perfilador = None
+    elif registro.perfil == "tracemalloc":
+        import tracemalloc
+        captura = tracemalloc.take_snapshot()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lineas = [f"pico: {pico / 1024:.1f} KiB"]
+        lineas += [str(s) for s in captura.statistics("lineno")[:LINEAS_PERFIL]]
+        registro.reporte_perfil = "\n".join(lineas)
+    escribir_log(registro)
+    return registro
+
+
+@contextmanager
+def rerun(app, parametros=None):
+    """
+    iniciar_rerun … cerrar_rerun alrededor del cuerpo de la página: el
+    perfilador se detiene y la línea del log se escribe también si el rerun
+    termina con una excepción (st.stop, st.rerun o un error).
+    """
+    registro = iniciar_rerun(app, parametros)
+    try:
+        yield registro
+    finally:
+        cerrar_rerun(registro)
+
+
+_LOGGER = None
+_CANDADO_LOG = threading.Lock()
+
+
+def _logger():
+    global _LOGGER
+    with _CANDADO_LOG:
+        if _LOGGER is None:
+            logger = logging.getLogger("logistica.tiempos")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            Path(RUTA_LOG).parent.mkdir(parents=True, exist_ok=True)
+            manejador = RotatingFileHandler(RUTA_LOG, maxBytes=MAX_BYTES_LOG,
+                                            backupCount=RESPALDOS_LOG, encoding="utf-8")
+            manejador.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(manejador)
+            _LOGGER = logger
+        return _LOGGER
+
+
+def escribir_log(registro):
+    if not RUTA_LOG:
+        return
+    try:
+        _logger().info(json.dumps(registro.como_dict(), ensure_ascii=False))
+    except OSError:
+        pass    # un disco lleno o sin permisos no debe romper la página
+
+
+# ── Panel ────────────────────────────────────────────────────────────────────
+def panel_visible(parametros):
+    return parametros.get("perf") in ("1", "true", "si", "sí") or parametros.get("perfil") in PERFILES
+
+
+def mostrar_panel(registro):
+    """Dibuja el panel de tiempos (solo con ?perf=1 o ?perfil=…)."""
+    import streamlit as st
+
+    with st.expander(f"⏱ Rendimiento del rerun: {registro.total_ms:.1f} ms", expanded=True):
+        st.table([
+            {"etapa": etapa, "llamadas": n, "total ms": round(total, 3),
+             "máx ms": None if maximo is None else round(maximo, 3)}
+            for etapa, n, total, maximo in registro.filas()
+        ])
+        if registro.reporte_perfil:
+            st.code(registro.reporte_perfil, language="text")
+        st.caption(f"Log: {RUTA_LOG or 'desactivado'}")
@@ -0,0 +1,504 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Núcleo escalar sin dependencias (Python puro)
+# La lógica de rank_modalidades, calcular_primera_milla, costos_estimados y de
+# beneficios/desventajas de las apps, importable sin Streamlit, NumPy ni
+# pandas: sirve para procesos por lotes, funciones serverless y la CLI
+# (python -m logistica). Las tablas se devuelven como listas de tuplas; con
+# como_dataframe=True se arman DataFrames (pandas se importa solo entonces).
+# ──────────────────────────────────────────────────────────────────────────────
+import math
+
+from .datos import (
+    CLASES,
+    CROSSDOCK_SCL,
+    DESPACHO,
+    EQUIVALENCIA_TAMANO_CLASE,
+    FIRST_MILE,
+    FLOTA_ENV,
+    FLOTA_RUTAS,
+    FULF_STORAGE,
+    KM_RUTAS_RM,
+    REVERSE,
+    TAMANOS,
+    UMBRAL_PRECIO_SP,
+    parsear_fulfillment,
+)
+from .formato import clp
+
+MODALIDADES = ("Operador Logístico", "Crossdock", "Fulfillment", "Flota Propia")
+REGIONES = ("Región Metropolitana", "Otra región")
+CRITERIOS = ("costo", "velocidad", "control", "cobertura")
+ORDINALES = ("Primero", "Segundo", "Tercero", "Cuarto")
+
+COLUMNAS_ESCENARIO = ("tamano", "region", "volumen", "tiene_bodega", "alta_rotacion",
+                      "retiro_tienda", "foco_control_marca")
+
+# Pesos globales (costo, velocidad, control, cobertura)
+PESOS = {"costo": 0.42, "velocidad": 0.28, "control": 0.20, "cobertura": 0.10}
+
+# Perfiles base por modalidad
+PERFILES = {
+    "Operador Logístico": {"costo": 0.60, "velocidad": 0.50, "control": 0.80, "cobertura": 0.65},
+    "Crossdock":          {"costo": 0.80, "velocidad": 0.70, "control": 0.60, "cobertura": 0.70},
+    "Fulfillment":        {"costo": 0.50, "velocidad": 0.90, "control": 0.40, "cobertura": 0.80},
+    "Flota Propia":       {"costo": 0.60, "velocidad": 0.70, "control": 1.00, "cobertura": 0.45},
+}
+
+PEQUENOS = ("SP", "XXS", "XS")
+MEDIANOS = ("S", "M1")
+GRANDES = ("M2", "L/XL")
+
+COLUMNAS_COSTOS = ("Concepto", "Detalle", "Costo estimado")
+COLUMNAS_EJEMPLOS = ("Tamaño", "Costo estimado")
+
+
+class EscenarioInvalido(ValueError):
+    """Entrada de escenario con un valor fuera de dominio."""
+
+
+def a_dataframe(filas, columnas):
+    """DataFrame sin índice propio a partir de filas; importa pandas aquí."""
+    import pandas as pd
+    return pd.DataFrame(list(filas), columns=list(columnas))
+
+
+# ── Entradas ─────────────────────────────────────────────────────────────────
+_VERDADEROS = {"sí", "si", "s", "true", "t", "1", "yes", "y", "x"}
+_FALSOS = {"no", "n", "false", "f", "0", ""}
+_BOOLEANAS = ("tiene_bodega", "alta_rotacion", "retiro_tienda", "foco_control_marca")
+# retiro_tienda no cambia el puntaje; si falta se asume No
+OPCIONALES = {"retiro_tienda": False}
+
+
+def a_booleano(valor, columna=""):
+    """Booleanos, 0/1 o texto ("Sí"/"No", "true"/"false", …)."""
+    if isinstance(valor, bool):
+        return valor
+    v = str(valor).strip().lower()
+    if v in _VERDADEROS:
+        return True
+    if v in _FALSOS:
+        return False
+    raise EscenarioInvalido(f"{columna}={valor!r} no es Sí/No")
+
+
+def normalizar_escenario(valores):
+    """
+    Mapeo con COLUMNAS_ESCENARIO (texto de CSV, JSON o formulario) → tupla de
+    argumentos de rank_modalidades, con tiene_bodega como "Sí"/"No".
+    """
+    faltantes = [c for c in COLUMNAS_ESCENARIO if c not in valores and c not in OPCIONALES]
+    if faltantes:
+        raise EscenarioInvalido(f"faltan campos: {', '.join(faltantes)}")
+    tamano = str(valores["tamano"]).strip()
+    if tamano not in TAMANOS:
+        raise EscenarioInvalido(f"tamaño no reconocido {tamano!r}")
+    region = str(valores["region"]).strip()
+    if region not in REGIONES:
+        raise EscenarioInvalido(f"región no reconocida {region!r}")
+    try:
+        volumen = float(valores["volumen"])
+    except (TypeError, ValueError):
+        raise EscenarioInvalido(f"volumen={valores['volumen']!r} no es numérico") from None
+    b = {c: a_booleano(valores.get(c, OPCIONALES.get(c)), c) for c in _BOOLEANAS}
+    return (tamano, region, volumen, "Sí" if b["tiene_bodega"] else "No",
+            b["alta_rotacion"], b["retiro_tienda"], b["foco_control_marca"])
+
+
+# ── Puntuación ───────────────────────────────────────────────────────────────
+# ── Flota Propia: costo de rutas ─────────────────────────────────────────────
+def costo_flota_por_entrega(volumen, parametros=FLOTA_RUTAS, km=KM_RUTAS_RM):
+    """
+    CLP por entrega de una flota propia en la RM con `volumen` entregas
+    diarias, con el modelo continuo calibrado sobre logistica.rutas: rutas =
+    max(1, volumen / entregas_max_vehiculo) en promedio de días y
+    km = por_ruta·rutas + por_raiz_entrega·√volumen. Decrece con el volumen.
+    """
+    if volumen <= 0:
+        return math.inf
+    rutas = max(1.0, volumen / parametros["entregas_max_vehiculo"])
+    km_dia = km["por_ruta"] * rutas + km["por_raiz_entrega"] * math.sqrt(volumen)
+    return (rutas * parametros["costo_vehiculo_dia"] + km_dia * parametros["costo_km"]) / volumen
+
+
+def referencia_flota(tamano):
+    """Tarifa por paquete de Envíame (FLOTA_ENV) para la clase del tamaño: despachar sin rutas propias."""
+    return FLOTA_ENV[EQUIVALENCIA_TAMANO_CLASE[tamano]]
+
+
+def _umbral_flota(referencia, tope=100_000, parametros=FLOTA_RUTAS, km=KM_RUTAS_RM):
+    """Menor volumen entero cuyo costo por entrega no supera `referencia` (inf si no se alcanza)."""
+    if costo_flota_por_entrega(tope, parametros, km) > referencia:
+        return math.inf
+    bajo, alto = 1, tope
+    while bajo < alto:
+        medio = (bajo + alto) // 2
+        if costo_flota_por_entrega(medio, parametros, km) <= referencia:
+            alto = medio
+        else:
+            bajo = medio + 1
+    return bajo
+
+
+# Órdenes diarias desde las que las rutas propias cuestan menos que la tarifa por
+# paquete. Con los valores de referencia de FLOTA_RUTAS: SP y XXS 243, XS 25,
+# S y M1 20, M2 17, L/XL 6 (antes, 20 para todos los tamaños).
+UMBRALES_VOLUMEN_FLOTA = {t: _umbral_flota(referencia_flota(t)) for t in TAMANOS}
+
+
+def flota_rentable(tamano, region, volumen, costo_flota=None):
+    """
+    ¿Conviene en costo la flota propia? Solo en la RM, cuando el costo por
+    entrega de las rutas no supera referencia_flota(tamano). `costo_flota`
+    (p. ej. PlanRutas.costo_por_entrega de un día real) reemplaza la
+    estimación por volumen.
+    """
+    if region != "Región Metropolitana":
+        return False
+    if costo_flota is None:
+        return volumen >= UMBRALES_VOLUMEN_FLOTA[tamano]
+    return costo_flota <= referencia_flota(tamano)
+
+
+def rank_modalidades(tamano, region, volumen, tiene_bodega, alta_rotacion,
+                     retiro_tienda, foco_control_marca, como_dataframe=False, costo_flota=None):
+    """
+    Lista [(modalidad, score), …] de mayor a menor puntaje (orden estable ante
+    empates). Con como_dataframe=True, DataFrame con columnas Modalidad y score.
+    `costo_flota` es el costo por entrega de rutas reales (ver flota_rentable).
+    """
+    en_region_metropolitana = (region == "Región Metropolitana")
+    es_pequeno = tamano in PEQUENOS
+    es_mediano = tamano in MEDIANOS
+    es_grande = tamano in GRANDES
+    sin_bodega = (tiene_bodega == "No")
+
+    perfiles = {m: dict(p) for m, p in PERFILES.items()}
+
+    # Ajustes por contexto:
+    if en_region_metropolitana and (es_mediano or es_grande):
+        perfiles["Crossdock"]["costo"] += 0.15
+        perfiles["Crossdock"]["velocidad"] += 0.05
+    if es_pequeno:
+        # En tamaños pequeños la diferencia de precio frente a operadores externos es baja.
+        perfiles["Crossdock"]["costo"] -= 0.05
+
+    if alta_rotacion or sin_bodega:
+        perfiles["Fulfillment"]["velocidad"] += 0.05
+        perfiles["Fulfillment"]["cobertura"] += 0.05
+        perfiles["Fulfillment"]["costo"] -= 0.05
+
+    if foco_control_marca and flota_rentable(tamano, region, volumen, costo_flota):
+        perfiles["Flota Propia"]["control"] += 0.05
+        perfiles["Flota Propia"]["velocidad"] += 0.05
+        perfiles["Flota Propia"]["costo"] += 0.05  # las rutas propias cuestan menos que la tarifa por paquete
+
+    if (tiene_bodega == "Sí") and (es_pequeno or es_mediano):
+        perfiles["Operador Logístico"]["control"] += 0.05
+        perfiles["Operador Logístico"]["costo"] += 0.05
+
+    # Cálculo del puntaje compuesto
+    filas = []
+    for modalidad, p in perfiles.items():
+        score = (PESOS["costo"] * p["costo"] +
+                 PESOS["velocidad"] * p["velocidad"] +
+                 PESOS["control"] * p["control"] +
+                 PESOS["cobertura"] * p["cobertura"])
+        filas.append((modalidad, score))
+    filas.sort(key=lambda f: f[1], reverse=True)
+    return a_dataframe(filas, ("Modalidad", "score")) if como_dataframe else filas
+
+
+# ── Recomendadores de tres preguntas (app.py, app(final).py, app(orden-desc).py) ──
+MODALIDADES_TRES_PREGUNTAS = ("Operador Logístico", "Crossdock", "Fulfillment")
+
+
+def recomendar_modalidad(tiene_bodega: bool, voluminoso: bool, alta_rotacion: bool):
+    """Cascada de reglas de app.py: (modalidad, motivo)."""
+    if not tiene_bodega:
+        return "Fulfillment", "Sin bodega propia: delega almacenamiento y despacho en Ripley."
+    if voluminoso:
+        return "Crossdock", "Productos grandes/voluminosos: Ripley retira en tu bodega y puedes ofrecer retiro en tienda."
+    if alta_rotacion:
+        return "Fulfillment", "Alta rotación: centraliza inventario en CD Ripley para despachos más rápidos."
+    return "Operador Logístico", "Tienes bodega y productos pequeños/medianos con rotación moderada: mantén control y paga solo primera milla."
+
+
+def puntuar_modalidades(bodega: bool, voluminoso: bool, alta_rot: bool):
+    """Puntos enteros de app(final).py: [(modalidad, puntaje)] de mayor a menor."""
+    # Pesos simples y claros; ajustables si lo necesitan
+    puntajes = {"Operador Logístico": 0, "Crossdock": 0, "Fulfillment": 0}
+    if not bodega:
+        puntajes["Fulfillment"] += 3
+    else:
+        puntajes["Operador Logístico"] += 1
+        if voluminoso:
+            puntajes["Crossdock"] += 3
+        else:
+            puntajes["Operador Logístico"] += 2
+        if alta_rot:
+            puntajes["Fulfillment"] += 2
+    if alta_rot:
+        puntajes["Fulfillment"] += 1
+    return sorted(puntajes.items(), key=lambda x: x[1], reverse=True)
+
+
+def ordenar_modalidades(tiene_bodega: bool, voluminoso: bool, alta_rot: bool):
+    """Orden por reglas de app(orden-desc).py: lista de las cuatro modalidades."""
+    # Partimos de una lista base
+    mods = ["Operador Logístico", "Crossdock", "Fulfillment", "Flota Propia"]
+    # Reglas simples y transparentes para posicionar:
+    orden = []
+    # 1) Sin bodega -> Fulfillment primero
+    if not tiene_bodega:
+        orden.append("Fulfillment")
+    # 2) Con bodega y voluminoso -> Crossdock primero
+    if tiene_bodega and voluminoso:
+        orden.append("Crossdock")
+    # 3) Con bodega y no voluminoso -> Operador Logístico primero
+    if tiene_bodega and not voluminoso:
+        orden.append("Operador Logístico")
+    # 4) Alta rotación empuja Fulfillment hacia arriba si no está primero
+    if alta_rot and "Fulfillment" not in orden:
+        orden.append("Fulfillment")
+    # 5) Flota Propia usualmente al final, salvo muy voluminoso (ya se prioriza Crossdock)
+    if "Flota Propia" not in orden:
+        orden.append("Flota Propia")
+    # Completar con las que falten respetando el orden base
+    for m in mods:
+        if m not in orden:
+            orden.append(m)
+    # Devolver sin duplicados manteniendo el orden
+    seen = set(); result = []
+    for m in orden:
+        if m not in seen:
+            result.append(m); seen.add(m)
+    # Asegurar 4 elementos
+    return result[:4]
+
+
+# ── Costos ───────────────────────────────────────────────────────────────────
+def calcular_primera_milla(clase, precio, modalidad):
+    """
+    (valor, nota) de la primera milla por orden de compra; se cobra la tarifa
+    de la clase más alta. Fulfillment no la paga (stock en CD Ripley) y en
+    Flota Propia es caso a caso (valor None).
+    """
+    if modalidad == "Fulfillment":
+        return 0, "No aplica (stock en CD Ripley)."
+    if modalidad == "Flota Propia":
+        return None, "Caso a caso (tarifa acordada con operador aliado)."
+    tarifa = FIRST_MILE[clase]
+    if clase == "SP":
+        if precio < UMBRAL_PRECIO_SP:
+            return tarifa["lt_24990"], "SP < $24.990"
+        return tarifa["ge_24990"], "SP ≥ $24.990"
+    return tarifa["flat"], f"{clase} tarifa fija"
+
+
+def costos_por_orden(modalidad, clase, precio):
+    """
+    Costos por orden de compra de tabla_costos_modalidad, en pesos: primera
+    milla (None si es caso a caso) y logística inversa de la clase.
+    """
+    if clase not in CLASES:
+        raise EscenarioInvalido(f"clase no reconocida {clase!r}")
+    primera_milla, nota = calcular_primera_milla(clase, precio, modalidad)
+    return {"primera_milla": primera_milla, "nota_primera_milla": nota,
+            "logistica_inversa": REVERSE[clase]}
+
+
+def _ejemplo_fulfillment(linea):
+    tamano, dia, vmin, vmax = parsear_fulfillment(linea)
+    venta = clp(vmin) if vmin == vmax else f"{clp(vmin)} / {clp(vmax)}"
+    return tamano, f"{clp(dia)} por día + {venta} por venta"
+
+
+_CLASES_CONFIRMADAS = ("SP", "P2", "G")
+PRIMERA_MILLA_CONFIRMADA = " · ".join(
+    f"{c} {clp(calcular_primera_milla(c, 0, 'Operador Logístico')[0])}" for c in _CLASES_CONFIRMADAS
+)
+
+# Fulfillment: almacenamiento (arriendo) + cofinanciamiento por venta (tabla oficial)
+EJEMPLOS_FULFILLMENT = [_ejemplo_fulfillment(linea) for linea in FULF_STORAGE]
+
+# Tamaño v6 equivalente a cada clase logística (apps de tres preguntas)
+TAMANO_DE_CLASE = {c: t for t, c in EQUIVALENCIA_TAMANO_CLASE.items()}
+
+
+def rango_despacho(tamano, region):
+    """(mínimo, máximo) de lista del despacho final entre las zonas de `region`."""
+    tarifas = [z["tarifas"][tamano] for z in DESPACHO["zonas"] if z["region"] == region]
+    return min(tarifas), max(tarifas)
+
+
+def despacho_cliente(tamano, region=None):
+    """
+    Texto del despacho final que paga el cliente según la matriz por zona y
+    tamaño (antes de promociones): rango de la región o, sin región, de la
+    Región Metropolitana y del resto. Rotulado "(referencial)" mientras la
+    matriz de despacho.json no sea la vigente.
+    """
+    if region is None:
+        texto = f"RM {_rango_despacho_texto(tamano, REGIONES[0])} · regiones {_rango_despacho_texto(tamano, REGIONES[1])}"
+    else:
+        texto = _rango_despacho_texto(tamano, region)
+    return f"{texto} (referencial)" if DESPACHO["referencial"] else texto
+
+
+def _rango_despacho_texto(tamano, region):
+    minimo, maximo = rango_despacho(tamano, region)
+    return clp(minimo) if minimo == maximo else f"{clp(minimo)} a {clp(maximo)}"
+
+
+def detalle_despacho(region=None):
+    """Columna Detalle del despacho final; sin región, la de despacho_cliente(tamano)."""
+    if region is None:
+        zonas = "comuna (RM) o zona (regiones)"
+    else:
+        zonas = "comuna" if region == "Región Metropolitana" else "zona"
+    matriz = "Matriz referencial" if DESPACHO["referencial"] else "Matriz"
+    return f"{matriz} por {zonas} y tamaño; promociones según precio"
+
+
+def despacho_de_clase(clase):
+    """
+    (Detalle, costo) del despacho final para las apps de tres preguntas, que
+    solo conocen la clase logística: el tamaño sale de TAMANO_DE_CLASE (una
+    equivalencia por posición, no una tarifa) y el detalle lo dice.
+    """
+    tamano = TAMANO_DE_CLASE[clase]
+    return (f"{detalle_despacho()}; tamaño {tamano} inferido de la clase {clase}",
+            despacho_cliente(tamano))
+
+
+def costos_estimados(modalidad, tamano, region, como_dataframe=False):
+    """
+    Filas (Concepto, Detalle, Costo estimado) de la ficha de la modalidad.
+    Para Fulfillment devuelve (base, ejemplos por tamaño). Con
+    como_dataframe=True cada tabla es un DataFrame.
+    """
+    if modalidad == "Operador Logístico":
+        base = [
+            ("Primera milla", "Según tamaño (SP / P2 / G confirmados)", PRIMERA_MILLA_CONFIRMADA),
+            ("Cliente: despacho final", detalle_despacho(region), despacho_cliente(tamano, region)),
+        ]
+    elif modalidad == "Crossdock":
+        detalle = "Despacho Región Metropolitana (última milla)"
+        if (region == "Región Metropolitana") and (tamano in CROSSDOCK_SCL):
+            tarifas = CROSSDOCK_SCL[tamano]
+            costo = f"Ripley {clp(tarifas['ripley'])} vs operadores externos {clp(tarifas['externo'])}"
+        else:
+            costo = "Fuera de la RM: ver despacho final por zona; retiro en tienda $0 cuando aplica"
+        base = [
+            ("Primera milla", "Bodega del vendedor → bodega de Ripley", PRIMERA_MILLA_CONFIRMADA),
+            (detalle, "Comparativa válida para la Región Metropolitana", costo),
+            ("Cliente: despacho final", detalle_despacho(region), despacho_cliente(tamano, region)),
+            ("Cliente: retiro en tienda", "Cuando aplica", "$0"),
+        ]
+    elif modalidad == "Fulfillment":
+        base = [
+            ("Arriendo y operación de centro de distribución", "Según tamaño (tabla oficial)", "Ejemplos más abajo"),
+            ("Cliente: despacho final", detalle_despacho(region), despacho_cliente(tamano, region)),
+        ]
+        if como_dataframe:
+            return a_dataframe(base, COLUMNAS_COSTOS), a_dataframe(EJEMPLOS_FULFILLMENT, COLUMNAS_EJEMPLOS)
+        return base, list(EJEMPLOS_FULFILLMENT)
+    else:
+        # Flota Propia: el tarifario Envíame usa clases logísticas; solo se muestra un
+        # monto si el tamaño es también una clase (EQUIVALENCIA_TAMANO_CLASE es una
+        # referencia por posición, no una tarifa del tarifario Envíame)
+        if (region == "Región Metropolitana") and (tamano in FLOTA_ENV):
+            base = [("Última milla Región Metropolitana", f"Tarifa para {tamano}", clp(FLOTA_ENV[tamano]))]
+        elif region == "Región Metropolitana":
+            base = [("Última milla Región Metropolitana", "Tarifario Envíame (SP, P1, P2, P3, M, G, SG)", "Consultar")]
+        else:
+            # Envíame cubre la RM; fuera de ella se referencia la matriz de despacho
+            base = [("Despacho fuera de la Región Metropolitana", detalle_despacho(region),
+                     despacho_cliente(tamano, region))]
+        base.append(("Operación", "Costos internos de flota", "Combustible, conductores, seguros, mantención"))
+    return a_dataframe(base, COLUMNAS_COSTOS) if como_dataframe else base
+
+
+# ── Textos de la ficha ───────────────────────────────────────────────────────
+def descripcion_mod(modalidad: str) -> str:
+    if modalidad == "Operador Logístico":
+        return "El vendedor maneja su stock y paga la primera milla. El cliente paga el despacho final."
+    if modalidad == "Crossdock":
+        return "Ripley retira o recibe en la bodega del vendedor y distribuye. El cliente paga el despacho final o puede retirar en tienda."
+    if modalidad == "Fulfillment":
+        return "El stock queda en la bodega de Ripley; Ripley prepara y despacha. El cliente paga el despacho final."
+    # Flota Propia
+    return "El vendedor usa su propia flota (integrada a Envíame) y define su política de cobro al cliente."
+
+
+def beneficios_clave(modalidad, tamano, region, volumen, tiene_bodega, alta_rotacion,
+                     retiro_tienda, foco_control_marca):
+    beneficios = []
+    if modalidad == "Operador Logístico":
+        beneficios += [
+            "Control total del inventario en tu bodega.",
+            "Pagas primera milla por orden de compra y mantienes flexibilidad.",
+            "Ideal para productos pequeños o medianos con rotación moderada.",
+        ]
+    elif modalidad == "Crossdock":
+        beneficios += [
+            "Plazos de entrega más cortos y opción de retiro en tienda.",
+            "Operación eficiente en la Región Metropolitana; especialmente útil para productos medianos o grandes.",
+        ]
+        if retiro_tienda:
+            beneficios.append("Posibilidad de $0 para el cliente con retiro en tienda (cuando aplica).")
+        if (region == "Región Metropolitana") and (tamano in TAMANOS):
+            if tamano in PEQUENOS:
+                beneficios.append("En productos pequeños la diferencia de precio versus operadores externos es baja (competitivo).")
+            else:
+                beneficios.append("En productos medianos o grandes, gran ventaja de costo versus operadores externos (puede ser hasta 12×).")
+    elif modalidad == "Fulfillment":
+        beneficios += [
+            "Mejora la conversión por mejores niveles de servicio (SLA) y experiencia de entrega.",
+            "Ideal si no tienes bodega propia o si la rotación es alta.",
+            "Mayor visibilidad operacional (inventario, preparación y despacho) desde el centro de distribución de Ripley.",
+        ]
+    elif modalidad == "Flota Propia":
+        beneficios += [
+            "Máximo control y branding propio en la entrega.",
+        ]
+        if flota_rentable(tamano, region, volumen):
+            beneficios.append("Con tu volumen en la Región Metropolitana, las rutas propias cuestan menos por entrega que la tarifa por paquete.")
+    return beneficios
+
+
+def desventajas_clave(modalidad, tamano, region, volumen, tiene_bodega, alta_rotacion,
+                      retiro_tienda, foco_control_marca):
+    desventajas = []
+    en_rm = (region == "Región Metropolitana")
+    es_pequeno = tamano in PEQUENOS
+
+    if modalidad == "Operador Logístico":
+        desventajas += [
+            "Tiempos de entrega algo mayores en algunos casos frente a Crossdock o Fulfillment.",
+            "Menor visibilidad punta a punta comparado con Fulfillment.",
+            "Necesitas gestionar tu bodega (si no tienes bodega, no es ideal).",
+            "Dependencia de la performance del operador de última milla.",
+        ]
+    elif modalidad == "Crossdock":
+        desventajas += [
+            "Requiere coordinación con Ripley (ventanas de retiro y entrega).",
+            "Depende de contar con bodega en la Región Metropolitana para operar de forma óptima.",
+        ]
+        if en_rm and es_pequeno:
+            desventajas.append("En tamaños pequeños la ventaja de costo versus operadores externos es baja.")
+    elif modalidad == "Fulfillment":
+        desventajas += [
+            "Costos de arriendo y operación del centro de distribución de Ripley.",
+            "Menor control directo del inventario (lo gestiona el centro de distribución).",
+            "Exige planificación de entrada y salida de productos del centro de distribución.",
+            "Los productos de baja rotación acumulan costo de almacenamiento por día.",
+        ]
+    elif modalidad == "Flota Propia":
+        desventajas += [
+            "Cobertura principalmente en la Región Metropolitana (alcance nacional acotado).",
+            "Requiere inversión y gestión logística (personal, vehículos, seguros y mantención).",
+            "Riesgo operativo si baja el volumen (rutas ociosas y costos fijos).",
+        ]
+    return desventajas
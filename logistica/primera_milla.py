@@ -0,0 +1,176 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Facturación de primera milla por orden de compra
+# La primera milla se cobra por orden de compra, aplicando el valor de la
+# clase logística más alta dentro de la orden. Cada línea se traduce a un
+# "nivel" de tarifa ordinal (SP < $24.990, SP ≥ $24.990, P1, …, SG), se toma el
+# máximo por orden y se obtiene el monto con un gather sobre el tarifario.
+# Los archivos CSV/Parquet se procesan por bloques con memoria acotada: si
+# no vienen ordenados por order_id, los agregados se reparten en particiones
+# temporales en disco.
+# ──────────────────────────────────────────────────────────────────────────────
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .tarifas import CLASES, MODALIDADES_PRIMERA_MILLA, TARIFARIO, UMBRAL_PRECIO_SP
+
+COLUMNAS_LINEA = ("order_id", "sku", "clase", "precio", "modalidad")
+
+# Niveles de tarifa en orden creciente; el nivel -1 indica que no aplica
+NIVELES = ("SP < $24.990", "SP ≥ $24.990") + CLASES[1:]
+TARIFA_NIVEL = np.concatenate([TARIFARIO.primera_milla_bajo[:1], TARIFARIO.primera_milla_alto])
+# Ordinal de clase (posición en CLASES) de cada nivel
+ORDINAL_NIVEL = np.array([0, 0] + list(range(1, len(CLASES))), dtype=np.int8)
+
+TAMANO_BLOQUE = 1_000_000
+# Particiones por hash de order_id para archivos sin orden garantizado
+PARTICIONES = 16
+
+
+# ── Vectorización por línea ──────────────────────────────────────────────────
+def ordinal_clase(clases):
+    """Ordinal de cada clase según CLASES (SP=0 … SG=6)."""
+    return TARIFARIO.codigo_clase(np.asarray(clases, dtype=object))
+
+
+def nivel_tarifa(clases, precios, modalidades):
+    """
+    Nivel de tarifa por línea:
+      - SP se divide según el precio (< $24.990 → 0, ≥ $24.990 → 1)
+      - P1 … SG ocupan los niveles 2 … 7
+      - -1 si la modalidad no paga primera milla (Fulfillment, Flota Propia)
+    """
+    ordinal = ordinal_clase(clases)
+    precios = np.asarray(precios, dtype=np.float64)
+    nivel = np.where(ordinal == 0,
+                     (precios >= UMBRAL_PRECIO_SP).astype(np.int8),
+                     ordinal + 1).astype(np.int8)
+    aplica = np.isin(np.asarray(modalidades, dtype=object), MODALIDADES_PRIMERA_MILLA)
+    return np.where(aplica, nivel, -1).astype(np.int8)
+
+
+def tarifa(niveles):
+    """Monto de primera milla por nivel (0 cuando no aplica)."""
+    niveles = np.asarray(niveles)
+    return np.where(niveles >= 0, TARIFA_NIVEL[np.clip(niveles, 0, None)], 0)
+
+
+# ── Agregación por orden ─────────────────────────────────────────────────────
+def _agregar(lineas):
+    """Máximo nivel y cantidad de líneas por orden para un bloque de líneas."""
+    parcial = pd.DataFrame({
+        "order_id": lineas["order_id"].to_numpy(),
+        "nivel": nivel_tarifa(lineas["clase"], lineas["precio"], lineas["modalidad"]),
+    })
+    return parcial.groupby("order_id", sort=False).agg(nivel=("nivel", "max"), lineas=("nivel", "size"))
+
+
+def _combinar(parciales):
+    agregado = pd.concat(parciales)
+    return agregado.groupby(level=0, sort=False).agg(nivel=("nivel", "max"), lineas=("lineas", "sum"))
+
+
+def _resultado(agregado):
+    niveles = agregado["nivel"].to_numpy()
+    aplica = niveles >= 0
+    idx = np.clip(niveles, 0, None)
+    return pd.DataFrame({
+        "order_id": agregado.index.to_numpy(),
+        "lineas": agregado["lineas"].to_numpy(),
+        "clase_cobrada": pd.Categorical.from_codes(
+            np.where(aplica, ORDINAL_NIVEL[idx], -1),
+            categories=CLASES,
+        ),
+        "tarifa": pd.Categorical.from_codes(np.where(aplica, idx, -1), categories=NIVELES),
+        "primera_milla": tarifa(niveles),
+    })
+
+
+def primera_milla_ordenes(lineas):
+    """
+    Cobro de primera milla por orden para un DataFrame de líneas
+    (order_id, sku, clase, precio, modalidad). Devuelve una fila por orden con
+    la clase cobrada, el tramo de tarifa y el monto en CLP.
+    """
+    return _resultado(_agregar(lineas))
+
+
+# ── Lectura por bloques ──────────────────────────────────────────────────────
+def iterar_lineas(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Itera un CSV o Parquet de líneas de orden en DataFrames de `tamano_bloque` filas."""
+    ruta = Path(ruta)
+    columnas = ["order_id", "clase", "precio", "modalidad"]
+    if ruta.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(
+            ruta, usecols=columnas, chunksize=tamano_bloque,
+            dtype={"clase": "category", "modalidad": "category", "precio": "float64"},
+        )
+
+
+def facturar_archivo(ruta, tamano_bloque=TAMANO_BLOQUE, ordenado=False, particiones=PARTICIONES):
+    """
+    Factura la primera milla de un archivo de líneas por bloques, con memoria
+    acotada por el tamaño del bloque en ambos modos.
+
+    Con `ordenado=True` (archivo ordenado por order_id) cada bloque emite las
+    órdenes ya cerradas y arrastra solo la última al siguiente; un archivo
+    desordenado es un ValueError. Sin orden garantizado, los agregados de
+    cada bloque se reparten por hash de order_id en `particiones` archivos
+    temporales y luego se combina y emite una partición a la vez (las órdenes
+    salen agrupadas por partición, no en el orden del archivo).
+    """
+    if ordenado:
+        yield from _facturar_ordenado(ruta, tamano_bloque)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="primera_milla_") as carpeta:
+        rutas = [Path(carpeta) / f"{i}.pkl" for i in range(particiones)]
+        destinos = [open(r, "wb") for r in rutas]
+        try:
+            for bloque in iterar_lineas(ruta, tamano_bloque):
+                agregado = _agregar(bloque)
+                particion = pd.util.hash_pandas_object(agregado.index, index=False).to_numpy() % particiones
+                for i, parte in agregado.groupby(particion, sort=False):
+                    pickle.dump(parte, destinos[i], protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            for destino in destinos:
+                destino.close()
+        for r in rutas:
+            parciales = list(_leer_parciales(r))
+            if parciales:
+                yield _resultado(_combinar(parciales))
+
+
+def _facturar_ordenado(ruta, tamano_bloque):
+    pendiente = None
+    for bloque in iterar_lineas(ruta, tamano_bloque):
+        ids = bloque["order_id"]
+        if not ids.is_monotonic_increasing or (
+                pendiente is not None and len(ids) and ids.iloc[0] < pendiente.index[0]):
+            raise ValueError(f"{ruta} no está ordenado por order_id: usa ordenado=False")
+        agregado = _agregar(bloque)
+        if pendiente is not None:
+            agregado = _combinar([pendiente, agregado])
+        pendiente = agregado.iloc[-1:]
+        if len(agregado) > 1:
+            yield _resultado(agregado.iloc[:-1])
+    if pendiente is not None:
+        yield _resultado(pendiente)
+
+
+def _leer_parciales(ruta):
+    with open(ruta, "rb") as origen:
+        while True:
+            try:
+                yield pickle.load(origen)
+            except EOFError:
+                return
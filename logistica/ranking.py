@@ -0,0 +1,226 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Motor de puntuación vectorizado (equivalente a rank_modalidades de v6)
+# Evalúa carteras completas de escenarios con álgebra de arreglos NumPy:
+# los ajustes de perfil se aplican como máscaras booleanas y el puntaje
+# compuesto se calcula en bloque, sin bucles de Python por fila.
+# ──────────────────────────────────────────────────────────────────────────────
+import numpy as np
+
+from .nucleo import (
+    COLUMNAS_ESCENARIO,
+    CRITERIOS,
+    EscenarioInvalido,
+    MODALIDADES,
+    ORDINALES,
+    REGIONES,
+    UMBRALES_VOLUMEN_FLOTA,
+    _umbral_flota,
+    a_booleano,
+)
+from .nucleo import FLOTA_RUTAS, KM_RUTAS_RM
+from .nucleo import PERFILES as _PERFILES, PESOS as _PESOS
+from .tarifas import TAMANOS
+
+# Pesos globales (costo, velocidad, control, cobertura)
+PESOS = np.array([_PESOS[c] for c in CRITERIOS])
+
+# Perfiles base: filas = MODALIDADES, columnas = CRITERIOS
+PERFILES = np.array([[_PERFILES[m][c] for c in CRITERIOS] for m in MODALIDADES])
+
+# Ajustes por contexto, en el mismo orden que rank_modalidades.
+# Cada regla es una matriz delta (modalidad × criterio) que se suma al perfil
+# cuando la condición del escenario se cumple.
+_IDX_MOD = {"ol": 0, "crossdock": 1, "fulfillment": 2, "flota": 3}
+
+def _delta(**celdas):
+    d = np.zeros_like(PERFILES)
+    for clave, valor in celdas.items():
+        modalidad, criterio = clave.split("__")
+        d[_IDX_MOD[modalidad], CRITERIOS.index(criterio)] = valor
+    return d
+
+REGLAS = (
+    ("rm_mediano_o_grande", _delta(crossdock__costo=0.15, crossdock__velocidad=0.05)),
+    ("pequeno", _delta(crossdock__costo=-0.05)),
+    ("rotacion_o_sin_bodega", _delta(fulfillment__velocidad=0.05, fulfillment__cobertura=0.05,
+                                     fulfillment__costo=-0.05)),
+    ("control_rm_volumen", _delta(flota__control=0.05, flota__velocidad=0.05, flota__costo=0.05)),
+    ("bodega_pequeno_o_mediano", _delta(ol__control=0.05, ol__costo=0.05)),
+)
+DELTAS = np.stack([d for _, d in REGLAS])    # (reglas, modalidades, criterios)
+
+# Órdenes diarias desde las que Flota Propia conviene en costo, por código de tamaño
+UMBRALES_FLOTA = np.array([UMBRALES_VOLUMEN_FLOTA[t] for t in TAMANOS])
+
+
+def umbrales_flota(tarifario, parametros=FLOTA_RUTAS, km=KM_RUTAS_RM):
+    """
+    UMBRALES_FLOTA con las tarifas FLOTA_ENV de `tarifario` (inf sin tarifa)
+    y los parámetros de rutas indicados.
+    """
+    referencias = tarifario.flota[tarifario.clase_de_tamano]
+    return np.array([_umbral_flota(r, parametros=parametros, km=km) if r >= 0 else np.inf
+                     for r in referencias.tolist()])
+
+# Tamaño de bloque para acotar la memoria intermedia (n × 4 × 4 float64)
+TAMANO_BLOQUE = 262_144
+
+
+# ── Normalización de entradas ────────────────────────────────────────────────
+def _columna(datos, nombre):
+    """Extrae una columna como ndarray desde DataFrame, tabla Arrow o dict."""
+    if hasattr(datos, "column_names"):          # pyarrow.Table
+        return datos.column(nombre).to_numpy(zero_copy_only=False)
+    return np.asarray(datos[nombre])
+
+
+def _codigos_texto(datos, nombre, dominio):
+    """
+    Códigos int8 de una columna de texto según su posición en `dominio` (-1
+    fuera de él). Las columnas categóricas de pandas y diccionario de Arrow
+    ya traen códigos: solo se traducen sus categorías, sin pasar por texto.
+    """
+    columna = datos.column(nombre) if hasattr(datos, "column_names") else datos[nombre]
+    if hasattr(columna, "cat"):
+        categorias, codigos = columna.cat.categories, columna.cat.codes.to_numpy()
+    elif hasattr(columna, "combine_chunks") and hasattr(columna.type, "index_type"):
+        columna = columna.combine_chunks()
+        categorias = columna.dictionary.to_pylist()
+        codigos = columna.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    else:
+        valores = np.char.strip(_columna(datos, nombre).astype(str))
+        resultado = np.full(len(valores), -1, dtype=np.int8)
+        for i, v in enumerate(dominio):
+            resultado[valores == v] = i
+        return resultado
+    mapa = np.array([dominio.index(c) if c in dominio else -1 for c in (str(c).strip() for c in categorias)] + [-1],
+                    dtype=np.int8)
+    return mapa[codigos]         # código -1 (nulo) toma el último: -1
+
+
+def a_booleanos(valores, nombre=""):
+    """
+    Columna de respuestas → bool: booleanos, números (≠ 0) o texto con el
+    vocabulario de nucleo.a_booleano ("Sí"/"si"/"true"/"x", "No"/"false"/"0", …).
+    Valores vacíos o desconocidos son un ValueError.
+    """
+    import pandas as pd
+
+    valores = np.asarray(valores)
+    if valores.dtype.kind == "b":
+        return valores
+    if valores.dtype.kind in "iuf":
+        if valores.dtype.kind == "f" and np.isnan(valores).any():
+            raise ValueError(f"{nombre}: hay valores vacíos")
+        return valores != 0
+    codigos, unicos = pd.factorize(pd.Series(valores, dtype=object))
+    if (codigos < 0).any():
+        raise ValueError(f"{nombre}: hay valores vacíos")
+    try:
+        mapa = np.array([a_booleano(v, nombre) for v in unicos], dtype=bool)
+    except EscenarioInvalido as e:
+        raise ValueError(str(e)) from None
+    return mapa[codigos]
+
+
+def _codigos_validos(datos, nombre, dominio, mensaje):
+    """Códigos de _codigos_texto; ValueError(`mensaje`: valores) si alguno queda fuera de `dominio`."""
+    codigos = _codigos_texto(datos, nombre, dominio)
+    if (codigos < 0).any():
+        desconocidos = sorted(set(_columna(datos, nombre)[codigos < 0].astype(str).tolist()))
+        raise ValueError(f"{mensaje}: {desconocidos}")
+    return codigos
+
+
+def codificar_escenarios(datos):
+    """
+    Convierte los escenarios a arreglos numéricos:
+      - tamano: códigos int8 según TAMANOS
+      - en_rm, tiene_bodega, alta_rotacion, foco_control_marca: bool
+      - volumen: float64
+    Tamaños o regiones desconocidos y respuestas que no son Sí/No son un
+    ValueError, como en el camino escalar (nucleo.normalizar_escenario).
+    """
+    return {
+        "tamano": _codigos_validos(datos, "tamano", TAMANOS, "Tamaños no reconocidos"),
+        "en_rm": _codigos_validos(datos, "region", REGIONES, "Regiones no reconocidas") == 0,
+        "volumen": _columna(datos, "volumen").astype(np.float64),
+        "tiene_bodega": a_booleanos(_columna(datos, "tiene_bodega"), "tiene_bodega"),
+        "alta_rotacion": a_booleanos(_columna(datos, "alta_rotacion"), "alta_rotacion"),
+        "foco_control_marca": a_booleanos(_columna(datos, "foco_control_marca"), "foco_control_marca"),
+    }
+
+
+def mascaras_reglas(cod, umbrales=UMBRALES_FLOTA):
+    """
+    Matriz booleana (n, reglas) con las condiciones de REGLAS por escenario;
+    `umbrales` son las órdenes diarias de Flota Propia por código de tamaño.
+    """
+    tamano = cod["tamano"]
+    es_pequeno = tamano <= 2            # SP, XXS, XS
+    es_mediano = (tamano == 3) | (tamano == 4)
+    es_grande = tamano >= 5
+    en_rm = cod["en_rm"]
+    sin_bodega = ~cod["tiene_bodega"]
+
+    return np.column_stack([
+        en_rm & (es_mediano | es_grande),
+        es_pequeno,
+        cod["alta_rotacion"] | sin_bodega,
+        cod["foco_control_marca"] & en_rm & (cod["volumen"] >= umbrales[tamano]),
+        cod["tiene_bodega"] & (es_pequeno | es_mediano),
+    ])
+
+
+# ── Puntaje y orden ──────────────────────────────────────────────────────────
+def puntajes_desde_mascaras(mascaras, pesos=PESOS, perfiles=PERFILES, deltas=DELTAS):
+    """
+    Puntaje compuesto (n, modalidades). Cada celda del perfil recibe a lo sumo
+    un ajuste, y la suma ponderada se evalúa en el mismo orden que la versión
+    escalar, por lo que los resultados coinciden bit a bit.
+    """
+    ajustados = perfiles + np.tensordot(mascaras.astype(perfiles.dtype), deltas, axes=1)
+    score = pesos[0] * ajustados[..., 0]
+    for k in range(1, len(CRITERIOS)):
+        score = score + pesos[k] * ajustados[..., k]
+    return score
+
+
+def ordenar(score):
+    """Índices de modalidad ordenados por puntaje descendente (orden estable)."""
+    return np.argsort(-score, axis=-1, kind="stable").astype(np.int8)
+
+
+def puntuar_lote(datos, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Puntúa todos los escenarios de `datos`.
+    Devuelve (score, orden): score float64 (n, 4) en el orden de MODALIDADES
+    y orden int8 (n, 4) con los índices de modalidad de mejor a peor.
+    """
+    mascaras = mascaras_reglas(codificar_escenarios(datos))
+    n = len(mascaras)
+    score = np.empty((n, len(MODALIDADES)))
+    for inicio in range(0, n, tamano_bloque):
+        fin = inicio + tamano_bloque
+        score[inicio:fin] = puntajes_desde_mascaras(mascaras[inicio:fin])
+    return score, ordenar(score)
+
+
+def rank_modalidades_lote(datos, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Versión por lotes de rank_modalidades. Recibe un DataFrame, tabla Arrow o
+    dict de columnas con COLUMNAS_ESCENARIO y devuelve un DataFrame con una
+    columna por posición (Primero … Cuarto) y una columna de puntaje por modalidad.
+    """
+    import pandas as pd
+
+    score, orden = puntuar_lote(datos, tamano_bloque)
+    categorias = pd.CategoricalDtype(MODALIDADES)
+    resultado = {
+        ordinal: pd.Categorical.from_codes(orden[:, i], dtype=categorias)
+        for i, ordinal in enumerate(ORDINALES)
+    }
+    for j, modalidad in enumerate(MODALIDADES):
+        resultado[f"score {modalidad}"] = score[:, j]
+    indice = datos.index if isinstance(datos, pd.DataFrame) else None
+    return pd.DataFrame(resultado, index=indice)
@@ -0,0 +1,58 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Render de fichas en un solo bloque HTML
+# render_ficha emite una docena de elementos por modalidad (títulos, tablas y
+# un st.write por viñeta). Aquí cada ficha se arma como HTML con plantillas
+# precompiladas, con las mismas clases CSS de la app, para enviarlas al
+# navegador en un único st.markdown.
+# ──────────────────────────────────────────────────────────────────────────────
+import html
+from string import Template
+
+_TITULO = Template(
+    '<div class="rank-title"><span class="rank-badge">$ordinal:</span> '
+    '<span class="rank-name">$modalidad</span></div>'
+)
+_DESCRIPCION = Template('<div class="subdesc">$texto</div>')
+_SECCION = Template('<div class="section-h3">$titulo</div>')
+_VINETA = Template("<p>• $texto</p>")
+_TABLA = Template("<table><thead><tr><th></th>$encabezados</tr></thead><tbody>$filas</tbody></table>")
+_FICHA = Template('<div class="ficha">$contenido<hr></div>')
+
+
+def texto(valor):
+    """Escapa HTML y el signo $ (evita que Markdown lo interprete como fórmula)."""
+    return html.escape(str(valor)).replace("$", "&#36;")
+
+
+def tabla_html(df):
+    """Tabla con el mismo contenido que st.table (índice incluido)."""
+    encabezados = "".join(f"<th>{texto(c)}</th>" for c in df.columns)
+    filas = "".join(
+        f"<tr><th>{texto(i)}</th>" + "".join(f"<td>{texto(v)}</td>" for v in fila) + "</tr>"
+        for i, fila in zip(df.index, df.itertuples(index=False))
+    )
+    return _TABLA.substitute(encabezados=encabezados, filas=filas)
+
+
+def ficha_html(ordinal, modalidad, descripcion, costos, beneficios, desventajas,
+               titulo_ejemplos="Ejemplos de almacenamiento y cofinanciamiento por venta"):
+    """
+    HTML de una ficha completa. `costos` es un DataFrame o, para Fulfillment,
+    la tupla (base, ejemplos) que devuelve costos_estimados.
+    """
+    partes = [
+        _TITULO.substitute(ordinal=texto(ordinal), modalidad=texto(modalidad)),
+        _DESCRIPCION.substitute(texto=texto(descripcion)),
+        _SECCION.substitute(titulo="Costos estimados"),
+    ]
+    if isinstance(costos, tuple):
+        base, ejemplos = costos
+        partes += [tabla_html(base), _SECCION.substitute(titulo=texto(titulo_ejemplos)), tabla_html(ejemplos)]
+    else:
+        partes.append(tabla_html(costos))
+    partes.append(_SECCION.substitute(titulo="Beneficios clave"))
+    partes += [_VINETA.substitute(texto=texto(b)) for b in beneficios]
+    partes.append(_SECCION.substitute(titulo="Desventajas"))
+    partes += [_VINETA.substitute(texto=texto(d)) for d in desventajas]
+    # Sin líneas en blanco: Markdown trata el bloque completo como HTML
+    return _FICHA.substitute(contenido="".join(partes))
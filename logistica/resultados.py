@@ -0,0 +1,273 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Resultados compactos para carteras de millones de sellers
+# rank_modalidades_lote y las tablas de costos están pensados para mostrar
+# (nombres de modalidad, puntajes float64, montos ya formateados). Aquí cada
+# fila son códigos int8 (tamaño, región y orden de modalidades), puntajes
+# float32 y montos en CLP enteros (int32), más las entradas del escenario que
+# no se deducen de lo anterior (volumen y un byte de banderas), para poder
+# recalcular filas sueltas (ver logistica.incremental): ~39 bytes por fila,
+# 10 millones de resultados en ~390 MB. El formato de montos (formato.clp) se
+# aplica solo al mostrar (ver Resultados.mostrar).
+# En disco son tablas Arrow con columnas diccionario: Arrow IPC sin
+# compresión (.arrow) se relee mapeando el archivo y las columnas son vistas
+# sin copia; Parquet (.parquet) ocupa menos en disco pero se decodifica al leer.
+# ──────────────────────────────────────────────────────────────────────────────
+from pathlib import Path
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .datos import FLOTA_RUTAS, KM_RUTAS_RM, MODALIDADES_PRIMERA_MILLA, UMBRAL_PRECIO_SP
+from .nucleo import COLUMNAS_ESCENARIO, MODALIDADES, OPCIONALES, ORDINALES, REGIONES
+from .ranking import (
+    DELTAS,
+    PERFILES,
+    PESOS,
+    TAMANO_BLOQUE,
+    UMBRALES_FLOTA,
+    codificar_escenarios,
+    mascaras_reglas,
+    ordenar,
+    puntajes_desde_mascaras,
+    umbrales_flota,
+)
+from .tarifas import TAMANOS, TARIFARIO
+
+# Columnas diccionario (código int8 → texto) y su dominio
+DOMINIOS = {"tamano": TAMANOS, "region": REGIONES, **{o: MODALIDADES for o in ORDINALES}}
+COLUMNAS_SCORE = tuple(f"score {m}" for m in MODALIDADES)
+COLUMNAS_CLP = ("primera_milla", "logistica_inversa")
+
+# Bits de la columna `escenario` (uint8)
+BANDERAS = ("tiene_bodega", "alta_rotacion", "foco_control_marca", "precio_alto")
+
+# Modalidades (códigos) que pagan primera milla por orden de compra
+_PAGAN_PRIMERA_MILLA = np.array([m in MODALIDADES_PRIMERA_MILLA for m in MODALIDADES])
+
+
+class Resultados:
+    """
+    Resultados de ranking como columnas NumPy de una sola dimensión:
+      tamano, region            int8, códigos de TAMANOS y REGIONES
+      Primero … Cuarto          int8, códigos de MODALIDADES de mejor a peor
+      score <modalidad>         float32
+      primera_milla             int32 CLP por orden de la modalidad recomendada
+                                (0 si no la paga), según tamaño y precio
+      logistica_inversa         int32 CLP de la clase equivalente al tamaño
+      volumen                   float64 órdenes diarias del escenario
+      escenario                 uint8, bits de BANDERAS
+    `metadatos` (textos) registra con qué tarifas y reglas se calcularon:
+    "tarifario" (Tarifario.fuente), "version" y "reglas" (pesos, perfiles y
+    deltas en JSON). Al cargar desde Arrow IPC las columnas son vistas sobre
+    el archivo mapeado.
+    """
+
+    def __init__(self, columnas, metadatos=None):
+        self.columnas = columnas
+        self.metadatos = dict(metadatos or {})
+
+    def __len__(self):
+        return len(self.columnas["tamano"])
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.columnas.values())
+
+    @property
+    def orden(self):
+        """int8 (n, 4): códigos de modalidad de mejor a peor."""
+        return np.column_stack([self.columnas[o] for o in ORDINALES])
+
+    @property
+    def score(self):
+        """float32 (n, 4) en el orden de MODALIDADES."""
+        return np.column_stack([self.columnas[c] for c in COLUMNAS_SCORE])
+
+    # Conversión
+    def a_arrow(self):
+        """pa.Table sin copiar los datos: diccionarios sobre los códigos int8."""
+        arreglos = {}
+        for nombre, valores in self.columnas.items():
+            if nombre in DOMINIOS:
+                arreglos[nombre] = pa.DictionaryArray.from_arrays(
+                    pa.array(valores, type=pa.int8()), pa.array(DOMINIOS[nombre]))
+            else:
+                arreglos[nombre] = pa.array(valores)
+        return pa.table(arreglos).replace_schema_metadata(self.metadatos)
+
+    @classmethod
+    def desde_arrow(cls, tabla):
+        """Desde una pa.Table de a_arrow(); sin copia si cada columna tiene un solo trozo."""
+        columnas = {}
+        for nombre in tabla.column_names:
+            trozos = tabla.column(nombre).chunks
+            arreglo = trozos[0] if len(trozos) == 1 else pa.concat_arrays(trozos)
+            if nombre in DOMINIOS:
+                if arreglo.dictionary.to_pylist() != list(DOMINIOS[nombre]):
+                    arreglo = arreglo.dictionary_decode().dictionary_encode()
+                    mapa = np.array([DOMINIOS[nombre].index(v) for v in arreglo.dictionary.to_pylist()],
+                                    dtype=np.int8)
+                    columnas[nombre] = mapa[arreglo.indices.to_numpy()]
+                    continue
+                arreglo = arreglo.indices
+            columnas[nombre] = arreglo.to_numpy(zero_copy_only=False)
+        metadatos = {k.decode(): v.decode() for k, v in (tabla.schema.metadata or {}).items()}
+        return cls(columnas, metadatos)
+
+    def a_pandas(self):
+        """DataFrame con columnas categóricas (los códigos no se copian a texto)."""
+        datos = {}
+        for nombre, valores in self.columnas.items():
+            if nombre in DOMINIOS:
+                datos[nombre] = pd.Categorical.from_codes(valores, categories=DOMINIOS[nombre])
+            else:
+                datos[nombre] = valores
+        return pd.DataFrame(datos)
+
+    def mostrar(self, filas=slice(0, 20)):
+        """Filas seleccionadas con nombres, puntajes redondeados y montos formateados ($1.000)."""
+        from .formato import clp
+
+        tabla = self.a_pandas().iloc[filas]
+        for c in COLUMNAS_SCORE:
+            tabla[c] = tabla[c].astype(np.float64).round(4)
+        for c in COLUMNAS_CLP:
+            tabla[c] = [clp(v) for v in tabla[c].tolist()]
+        return tabla.drop(columns=["escenario"], errors="ignore")
+
+    def escenarios(self, filas=slice(None)):
+        """Entradas codificadas (como codificar_escenarios, más precio_alto) de las filas indicadas."""
+        if "escenario" not in self.columnas:
+            raise ValueError("resultados sin columnas de escenario: vuelve a compactarlos")
+        bits = self.columnas["escenario"][filas]
+        cod = {"tamano": self.columnas["tamano"][filas], "en_rm": self.columnas["region"][filas] == 0,
+               "volumen": self.columnas["volumen"][filas]}
+        cod.update({b: (bits >> i & 1).astype(bool) for i, b in enumerate(BANDERAS)})
+        return cod
+
+    # Disco
+    def guardar(self, ruta):
+        """
+        Arrow IPC sin compresión (.arrow / .feather) o Parquet (.parquet) según
+        la extensión. Se escribe a un temporal y se reemplaza, así se puede
+        sobrescribir el archivo del que se cargaron (mapeado) estos resultados.
+        """
+        ruta = Path(ruta)
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        tabla = self.a_arrow()
+        if ruta.suffix.lower() in (".parquet", ".pq"):
+            import pyarrow.parquet as pq
+
+            pq.write_table(tabla, temporal, compression="zstd")
+        else:
+            with pa.OSFile(str(temporal), "wb") as destino, pa.ipc.new_file(destino, tabla.schema) as escritor:
+                escritor.write_table(tabla, max_chunksize=len(self) or None)
+        os.replace(temporal, ruta)
+
+
+def cargar(ruta):
+    """Resultados desde .arrow (mapeado en memoria, sin copia) o .parquet."""
+    ruta = Path(ruta)
+    if ruta.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        return Resultados.desde_arrow(pq.read_table(ruta))
+    return Resultados.desde_arrow(pa.ipc.open_file(pa.memory_map(str(ruta), "r")).read_all())
+
+
+def concatenar(partes):
+    return Resultados({c: np.concatenate([p.columnas[c] for p in partes]) for c in partes[0].columnas},
+                      partes[0].metadatos)
+
+
+# ── Construcción ─────────────────────────────────────────────────────────────
+def compactar(datos, tamano_bloque=TAMANO_BLOQUE, tarifario=TARIFARIO):
+    """
+    Resultados de `datos` (DataFrame, tabla Arrow o dict de columnas con
+    COLUMNAS_ESCENARIO y, opcionalmente, `precio`; sin precio se usa el tramo
+    bajo de la primera milla SP).
+    """
+    cod = codificar_escenarios(datos)
+    n = len(cod["tamano"])
+    precios = np.asarray(datos["precio"], dtype=np.float64) if "precio" in _nombres(datos) else np.zeros(n)
+    cod["precio_alto"] = precios >= UMBRAL_PRECIO_SP
+    return desde_codigos(cod, tamano_bloque, tarifario)
+
+
+def metadatos_calculo(tarifario=TARIFARIO):
+    """
+    Metadatos de Resultados: tarifas, reglas y parámetros (rutas de Flota
+    Propia y corte de precio) vigentes en el cálculo.
+    """
+    reglas = {"pesos": PESOS.tolist(), "perfiles": PERFILES.tolist(), "deltas": DELTAS.tolist()}
+    parametros = {"FLOTA_RUTAS": FLOTA_RUTAS, "KM_RUTAS_RM": KM_RUTAS_RM, "UMBRAL_PRECIO_SP": UMBRAL_PRECIO_SP}
+    return {"tarifario": tarifario.fuente, "version": tarifario.version, "reglas": json.dumps(reglas),
+            "parametros": json.dumps(parametros)}
+
+
+def desde_codigos(cod, tamano_bloque=TAMANO_BLOQUE, tarifario=TARIFARIO):
+    """Resultados de escenarios ya codificados (codificar_escenarios más `precio_alto`)."""
+    umbrales = UMBRALES_FLOTA if tarifario is TARIFARIO else umbrales_flota(tarifario)
+    mascaras = mascaras_reglas(cod, umbrales)
+    n = len(mascaras)
+    score = np.empty((n, len(MODALIDADES)), dtype=np.float32)
+    orden = np.empty((n, len(MODALIDADES)), dtype=np.int8)
+    for inicio in range(0, n, tamano_bloque):
+        # El orden se decide en float64 (mismos empates que rank_modalidades)
+        bloque = puntajes_desde_mascaras(mascaras[inicio:inicio + tamano_bloque])
+        orden[inicio:inicio + tamano_bloque] = ordenar(bloque)
+        score[inicio:inicio + tamano_bloque] = bloque
+
+    clase = tarifario.clase_de_tamano[cod["tamano"]]
+    primera = np.where(cod["precio_alto"], tarifario.primera_milla_alto[clase], tarifario.primera_milla_bajo[clase])
+    columnas = {"tamano": cod["tamano"], "region": (~cod["en_rm"]).astype(np.int8)}
+    columnas.update({o: np.ascontiguousarray(orden[:, i]) for i, o in enumerate(ORDINALES)})
+    columnas.update({c: np.ascontiguousarray(score[:, j]) for j, c in enumerate(COLUMNAS_SCORE)})
+    columnas["primera_milla"] = np.where(_PAGAN_PRIMERA_MILLA[orden[:, 0]], primera, 0).astype(np.int32)
+    columnas["logistica_inversa"] = tarifario.logistica_inversa(clase).astype(np.int32)
+    columnas["volumen"] = np.asarray(cod["volumen"], dtype=np.float64)
+    bits = np.zeros(n, dtype=np.uint8)
+    for i, b in enumerate(BANDERAS):
+        bits |= np.asarray(cod[b], dtype=np.uint8) << i
+    columnas["escenario"] = bits
+    return Resultados(columnas, metadatos_calculo(tarifario))
+
+
+def _nombres(datos):
+    return datos.column_names if hasattr(datos, "column_names") else list(datos.keys())
+
+
+def _bloques(ruta, tamano_bloque):
+    """Bloques de escenarios de un CSV o Parquet (COLUMNAS_ESCENARIO y precio si está)."""
+    ruta = Path(ruta)
+    buscadas = set(COLUMNAS_ESCENARIO) | {"precio"}
+    if ruta.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        columnas = [c for c in archivo.schema_arrow.names if c in buscadas]
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield _completar(lote.to_pandas())
+    else:
+        for bloque in pd.read_csv(ruta, usecols=lambda c: c in buscadas, chunksize=tamano_bloque,
+                                  dtype={"tamano": "category", "region": "category"}):
+            yield _completar(bloque)
+
+
+def _completar(bloque):
+    for columna, valor in OPCIONALES.items():
+        if columna not in bloque.columns:
+            bloque[columna] = valor
+    return bloque
+
+
+def compactar_archivo(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Resultados de un CSV o Parquet de escenarios, leído por bloques."""
+    partes = [compactar(bloque, tamano_bloque) for bloque in _bloques(ruta, tamano_bloque)]
+    if not partes:
+        raise ValueError(f"{ruta}: sin escenarios")
+    return concatenar(partes)
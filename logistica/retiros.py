@@ -0,0 +1,276 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Programación de retiros Crossdock en bodegas de sellers
+# Asigna cada seller (ubicación de bodega y paquetes del día por tamaño de
+# CROSSDOCK_SCL) a una ventana de retiro y a un camión de esa ventana:
+#   1. Greedy con heap: sellers de mayor a menor volumen; la ventana sale de
+#      un heap por carga (la menos cargada entre las permitidas) y dentro de
+#      ella se usa el camión abierto más cercano con espacio, o se abre el
+#      camión vacío más chico en que cabe. Si no cabe en ningún camión, el
+#      retiro se divide entre varios.
+#   2. Mejora local por ventana: mover o intercambiar sellers entre camiones
+#      cuando acerca cada bodega al centro de su camión, sin exceder
+#      capacidad ni paradas.
+# Cada camión recorre sus bodegas desde el CD (logistica.rutas) y el reporte
+# resume por ventana camiones, m³, utilización, paradas y km.
+# ──────────────────────────────────────────────────────────────────────────────
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from .datos import CAMIONES_RETIRO, CD_CROSSDOCK_RM, TAMANOS, VENTANAS_RETIRO, VOLUMEN_TAMANO_M3
+from .rutas import planificar, proyectar
+
+PASADAS_MEJORA = 5
+SEPARADOR_VENTANAS = "|"
+
+COLUMNAS_REPORTE = ("ventana", "sellers", "paquetes", "m3", "camiones", "camiones_disponibles",
+                    "utilizacion", "utilizacion_flota", "paradas", "km")
+
+
+def leer_sellers(ruta):
+    """CSV de sellers: latitud, longitud, una columna de paquetes por tamaño y, opcional, ventanas ('a|b')."""
+    sellers = pd.read_csv(ruta)
+    faltantes = [c for c in ("latitud", "longitud") if c not in sellers.columns]
+    if faltantes:
+        raise ValueError(f"faltan columnas: {', '.join(faltantes)}")
+    if not any(t in sellers.columns for t in TAMANOS):
+        raise ValueError(f"se requiere al menos una columna de paquetes ({', '.join(TAMANOS)})")
+    return sellers
+
+
+def _ventanas_permitidas(sellers, ventanas):
+    todas = tuple(range(len(ventanas)))
+    if "ventanas" not in sellers.columns:
+        return [todas] * len(sellers)
+    posicion = {v: i for i, v in enumerate(ventanas)}
+    permitidas = []
+    for texto in sellers["ventanas"].tolist():
+        if not isinstance(texto, str) or not texto.strip():
+            permitidas.append(todas)
+            continue
+        try:
+            permitidas.append(tuple(posicion[v.strip()] for v in texto.split(SEPARADOR_VENTANAS)))
+        except KeyError as e:
+            raise ValueError(f"ventana no reconocida: {e.args[0]!r}") from None
+    return permitidas
+
+
+class Programa:
+    """
+    Resultado de programar(): `piezas` (una fila por seller y camión, con la
+    fila del seller en la entrada, ventana, camión, paquetes, m³ y orden de
+    parada), filas de sellers sin asignar y
+    el reporte de utilización por ventana.
+    """
+
+    def __init__(self, piezas, no_asignados, ventanas, camiones, km, dispersion):
+        self.piezas = piezas
+        self.no_asignados = no_asignados
+        self.ventanas = ventanas
+        self.camiones = camiones
+        self.km = km                        # {(ventana, camión): km}
+        self.dispersion = dispersion        # km medio bodega–centro del camión (greedy, mejorado)
+
+    def reporte(self):
+        capacidad = np.array([c[1] for c in self.camiones])
+        filas = []
+        for v, nombre in enumerate(self.ventanas):
+            p = self.piezas[self.piezas["ventana"] == nombre]
+            usados = sorted(set(p["camion"]))
+            m3 = float(p["m3"].sum())
+            cap_usados = float(capacidad[usados].sum())
+            filas.append((nombre, p["fila"].nunique(), int(p["paquetes"].sum()), round(m3, 2),
+                          len(usados), len(self.camiones),
+                          round(m3 / cap_usados, 3) if cap_usados else 0.0,
+                          round(m3 / capacidad.sum(), 3), len(p),
+                          round(sum(self.km.get((v, c), 0.0) for c in usados), 1)))
+        return pd.DataFrame(filas, columns=list(COLUMNAS_REPORTE))
+
+
+def programar(sellers, ventanas=VENTANAS_RETIRO, camiones=CAMIONES_RETIRO, cd=CD_CROSSDOCK_RM,
+              pasadas=PASADAS_MEJORA):
+    """
+    Programa los retiros del día. `sellers` es un DataFrame (o dict de
+    columnas) con latitud, longitud, paquetes por tamaño (TAMANOS; las
+    columnas ausentes cuentan 0) y opcionalmente 'ventanas' permitidas.
+    `camiones` son (nombre, capacidad m³, paradas máximas) disponibles en
+    cada ventana.
+    """
+    sellers = pd.DataFrame(sellers).reset_index(drop=True)
+    paquetes = np.column_stack([sellers[t].fillna(0).to_numpy(np.int64) if t in sellers.columns
+                                else np.zeros(len(sellers), dtype=np.int64) for t in TAMANOS])
+    volumen = paquetes @ np.array([VOLUMEN_TAMANO_M3[t] for t in TAMANOS])
+    permitidas = _ventanas_permitidas(sellers, ventanas)
+    xy = proyectar(sellers[["latitud", "longitud"]].to_numpy())
+    base = proyectar([cd])[0]
+
+    estado = _Estado(len(ventanas), camiones, base)
+    piezas, no_asignados = [], []
+    for s in np.argsort(-volumen, kind="stable").tolist():
+        if volumen[s] <= 0:
+            continue
+        asignadas = estado.asignar(s, volumen[s], xy[s], permitidas[s])
+        if asignadas:
+            piezas += asignadas
+        else:
+            no_asignados.append(s)
+
+    antes = estado.dispersion(piezas, xy)
+    for v in range(len(ventanas)):
+        estado.mejorar(v, piezas, volumen, xy, pasadas)
+    despues = estado.dispersion(piezas, xy)
+
+    # Orden de parada y km por camión
+    parada = {}
+    km = {}
+    por_camion = {}
+    for i, (s, v, c, _) in enumerate(piezas):
+        por_camion.setdefault((v, c), []).append(i)
+    for (v, c), indices in por_camion.items():
+        bodegas = [piezas[i][0] for i in indices]
+        plan = planificar(sellers.loc[bodegas, ["latitud", "longitud"]].to_numpy(), 1, cd)
+        km[(v, c)] = plan.km[0]
+        for orden, k in enumerate(plan.rutas[0].tolist(), start=1):
+            parada[indices[k]] = orden
+
+    filas = []
+    for i, (s, v, c, m3) in enumerate(piezas):
+        fraccion = m3 / volumen[s]
+        filas.append((s, ventanas[v], c, camiones[c][0], int(round(paquetes[s].sum() * fraccion)),
+                      round(m3, 4), parada[i]))
+    tabla = pd.DataFrame(filas, columns=["fila", "ventana", "camion", "tipo_camion", "paquetes", "m3", "parada"])
+    return Programa(tabla, no_asignados, tuple(ventanas), tuple(camiones), km, (antes, despues))
+
+
+class _Estado:
+    """Capacidad libre, paradas y centro de cada (ventana, camión), más el heap de ventanas por carga."""
+
+    def __init__(self, n_ventanas, camiones, base):
+        self.capacidad = np.array([c[1] for c in camiones], dtype=np.float64)
+        self.paradas_max = np.array([c[2] for c in camiones], dtype=np.int64)
+        self.libre = np.tile(self.capacidad, (n_ventanas, 1))
+        self.paradas = np.zeros((n_ventanas, len(camiones)), dtype=np.int64)
+        self.suma_xy = np.zeros((n_ventanas, len(camiones), 2))
+        self.base = base
+        self.carga = np.zeros(n_ventanas)
+        self.heap = [(0.0, v) for v in range(n_ventanas)]
+
+    def _centros(self, v):
+        abiertos = self.paradas[v] > 0
+        centros = np.tile(self.base, (len(self.capacidad), 1))
+        centros[abiertos] = self.suma_xy[v][abiertos] / self.paradas[v][abiertos, None]
+        return centros
+
+    def _cabe(self, v, m3):
+        disponibles = self.paradas[v] < self.paradas_max
+        return self.libre[v][disponibles].sum() >= m3
+
+    def _sumar(self, v, c, m3, punto, signo=1):
+        self.libre[v, c] -= signo * m3
+        self.paradas[v, c] += signo
+        self.suma_xy[v, c] += signo * punto
+
+    def asignar(self, s, m3, punto, permitidas):
+        """Piezas (seller, ventana, camión, m³) del retiro de `s`; [] si no cabe en ninguna ventana."""
+        apartadas, elegida = [], None
+        while self.heap:
+            carga, v = heapq.heappop(self.heap)
+            if carga != self.carga[v]:
+                continue                                  # entrada vieja: hay otra más nueva
+            if v in permitidas and self._cabe(v, m3):
+                elegida = v
+                break
+            apartadas.append((carga, v))
+        for entrada in apartadas:
+            heapq.heappush(self.heap, entrada)
+        if elegida is None:
+            return []
+
+        v = elegida
+        disponibles = self.paradas[v] < self.paradas_max
+        abiertos = disponibles & (self.paradas[v] > 0) & (self.libre[v] >= m3)
+        vacios = disponibles & (self.paradas[v] == 0) & (self.libre[v] >= m3)
+        if abiertos.any():
+            distancia = np.hypot(*(self._centros(v) - punto).T)
+            camiones = [int(np.argmin(np.where(abiertos, distancia, np.inf)))]
+        elif vacios.any():
+            camiones = [int(np.argmin(np.where(vacios, self.capacidad, np.inf)))]
+        else:
+            # Retiro más grande que cualquier camión libre: se reparte de mayor a menor espacio
+            camiones = np.argsort(-np.where(disponibles, self.libre[v], -np.inf), kind="stable").tolist()
+
+        piezas, pendiente = [], m3
+        for c in camiones:
+            parte = min(pendiente, self.libre[v, c])
+            self._sumar(v, c, parte, punto)
+            piezas.append((s, v, c, parte))
+            pendiente -= parte
+            if pendiente <= 1e-12:
+                break
+        self.carga[v] += m3 / self.capacidad.sum()
+        heapq.heappush(self.heap, (self.carga[v], v))
+        return piezas
+
+    def mejorar(self, v, piezas, volumen, xy, pasadas):
+        """Mueve o intercambia sellers enteros entre camiones abiertos de la ventana `v`."""
+        enteros = [i for i, (s, w, c, m3) in enumerate(piezas) if w == v and m3 == volumen[s]]
+        miembros = {}
+        for i in enteros:
+            miembros.setdefault(piezas[i][2], set()).add(i)
+        for _ in range(pasadas):
+            mejoro = False
+            for i in enteros:
+                s, _, c, m3 = piezas[i]
+                punto = xy[s]
+                centros = self._centros(v)
+                distancia = np.hypot(*(centros - punto).T)
+                abiertos = self.paradas[v] > 0
+                abiertos[c] = False
+                if not abiertos.any():
+                    break
+                candidatos = abiertos & (self.paradas[v] < self.paradas_max) & (self.libre[v] >= m3)
+                ganancia = np.where(candidatos, distancia[c] - distancia, -np.inf)
+                destino = int(np.argmax(ganancia))
+                if ganancia[destino] > 1e-9:
+                    self._sumar(v, c, m3, punto, -1)
+                    self._sumar(v, destino, m3, punto)
+                    piezas[i] = (s, v, destino, m3)
+                    miembros[c].discard(i)
+                    miembros.setdefault(destino, set()).add(i)
+                    mejoro = True
+                    continue
+
+                # Intercambio con el seller del camión más cercano que más se acerque al nuestro
+                destino = int(np.argmin(np.where(abiertos, distancia, np.inf)))
+                mejor, mejor_ganancia = None, 1e-9
+                for j in miembros.get(destino, ()):
+                    u, _, _, mu = piezas[j]
+                    if self.libre[v, c] + m3 < mu or self.libre[v, destino] + mu < m3:
+                        continue
+                    g = (distancia[c] + np.hypot(*(centros[destino] - xy[u]))
+                         - distancia[destino] - np.hypot(*(centros[c] - xy[u])))
+                    if g > mejor_ganancia:
+                        mejor, mejor_ganancia = j, g
+                if mejor is not None:
+                    u, _, _, mu = piezas[mejor]
+                    self._sumar(v, c, m3, punto, -1)
+                    self._sumar(v, destino, mu, xy[u], -1)
+                    self._sumar(v, destino, m3, punto)
+                    self._sumar(v, c, mu, xy[u])
+                    piezas[i] = (s, v, destino, m3)
+                    piezas[mejor] = (u, v, c, mu)
+                    miembros[c].discard(i)
+                    miembros[c].add(mejor)
+                    miembros[destino].discard(mejor)
+                    miembros[destino].add(i)
+                    mejoro = True
+            if not mejoro:
+                break
+
+    def dispersion(self, piezas, xy):
+        """Distancia media (km en línea recta) de cada bodega al centro de su camión."""
+        if not piezas:
+            return 0.0
+        centros = {v: self._centros(v) for v in {w for _, w, _, _ in piezas}}
+        return float(np.mean([np.hypot(*(centros[v][c] - xy[s])) for s, v, c, _ in piezas]))
@@ -0,0 +1,273 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Costo de rutas de Flota Propia en la Región Metropolitana
+# A partir de las coordenadas de las entregas de un día y de la cantidad de
+# vehículos, reparte las paradas por barrido angular desde la bodega, arma
+# cada ruta por vecino más cercano (árbol KD con bajas) y la mejora con 2-opt
+# vectorizado. El costo del día = costo fijo por vehículo + km recorridos.
+#
+# calibrar() ajusta sobre días simulados el modelo continuo de distancia
+# (km ≈ por_ruta·rutas + por_raiz_entrega·√entregas) que usa el núcleo en
+# Python puro para puntuar Flota Propia sin correr el ruteo.
+# ──────────────────────────────────────────────────────────────────────────────
+import math
+
+import numpy as np
+
+from .datos import DEPOSITO_RM, FLOTA_RUTAS
+
+# Proyección equirectangular centrada en Santiago (error < 0,5 % dentro de la RM)
+LATITUD_REFERENCIA = -33.45
+KM_POR_GRADO_LATITUD = 110.57
+KM_POR_GRADO_LONGITUD = 111.32 * math.cos(math.radians(LATITUD_REFERENCIA))
+
+# Caja de la zona urbana de reparto (lat_min, lat_max, lon_min, lon_max)
+CAJA_RM = (-33.65, -33.30, -70.85, -70.50)
+
+HOJA_KD = 16
+PASADAS_2OPT = 4
+
+
+def proyectar(coordenadas):
+    """(n, 2) de (latitud, longitud) en grados → (n, 2) de (x, y) en km."""
+    c = np.asarray(coordenadas, dtype=np.float64).reshape(-1, 2)
+    return np.column_stack([c[:, 1] * KM_POR_GRADO_LONGITUD,
+                            (c[:, 0] - LATITUD_REFERENCIA) * KM_POR_GRADO_LATITUD])
+
+
+# ── Árbol KD ─────────────────────────────────────────────────────────────────
+class ArbolKD:
+    """
+    Árbol KD en arreglos para puntos en el plano, con hojas de hasta `hoja`
+    puntos. Admite bajas (quitar) para construir rutas por vecino más
+    cercano: cada nodo cuenta sus puntos vivos y se poda al llegar a cero.
+    """
+
+    def __init__(self, puntos, hoja=HOJA_KD):
+        puntos = np.asarray(puntos, dtype=np.float64)
+        orden = np.arange(len(puntos))
+        inicio, fin, hijos, padre = [], [], [], []
+        pendientes = [(0, len(puntos), -1)]
+        while pendientes:
+            a, b, p = pendientes.pop()
+            nodo = len(inicio)
+            inicio.append(a)
+            fin.append(b)
+            hijos.append(None)
+            padre.append(p)
+            if p >= 0:
+                hijos[p] = (hijos[p] or ()) + (nodo,)
+            if b - a > hoja:
+                tramo = puntos[orden[a:b]]
+                eje = int(np.argmax(tramo.max(axis=0) - tramo.min(axis=0)))
+                medio = (b - a) // 2
+                orden[a:b] = orden[a:b][np.argpartition(tramo[:, eje], medio)]
+                pendientes.append((a + medio, b, nodo))
+                pendientes.append((a, a + medio, nodo))
+
+        self.puntos = puntos
+        self.orden = orden                                   # posición en el árbol → punto
+        self._xy = puntos[orden]
+        self._inicio = inicio
+        self._fin = fin
+        self._hijos = hijos
+        self._padre = padre
+        self._minimo = [self._xy[a:b].min(axis=0).tolist() if b > a else [0.0, 0.0]
+                        for a, b in zip(inicio, fin)]
+        self._maximo = [self._xy[a:b].max(axis=0).tolist() if b > a else [0.0, 0.0]
+                        for a, b in zip(inicio, fin)]
+        self._vivos = [b - a for a, b in zip(inicio, fin)]
+        self._activo = np.ones(len(puntos), dtype=bool)
+        self._hoja_de = np.empty(len(puntos), dtype=np.int64)
+        self._posicion = np.empty(len(puntos), dtype=np.int64)
+        self._posicion[orden] = np.arange(len(puntos))
+        for nodo, h in enumerate(hijos):
+            if h is None:
+                self._hoja_de[orden[inicio[nodo]:fin[nodo]]] = nodo
+
+    def __len__(self):
+        return self._vivos[0] if self._vivos else 0
+
+    def quitar(self, i):
+        """Da de baja el punto i (índice original)."""
+        pos = self._posicion[i]
+        if not self._activo[pos]:
+            return
+        self._activo[pos] = False
+        nodo = int(self._hoja_de[i])
+        while nodo >= 0:
+            self._vivos[nodo] -= 1
+            nodo = self._padre[nodo]
+
+    def _distancia_caja(self, nodo, x, y):
+        (x0, y0), (x1, y1) = self._minimo[nodo], self._maximo[nodo]
+        dx = x0 - x if x < x0 else (x - x1 if x > x1 else 0.0)
+        dy = y0 - y if y < y0 else (y - y1 if y > y1 else 0.0)
+        return dx * dx + dy * dy
+
+    def mas_cercano(self, x, y):
+        """(índice, distancia) del punto vivo más cercano a (x, y); (-1, inf) si no quedan."""
+        mejor, mejor_d2 = -1, math.inf
+        pila = [(0.0, 0)] if len(self) else []
+        while pila:
+            d2_caja, nodo = pila.pop()
+            if d2_caja >= mejor_d2 or not self._vivos[nodo]:
+                continue
+            hijos = self._hijos[nodo]
+            if hijos is None:
+                a, b = self._inicio[nodo], self._fin[nodo]
+                vivos = np.flatnonzero(self._activo[a:b])
+                d2 = ((self._xy[a:b][vivos] - (x, y)) ** 2).sum(axis=1)
+                k = int(np.argmin(d2))
+                if d2[k] < mejor_d2:
+                    mejor, mejor_d2 = int(self.orden[a + vivos[k]]), float(d2[k])
+            else:
+                # Se apila primero el hijo lejano para visitar antes el cercano
+                pila += sorted(((self._distancia_caja(h, x, y), h) for h in hijos), reverse=True)
+        return mejor, math.sqrt(mejor_d2)
+
+
+# ── Ruteo ────────────────────────────────────────────────────────────────────
+def agrupar(xy, deposito, vehiculos):
+    """
+    Barrido angular: ordena las paradas por ángulo alrededor de la bodega
+    (partiendo del mayor hueco angular) y las corta en `vehiculos` grupos de
+    igual cantidad. Devuelve una lista de arreglos de índices.
+    """
+    if not len(xy):
+        return []
+    angulos = np.arctan2(xy[:, 1] - deposito[1], xy[:, 0] - deposito[0])
+    orden = np.argsort(angulos, kind="stable")
+    huecos = np.diff(np.concatenate([angulos[orden], angulos[orden[:1]] + 2 * np.pi]))
+    orden = np.roll(orden, -(int(np.argmax(huecos)) + 1))
+    return [g for g in np.array_split(orden, max(1, min(vehiculos, len(xy)))) if len(g)]
+
+
+def _largo(ruta):
+    return float(np.sqrt((np.diff(ruta, axis=0) ** 2).sum(axis=1)).sum())
+
+
+def vecino_mas_cercano(xy, deposito):
+    """Orden de visita por vecino más cercano desde la bodega."""
+    arbol = ArbolKD(xy)
+    x, y = deposito
+    orden = []
+    while len(arbol):
+        i, _ = arbol.mas_cercano(x, y)
+        arbol.quitar(i)
+        orden.append(i)
+        x, y = xy[i]
+    return np.array(orden, dtype=np.int64)
+
+
+def dos_opt(circuito, pasadas=PASADAS_2OPT):
+    """
+    Mejora 2-opt de un circuito cerrado (primera y última fila = bodega).
+    Para cada arista se evalúan en bloque todas las inversiones posibles y
+    se aplica la de mayor ahorro. Devuelve (circuito, permutación de filas).
+    """
+    circuito = circuito.copy()
+    n = len(circuito)
+    filas = np.arange(n)
+    for _ in range(pasadas):
+        mejoro = False
+        for i in range(1, n - 2):
+            a, b = circuito[i - 1], circuito[i]
+            c, d = circuito[i + 1:n - 1], circuito[i + 2:n]
+            ahorro = (np.hypot(*(a - b)) + np.hypot(*(c - d).T)
+                      - np.hypot(*(a - c).T) - np.hypot(*(b - d).T))
+            j = int(np.argmax(ahorro))
+            if ahorro[j] > 1e-9:
+                circuito[i:i + j + 2] = circuito[i:i + j + 2][::-1]
+                filas[i:i + j + 2] = filas[i:i + j + 2][::-1]
+                mejoro = True
+        if not mejoro:
+            break
+    return circuito, filas
+
+
+class PlanRutas:
+    """Rutas de un día: índices de parada por vehículo, km y horas por ruta, costos."""
+
+    def __init__(self, rutas, km, horas, vehiculos, parametros):
+        self.rutas = rutas
+        self.km = km
+        self.horas = horas
+        self.vehiculos = vehiculos
+        self.entregas = sum(len(r) for r in rutas)
+        self.costo_total = vehiculos * parametros["costo_vehiculo_dia"] + parametros["costo_km"] * sum(km)
+        self.excedidas = sum(h > parametros["horas_jornada"] for h in horas)
+
+    @property
+    def costo_por_entrega(self):
+        return self.costo_total / self.entregas if self.entregas else math.inf
+
+    def resumen(self):
+        return {
+            "entregas": self.entregas,
+            "vehiculos": self.vehiculos,
+            "km": round(sum(self.km), 1),
+            "horas_max": round(max(self.horas, default=0.0), 2),
+            "rutas_sobre_jornada": self.excedidas,
+            "costo_total": round(self.costo_total),
+            "costo_por_entrega": round(self.costo_por_entrega),
+        }
+
+
+def planificar(coordenadas, vehiculos, deposito=DEPOSITO_RM, parametros=FLOTA_RUTAS):
+    """
+    Rutas del día para las entregas en `coordenadas` ((n, 2) latitud,
+    longitud) con `vehiculos` vehículos que salen y vuelven a `deposito`.
+    Todos los vehículos pagan su costo fijo del día aunque salgan vacíos.
+    """
+    if vehiculos < 1:
+        raise ValueError("vehiculos debe ser al menos 1")
+    xy = proyectar(coordenadas)
+    base = proyectar([deposito])[0]
+    rutas, km, horas = [], [], []
+    for grupo in agrupar(xy, base, vehiculos):
+        visita = grupo[vecino_mas_cercano(xy[grupo], base)]
+        circuito, filas = dos_opt(np.vstack([base, xy[visita], base]))
+        visita = visita[filas[1:-1] - 1]
+        largo = _largo(circuito) * parametros["factor_circuito"]
+        rutas.append(visita)
+        km.append(largo)
+        horas.append(largo / parametros["velocidad_kmh"] + len(visita) * parametros["minutos_parada"] / 60)
+    return PlanRutas(rutas, km, horas, vehiculos, parametros)
+
+
+def vehiculos_necesarios(entregas, parametros=FLOTA_RUTAS):
+    return max(1, math.ceil(entregas / parametros["entregas_max_vehiculo"]))
+
+
+# ── Calibración del modelo continuo ──────────────────────────────────────────
+def demanda_sintetica(entregas, semilla=0, caja=CAJA_RM):
+    """
+    Entregas de un día simuladas: normal alrededor del centro de Santiago
+    (σ ≈ 9 km) recortada a la zona urbana de reparto.
+    """
+    rng = np.random.default_rng(semilla)
+    lat_min, lat_max, lon_min, lon_max = caja
+    lat = np.clip(rng.normal(LATITUD_REFERENCIA, 9 / KM_POR_GRADO_LATITUD, entregas), lat_min, lat_max)
+    lon = np.clip(rng.normal(-70.65, 9 / KM_POR_GRADO_LONGITUD, entregas), lon_min, lon_max)
+    return np.column_stack([lat, lon])
+
+
+VOLUMENES_CALIBRACION = (5, 10, 20, 30, 45, 60, 90, 120, 180, 240, 360, 480)
+
+
+def calibrar(volumenes=VOLUMENES_CALIBRACION, dias=3, parametros=FLOTA_RUTAS):
+    """
+    Ajusta km ≈ por_ruta·rutas + por_raiz_entrega·√entregas por mínimos
+    cuadrados sobre `dias` días simulados por volumen. Devuelve
+    (coeficientes, filas de la simulación).
+    """
+    filas = []
+    for v in volumenes:
+        for semilla in range(dias):
+            vehiculos = vehiculos_necesarios(v, parametros)
+            plan = planificar(demanda_sintetica(v, semilla), vehiculos, parametros=parametros)
+            filas.append({"volumen": v, "dia": semilla, **plan.resumen()})
+    x = np.array([[f["vehiculos"], math.sqrt(f["entregas"])] for f in filas])
+    y = np.array([f["km"] for f in filas])
+    (por_ruta, por_raiz), *_ = np.linalg.lstsq(x, y, rcond=None)
+    return {"por_ruta": round(float(por_ruta), 2), "por_raiz_entrega": round(float(por_raiz), 2)}, filas
@@ -0,0 +1,107 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Sensibilidad Monte Carlo del ranking v6
+# Perturba los pesos globales, los perfiles base y los ajustes por contexto de
+# rank_modalidades, puntúa cada muestra contra todos los escenarios en lotes
+# vectorizados y cuenta con qué frecuencia cada modalidad queda primera.
+# Las muestras se reparten en un ProcessPoolExecutor (una semilla independiente
+# por tarea), así el trabajo escala con la cantidad de núcleos.
+# ──────────────────────────────────────────────────────────────────────────────
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .ranking import DELTAS, MODALIDADES, PERFILES, PESOS, codificar_escenarios, mascaras_reglas
+from .tabla_decision import tabla_rank_v6
+
+TAMANO_LOTE = 4096
+
+# Perturbaciones por defecto
+SIGMA_PESOS = 0.20       # ruido log-normal relativo sobre cada peso (luego se renormaliza)
+SIGMA_PERFILES = 0.05    # ruido normal absoluto sobre cada celda del perfil base
+ESCALA_DELTAS = 0.50     # cada ajuste se multiplica por U(1 - escala, 1 + escala)
+
+
+def muestrear(rng, n, sigma_pesos=SIGMA_PESOS, sigma_perfiles=SIGMA_PERFILES,
+              escala_deltas=ESCALA_DELTAS):
+    """n vectores perturbados: pesos (n, 4), perfiles (n, 4, 4), deltas (n, reglas, 4, 4)."""
+    pesos = PESOS * rng.lognormal(0.0, sigma_pesos, size=(n, PESOS.size))
+    pesos /= pesos.sum(axis=1, keepdims=True)
+    perfiles = PERFILES + rng.normal(0.0, sigma_perfiles, size=(n,) + PERFILES.shape)
+    factores = rng.uniform(1 - escala_deltas, 1 + escala_deltas, size=(n, DELTAS.shape[0], 1, 1))
+    return pesos, perfiles, DELTAS * factores
+
+
+def ganadores(mascaras, pesos, perfiles, deltas):
+    """Índice de la modalidad primera para cada (muestra, escenario): (n_muestras, n_escenarios)."""
+    m = mascaras.astype(np.float64)
+    ajustados = perfiles[:, None] + np.einsum("er,srmc->semc", m, deltas)
+    score = np.einsum("semc,sc->sem", ajustados, pesos)
+    return score.argmax(axis=-1)
+
+
+def _contar(args):
+    """Tarea de un proceso: cuenta primeros lugares (escenarios × modalidades)."""
+    mascaras, n, semilla, tamano_lote, perturbacion = args
+    rng = np.random.default_rng(semilla)
+    n_mod = len(MODALIDADES)
+    conteo = np.zeros((len(mascaras), n_mod), dtype=np.int64)
+    columnas = np.arange(len(mascaras)) * n_mod
+    for inicio in range(0, n, tamano_lote):
+        k = min(tamano_lote, n - inicio)
+        primeros = ganadores(mascaras, *muestrear(rng, k, **perturbacion))
+        conteo += np.bincount((columnas + primeros).ravel(),
+                              minlength=conteo.size).reshape(conteo.shape)
+    return conteo
+
+
+def sensibilidad(escenarios=None, n_muestras=200_000, procesos=None, semilla=0,
+                 tamano_lote=TAMANO_LOTE, **perturbacion):
+    """
+    Frecuencia con que cada modalidad queda primera bajo pesos y perfiles
+    perturbados.
+
+    escenarios: DataFrame / dict de columnas con las entradas de rank_modalidades
+    (por defecto, todas las combinaciones del formulario v6, que se incluyen en
+    el resultado). Solo importa qué ajustes se activan, así que se puntúan los
+    patrones distintos y luego se expanden a cada fila. `perturbacion` acepta
+    sigma_pesos, sigma_perfiles y escala_deltas.
+
+    Devuelve un DataFrame con una fila por escenario: la modalidad primera con
+    los parámetros actuales, la frecuencia de cada modalidad en primer lugar y
+    la estabilidad (frecuencia de la primera actual).
+    """
+    if n_muestras < 1:
+        raise ValueError("n_muestras debe ser al menos 1")
+    por_defecto = escenarios is None
+    if por_defecto:
+        escenarios = pd.DataFrame(tabla_rank_v6().rejilla())
+    mascaras = mascaras_reglas(codificar_escenarios(escenarios))
+    patrones, inversa = np.unique(mascaras, axis=0, return_inverse=True)
+    inversa = inversa.reshape(-1)
+
+    procesos = procesos or os.cpu_count() or 1
+    # Una tarea por lote: reparte bien la carga y el resultado no depende de
+    # la cantidad de procesos (cada lote tiene su propia semilla derivada).
+    tamanos = [min(tamano_lote, n_muestras - i) for i in range(0, n_muestras, tamano_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(patrones, k, s, tamano_lote, perturbacion) for k, s in zip(tamanos, semillas)]
+
+    if procesos == 1:
+        conteos = map(_contar, tareas)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            conteos = list(pool.map(_contar, tareas, chunksize=max(1, len(tareas) // (procesos * 4))))
+    conteo = sum(conteos)
+
+    frecuencia = (conteo / n_muestras)[inversa]
+    actual = ganadores(patrones, PESOS[None], PERFILES[None], DELTAS[None])[0][inversa]
+
+    resultado = pd.DataFrame(
+        frecuencia, columns=[f"primero {m}" for m in MODALIDADES],
+        index=escenarios.index if isinstance(escenarios, pd.DataFrame) else None,
+    )
+    resultado.insert(0, "primero actual", pd.Categorical.from_codes(actual, categories=MODALIDADES))
+    resultado.insert(1, "estabilidad", frecuencia[np.arange(len(actual)), actual])
+    return escenarios.join(resultado) if por_defecto else resultado
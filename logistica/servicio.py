@@ -0,0 +1,248 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Servicio HTTP local de cotización (asyncio, sin dependencias)
+#   python -m logistica servir --puerto 8765
+#
+#   GET  /salud           estado y cantidad de resultados precalculados
+#   POST /cotizar         un escenario  → ranking (+ costos si trae clase/precio)
+#   POST /cotizar/lote    {"escenarios": [...]} → respuesta JSON por trozos
+#
+# El puntaje solo depende de condiciones discretas del escenario (el volumen
+# importa por el umbral de Flota Propia), así que todos los rankings y tablas
+# de costos posibles se serializan a JSON al iniciar; cada cotización arma la
+# respuesta concatenando fragmentos ya listos.
+# ──────────────────────────────────────────────────────────────────────────────
+import asyncio
+import itertools
+import json
+import sys
+
+from . import nucleo
+from .datos import CLASES, UMBRAL_PRECIO_SP
+
+MAX_CUERPO = 64 * 1024 * 1024     # bytes por petición
+ESCENARIOS_POR_TROZO = 256        # resultados por trozo en /cotizar/lote
+
+_ESTADOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+
+
+# ── Resultados precalculados ─────────────────────────────────────────────────
+# Un volumen por tramo entre los umbrales de Flota Propia de todos los tamaños
+VOLUMENES_REPRESENTATIVOS = (0,) + tuple(sorted({u for u in nucleo.UMBRALES_VOLUMEN_FLOTA.values()
+                                                  if u != float("inf")}))
+
+def clave_ranking(escenario):
+    """Condiciones de un escenario normalizado que determinan su ranking."""
+    tamano, region, volumen, tiene_bodega, alta_rotacion, _, foco_control_marca = escenario
+    return (tamano, region, nucleo.flota_rentable(tamano, region, volumen), tiene_bodega,
+            alta_rotacion, foco_control_marca)
+
+
+def precalcular_rankings():
+    """{clave_ranking: fragmento JSON '"recomendada":…,"ranking":[…]'} para todo el dominio."""
+    fragmentos = {}
+    for tamano, region, volumen, bodega, rotacion, foco in itertools.product(
+            nucleo.TAMANOS, nucleo.REGIONES, VOLUMENES_REPRESENTATIVOS, ("Sí", "No"),
+            (False, True), (False, True)):
+        escenario = (tamano, region, volumen, bodega, rotacion, False, foco)
+        ranking = nucleo.rank_modalidades(*escenario)
+        fragmentos[clave_ranking(escenario)] = (
+            '"recomendada":' + _json(ranking[0][0]) + ',"ranking":'
+            + _json([{"modalidad": m, "score": s} for m, s in ranking])
+        )
+    return fragmentos
+
+
+def precalcular_costos():
+    """{(clase, sobre_umbral): fragmento JSON '"costos":{modalidad: …}'}."""
+    fragmentos = {}
+    for clase, alto in itertools.product(CLASES, (False, True)):
+        precio = UMBRAL_PRECIO_SP if alto else 0
+        costos = {m: nucleo.costos_por_orden(m, clase, precio) for m in nucleo.MODALIDADES}
+        fragmentos[(clase, alto)] = '"costos":' + _json(costos)
+    return fragmentos
+
+
+RANKINGS = precalcular_rankings()
+COSTOS = precalcular_costos()
+
+
+def cotizar(datos):
+    """Escenario JSON (dict) → objeto JSON serializado. Lanza EscenarioInvalido."""
+    if not isinstance(datos, dict):
+        raise nucleo.EscenarioInvalido("cada escenario debe ser un objeto JSON")
+    partes = [RANKINGS[clave_ranking(nucleo.normalizar_escenario(datos))]]
+    if "clase" in datos:
+        clase = datos["clase"]
+        if clase not in CLASES:
+            raise nucleo.EscenarioInvalido(f"clase no reconocida {clase!r}")
+        try:
+            precio = float(datos.get("precio", 0))
+        except (TypeError, ValueError):
+            raise nucleo.EscenarioInvalido(f"precio={datos['precio']!r} no es numérico") from None
+        partes.append(COSTOS[(clase, precio >= UMBRAL_PRECIO_SP)])
+    return "{" + ",".join(partes) + "}"
+
+
+def cotizar_lote(escenarios):
+    """Genera los resultados del lote ya serializados; los inválidos llevan su error."""
+    for i, datos in enumerate(escenarios):
+        try:
+            yield cotizar(datos)
+        except nucleo.EscenarioInvalido as e:
+            yield _json({"indice": i, "error": str(e)})
+
+
+# ── HTTP/1.1 mínimo sobre asyncio ────────────────────────────────────────────
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+async def leer_peticion(lector):
+    """(método, ruta, encabezados, cuerpo) o None si el cliente cerró la conexión."""
+    linea = await lector.readline()
+    if not linea.strip():
+        return None
+    try:
+        metodo, ruta, _ = linea.decode("latin-1").split()
+    except ValueError:
+        raise ErrorHTTP(400, "línea de petición inválida") from None
+    encabezados = {}
+    while True:
+        linea = await lector.readline()
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        encabezados[nombre.strip().lower()] = valor.strip()
+
+    if "chunked" in encabezados.get("transfer-encoding", ""):
+        raise ErrorHTTP(411, "se requiere Content-Length")
+    try:
+        largo = int(encabezados.get("content-length", 0))
+    except ValueError:
+        raise ErrorHTTP(400, "Content-Length inválido") from None
+    if largo > MAX_CUERPO:
+        raise ErrorHTTP(413, f"cuerpo sobre {MAX_CUERPO} bytes")
+    cuerpo = await lector.readexactly(largo) if largo else b""
+    return metodo, ruta.split("?", 1)[0], encabezados, cuerpo
+
+
+def _cabecera(estado, extra):
+    lineas = [f"HTTP/1.1 {estado} {_ESTADOS.get(estado, '')}",
+              "Content-Type: application/json; charset=utf-8"] + extra
+    return ("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1")
+
+
+async def responder(escritor, estado, cuerpo, mantener=True):
+    datos = cuerpo.encode("utf-8")
+    escritor.write(_cabecera(estado, [f"Content-Length: {len(datos)}",
+                                      "Connection: " + ("keep-alive" if mantener else "close")]))
+    escritor.write(datos)
+    await escritor.drain()
+
+
+async def responder_por_trozos(escritor, trozos, mantener=True):
+    """Transfer-Encoding: chunked; cada trozo se envía apenas está listo."""
+    escritor.write(_cabecera(200, ["Transfer-Encoding: chunked",
+                                   "Connection: " + ("keep-alive" if mantener else "close")]))
+    for trozo in trozos:
+        datos = trozo.encode("utf-8")
+        if datos:
+            escritor.write(b"%x\r\n%s\r\n" % (len(datos), datos))
+            await escritor.drain()
+    escritor.write(b"0\r\n\r\n")
+    await escritor.drain()
+
+
+def _trozos_lote(resultados):
+    yield '{"resultados":['
+    primero = True
+    while True:
+        bloque = list(itertools.islice(resultados, ESCENARIOS_POR_TROZO))
+        if not bloque:
+            break
+        yield ("" if primero else ",") + ",".join(bloque)
+        primero = False
+    yield "]}"
+
+
+def _cuerpo_json(cuerpo):
+    try:
+        return json.loads(cuerpo)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ErrorHTTP(400, f"JSON inválido: {e}") from None
+
+
+async def despachar(metodo, ruta, cuerpo, escritor, mantener):
+    if ruta == "/salud":
+        if metodo != "GET":
+            raise ErrorHTTP(405, "use GET")
+        await responder(escritor, 200, _json({"estado": "ok", "rankings_precalculados": len(RANKINGS),
+                                              "costos_precalculados": len(COSTOS)}), mantener)
+    elif ruta == "/cotizar":
+        if metodo != "POST":
+            raise ErrorHTTP(405, "use POST")
+        try:
+            respuesta = cotizar(_cuerpo_json(cuerpo))
+        except nucleo.EscenarioInvalido as e:
+            raise ErrorHTTP(400, str(e)) from None
+        await responder(escritor, 200, respuesta, mantener)
+    elif ruta == "/cotizar/lote":
+        if metodo != "POST":
+            raise ErrorHTTP(405, "use POST")
+        datos = _cuerpo_json(cuerpo)
+        escenarios = datos.get("escenarios") if isinstance(datos, dict) else datos
+        if not isinstance(escenarios, list):
+            raise ErrorHTTP(400, 'se espera {"escenarios": [...]} o una lista')
+        await responder_por_trozos(escritor, _trozos_lote(cotizar_lote(escenarios)), mantener)
+    else:
+        raise ErrorHTTP(404, f"ruta desconocida {ruta}")
+
+
+async def atender(lector, escritor):
+    """Una conexión: peticiones en serie mientras el cliente la mantenga abierta."""
+    try:
+        while True:
+            try:
+                peticion = await leer_peticion(lector)
+                if peticion is None:
+                    break
+                metodo, ruta, encabezados, cuerpo = peticion
+                mantener = encabezados.get("connection", "").lower() != "close"
+                await despachar(metodo, ruta, cuerpo, escritor, mantener)
+            except ErrorHTTP as e:
+                await responder(escritor, e.estado, _json({"error": str(e)}), mantener=False)
+                break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                raise
+            except Exception as e:
+                await responder(escritor, 500, _json({"error": repr(e)}), mantener=False)
+                break
+            if not mantener:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        escritor.close()
+
+
+async def servir(host="127.0.0.1", puerto=8765):
+    servidor = await asyncio.start_server(atender, host, puerto)
+    direccion = servidor.sockets[0].getsockname()
+    print(f"Escuchando en http://{direccion[0]}:{direccion[1]}", file=sys.stderr, flush=True)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(host="127.0.0.1", puerto=8765):
+    try:
+        asyncio.run(servir(host, puerto))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,178 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Tablas de decisión precalculadas
+# El espacio de entradas de los recomendadores es finito y pequeño: se
+# enumera una sola vez cada combinación, se guarda el resultado en una tabla
+# indexada (índice mixto por dimensión) y cada consulta queda en un acceso
+# directo por índice, tanto escalar como vectorizado.
+# ──────────────────────────────────────────────────────────────────────────────
+import itertools
+
+import numpy as np
+
+from .ranking import MODALIDADES, TAMANOS, REGIONES, UMBRALES_FLOTA, puntuar_lote
+from .tarifas import CLASES, UMBRAL_PRECIO_SP
+
+
+class Dimension:
+    """Dimensión categórica: cada valor posible ocupa una posición fija."""
+
+    def __init__(self, nombre, valores):
+        self.nombre = nombre
+        self.valores = tuple(valores)
+        self._posicion = {v: i for i, v in enumerate(self.valores)}
+
+    def __len__(self):
+        return len(self.valores)
+
+    def posicion(self, valor):
+        try:
+            return self._posicion[valor]
+        except KeyError:
+            raise ValueError(f"{self.nombre}: valor fuera del dominio {valor!r}") from None
+
+    def posiciones(self, valores):
+        # Un barrido por valor del dominio (dominios chicos): evita ordenar
+        # columnas de texto completas como haría np.unique.
+        valores = np.asarray(valores)
+        pos = np.full(valores.shape, -1, dtype=np.int64)
+        for i, v in enumerate(self.valores):
+            pos[valores == v] = i
+        if (pos < 0).any():
+            self.posicion(valores[pos < 0][0])    # lanza ValueError con el valor fuera de dominio
+        return pos
+
+
+class DimensionUmbral(Dimension):
+    """
+    Dimensión numérica discretizada por umbrales: el valor v cae en el tramo
+    i si umbrales[i-1] <= v < umbrales[i]. El representante de cada tramo es
+    su límite inferior (0 para el primero).
+    """
+
+    def __init__(self, nombre, umbrales):
+        self.umbrales = np.asarray(umbrales, dtype=np.float64)
+        super().__init__(nombre, (0,) + tuple(umbrales))
+
+    def posicion(self, valor):
+        return int(np.searchsorted(self.umbrales, valor, side="right"))
+
+    def posiciones(self, valores):
+        return np.searchsorted(self.umbrales, np.asarray(valores, dtype=np.float64), side="right")
+
+
+def _booleana(nombre):
+    return Dimension(nombre, (False, True))
+
+
+# ── Dominios de cada variante ────────────────────────────────────────────────
+# app.py, app(final).py y app(orden-desc).py: tres preguntas Sí/No
+DIMENSIONES_TRES_PREGUNTAS = (
+    _booleana("tiene_bodega"),
+    _booleana("voluminoso"),
+    _booleana("alta_rot"),
+)
+
+# app(orden-desc-mejorado).py: 7 tamaños × 2 regiones × volumen (tramos entre los
+# umbrales de Flota Propia de cada tamaño) × bodega × 3 flags
+DIMENSIONES_RANK_V6 = (
+    Dimension("tamano", TAMANOS),
+    Dimension("region", REGIONES),
+    DimensionUmbral("volumen", tuple(np.unique(UMBRALES_FLOTA[np.isfinite(UMBRALES_FLOTA)]).tolist())),
+    Dimension("tiene_bodega", ("Sí", "No")),
+    _booleana("alta_rotacion"),
+    _booleana("retiro_tienda"),
+    _booleana("foco_control_marca"),
+)
+
+
+def dimensiones_costos(modalidades):
+    """Dominio de tabla_costos_modalidad(modalidad, clase, precio)."""
+    return (
+        Dimension("modalidad", modalidades),
+        Dimension("clase", CLASES),
+        DimensionUmbral("precio", (UMBRAL_PRECIO_SP,)),
+    )
+
+
+def dimensiones_costos_v6(modalidades=MODALIDADES):
+    """Dominio de costos_estimados(modalidad, tamano, region) en v6."""
+    return (
+        Dimension("modalidad", modalidades),
+        Dimension("tamano", TAMANOS),
+        Dimension("region", REGIONES),
+    )
+
+
+# ── Tabla ────────────────────────────────────────────────────────────────────
+class TablaDecision:
+    """
+    Resultados precalculados para todas las combinaciones de `dimensiones`.
+    `resultados` es una secuencia (un objeto por combinación) o un dict de
+    arreglos NumPy con una fila por combinación.
+    """
+
+    def __init__(self, dimensiones, resultados):
+        self.dimensiones = tuple(dimensiones)
+        self.resultados = resultados
+        tamanos = [len(d) for d in self.dimensiones]
+        # Pasos del índice mixto (la última dimensión varía más rápido)
+        self._pasos = np.cumprod([1] + tamanos[:0:-1])[::-1].astype(np.int64)
+        self.tamano = int(np.prod(tamanos))
+
+    @classmethod
+    def construir(cls, funcion, dimensiones):
+        """Evalúa `funcion` una vez por combinación (argumentos en orden de dimensión)."""
+        valores = [d.valores for d in dimensiones]
+        return cls(dimensiones, tuple(funcion(*combo) for combo in itertools.product(*valores)))
+
+    def _entrada(self, args, kwargs):
+        if len(args) + len(kwargs) != len(self.dimensiones):
+            raise TypeError(f"Se esperaban {len(self.dimensiones)} argumentos")
+        valores = list(args) + [kwargs[d.nombre] for d in self.dimensiones[len(args):]]
+        return valores
+
+    def indice(self, *args, **kwargs):
+        valores = self._entrada(args, kwargs)
+        return sum(int(p) * d.posicion(v) for d, v, p in zip(self.dimensiones, valores, self._pasos))
+
+    def buscar(self, *args, **kwargs):
+        i = self.indice(*args, **kwargs)
+        if isinstance(self.resultados, dict):
+            return {k: v[i] for k, v in self.resultados.items()}
+        return self.resultados[i]
+
+    def indices_lote(self, datos):
+        """Índices para un DataFrame / dict de columnas con los nombres de las dimensiones."""
+        idx = None
+        for d, paso in zip(self.dimensiones, self._pasos):
+            pos = d.posiciones(datos[d.nombre]) * paso
+            idx = pos if idx is None else idx + pos
+        return idx
+
+    def buscar_lote(self, datos):
+        idx = self.indices_lote(datos)
+        if isinstance(self.resultados, dict):
+            return {k: np.take(v, idx, axis=0) for k, v in self.resultados.items()}
+        return [self.resultados[i] for i in idx.tolist()]
+
+    def rejilla(self):
+        """Columnas con el valor representativo de cada combinación, en orden de índice."""
+        combos = list(itertools.product(*[d.valores for d in self.dimensiones]))
+        return {d.nombre: np.array([c[k] for c in combos]) for k, d in enumerate(self.dimensiones)}
+
+
+def tabla_rank_v6():
+    """
+    Tabla numérica del ranking v6 construida con el motor vectorizado:
+    'orden' int8 (tamano, 4) y 'score' float64 (tamano, 4) en el orden de MODALIDADES.
+    """
+    vacia = TablaDecision(DIMENSIONES_RANK_V6, None)
+    score, orden = puntuar_lote(vacia.rejilla())
+    vacia.resultados = {"orden": orden, "score": score}
+    return vacia
+
+
+def ranking_lote(datos, tabla=None):
+    """Ranking de carteras completas por gather sobre la tabla v6."""
+    tabla = tabla or tabla_rank_v6()
+    return tabla.buscar_lote(datos)
@@ -0,0 +1,130 @@
+# ──────────────────────────────────────────────────────────────────────────────
+# Tarifario unificado
+# Las tablas fuente editables están en logistica.datos. `compilar` las
+# convierte en columnas NumPy indexadas por códigos enteros de clase/tamaño,
+# de modo que las funciones de costos y los motores por lotes leen tarifas con
+# gathers vectorizados.
+# ──────────────────────────────────────────────────────────────────────────────
+import hashlib
+import json
+
+import numpy as np
+
+from .datos import (  # noqa: F401  (se re-exportan para quienes importan desde aquí)
+    CLASES,
+    CROSSDOCK_SCL,
+    DESPACHO,
+    EQUIVALENCIA_TAMANO_CLASE,
+    FIRST_MILE,
+    FLOTA_ENV,
+    FULF_STORAGE,
+    MODALIDADES_PRIMERA_MILLA,
+    REVERSE,
+    TAMANOS,
+    UMBRAL_PRECIO_SP,
+    parsear_fulfillment,
+)
+from .despacho import MatrizDespacho
+
+# Marca de tarifa inexistente en columnas enteras
+SIN_TARIFA = -1
+
+
+# ── Utilidades de compilación ────────────────────────────────────────────────
+def codificar(valores, dominio):
+    """Códigos int8 de `valores` según su posición en `dominio` (escalar o arreglo)."""
+    if isinstance(valores, str):
+        try:
+            return np.int8(dominio.index(valores))
+        except ValueError:
+            raise ValueError(f"Valor fuera del dominio {dominio}: {valores!r}") from None
+    unicos, inversa = np.unique(np.asarray(valores, dtype=object).astype(str), return_inverse=True)
+    posicion = {v: i for i, v in enumerate(dominio)}
+    faltantes = [u for u in unicos.tolist() if u not in posicion]
+    if faltantes:
+        raise ValueError(f"Valores fuera del dominio {dominio}: {faltantes}")
+    mapa = np.array([posicion[u] for u in unicos.tolist()], dtype=np.int8)
+    return mapa[inversa.reshape(-1)]
+
+
+# ── Tarifario compilado ──────────────────────────────────────────────────────
+class Tarifario:
+    """
+    Tarifas como columnas NumPy:
+      - por clase (CLASES): primera_milla_bajo / primera_milla_alto (SP bajo y
+        sobre $24.990; el resto tarifa fija), reversa, flota (SIN_TARIFA si falta)
+      - por tamaño (TAMANOS): crossdock_ripley, crossdock_externo
+      - Fulfillment: fulfillment_tamanos, fulfillment_dia (CLP/día),
+        fulfillment_venta_min / fulfillment_venta_max (CLP/venta)
+      - despacho final al cliente: `despacho` (MatrizDespacho, zona × tamaño)
+    `version` es un hash corto de las tablas fuente; cambia con cualquier tarifa.
+    `fuente` es el JSON de esas tablas (ver desde_fuente).
+    """
+
+    def __init__(self, first_mile, reverse, crossdock, flota, fulfillment, despacho):
+        self.clases = CLASES
+        self.tamanos = TAMANOS
+
+        def fm(c, tramo):
+            t = first_mile[c]
+            return t.get(tramo, t.get("flat"))
+
+        self.primera_milla_bajo = np.array([fm(c, "lt_24990") for c in CLASES], dtype=np.int64)
+        self.primera_milla_alto = np.array([fm(c, "ge_24990") for c in CLASES], dtype=np.int64)
+        self.reversa = np.array([reverse[c] for c in CLASES], dtype=np.int64)
+        self.flota = np.array([flota.get(c, SIN_TARIFA) for c in CLASES], dtype=np.int64)
+
+        self.crossdock_ripley = np.array([crossdock[t]["ripley"] for t in TAMANOS], dtype=np.int64)
+        self.crossdock_externo = np.array([crossdock[t]["externo"] for t in TAMANOS], dtype=np.int64)
+
+        filas = [parsear_fulfillment(s) for s in fulfillment]
+        self.fulfillment_tamanos = tuple(f[0] for f in filas)
+        self.fulfillment_dia = np.array([f[1] for f in filas], dtype=np.float64)
+        self.fulfillment_venta_min = np.array([f[2] for f in filas], dtype=np.int64)
+        self.fulfillment_venta_max = np.array([f[3] for f in filas], dtype=np.int64)
+
+        self.despacho = MatrizDespacho(despacho)
+
+        # Tamaño v6 → código de clase equivalente
+        self.clase_de_tamano = codificar([EQUIVALENCIA_TAMANO_CLASE[t] for t in TAMANOS], CLASES)
+
+        self.fuente = json.dumps([first_mile, reverse, crossdock, flota, list(fulfillment), despacho],
+                                 sort_keys=True, ensure_ascii=False)
+        self.version = hashlib.sha1(self.fuente.encode("utf-8")).hexdigest()[:12]
+
+    # Códigos
+    def codigo_clase(self, clases):
+        return codificar(clases, self.clases)
+
+    def codigo_tamano(self, tamanos):
+        return codificar(tamanos, self.tamanos)
+
+    # Gathers
+    def primera_milla(self, codigos_clase, precios):
+        """Tarifa de primera milla por clase y precio (split SP en UMBRAL_PRECIO_SP)."""
+        return np.where(np.asarray(precios) >= UMBRAL_PRECIO_SP,
+                        self.primera_milla_alto[codigos_clase],
+                        self.primera_milla_bajo[codigos_clase])
+
+    def logistica_inversa(self, codigos_clase):
+        return self.reversa[codigos_clase]
+
+    def flota_propia(self, codigos_clase):
+        return self.flota[codigos_clase]
+
+    def crossdock(self, codigos_tamano):
+        """(tarifa Ripley, tarifa operadores externos) por tamaño."""
+        return self.crossdock_ripley[codigos_tamano], self.crossdock_externo[codigos_tamano]
+
+
+def compilar(first_mile=FIRST_MILE, reverse=REVERSE, crossdock=CROSSDOCK_SCL,
+             flota=FLOTA_ENV, fulfillment=FULF_STORAGE, despacho=DESPACHO):
+    return Tarifario(first_mile, reverse, crossdock, flota, fulfillment, despacho)
+
+
+def desde_fuente(fuente):
+    """Tarifario desde el JSON de Tarifario.fuente (p. ej. guardado junto a unos resultados)."""
+    return Tarifario(*json.loads(fuente))
+
+
+TARIFARIO = compilar()
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Las pruebas no escriben en la cache en disco ni en el log de tiempos del repo
+os.environ.setdefault("LOGISTICA_CACHE_DISCO", "")
+os.environ.setdefault("LOGISTICA_LOG_TIEMPOS", "")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
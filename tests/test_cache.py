@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+import logistica
+from logistica import cache, cache_disco, datos
+
+
+def test_hash_clave_estable_y_sensible_al_contenido():
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    clave = ("f", "v1", np.int64(3), np.arange(4), df)
+    assert cache_disco.hash_clave(clave) == cache_disco.hash_clave(("f", "v1", np.int64(3), np.arange(4), df.copy()))
+    assert cache_disco.hash_clave(clave) != cache_disco.hash_clave(("f", "v2", np.int64(3), np.arange(4), df))
+    assert cache_disco.hash_clave((1,)) != cache_disco.hash_clave((1.0,))
+
+
+def test_abrir_no_borra_entradas_de_otras_versiones(tmp_path):
+    ruta = tmp_path / "cache.sqlite3"
+    vieja = cache_disco.CacheDisco(ruta, "x", version="vieja")
+    vieja.obtener(("k",), lambda: 1)
+
+    nueva = cache_disco.CacheDisco(ruta, "x", version="nueva")
+    assert cache_disco.resumen_archivo(ruta)["version"].tolist() == ["vieja"]
+    # Otro proceso con la versión vieja sigue leyendo su entrada
+    assert cache_disco.CacheDisco(ruta, "x", version="vieja").obtener(("k",), lambda: 2) == 1
+
+    nueva.obtener(("k",), lambda: 3)
+    assert nueva.invalidar() == 1
+    assert cache_disco.resumen_archivo(ruta)["version"].tolist() == ["nueva"]
+
+
+def test_desalojo_por_bytes(tmp_path):
+    disco = cache_disco.CacheDisco(tmp_path / "cache.sqlite3", "x", max_bytes=50_000, version="v")
+    for i in range(20):
+        disco.obtener((i,), lambda: np.zeros(1000))
+    estadisticas = disco.estadisticas()
+    assert estadisticas["bytes"] <= 50_000 and estadisticas["desalojos"] > 0
+
+
+def test_cuenta_de_bytes_sin_sumar_en_cada_insercion(tmp_path, monkeypatch):
+    disco = cache_disco.CacheDisco(tmp_path / "cache.sqlite3", "x", version="v")
+    sumas = []
+    total = disco._total
+    monkeypatch.setattr(disco, "_total", lambda con: sumas.append(1) or total(con))
+    for i in range(10):
+        disco.obtener((i,), lambda: np.zeros(100 * (i + 1)))
+    disco._escribir(cache_disco.hash_clave(("x", "v", (0,))), np.zeros(5))    # reemplazo más chico
+    assert len(sumas) == 1
+    assert disco._bytes == total(disco._conexion())
+
+
+def test_memorizar_recalcula_si_cambia_la_version(monkeypatch):
+    llamadas = []
+
+    @cache.memorizar()
+    def doble(x):
+        llamadas.append(x)
+        return 2 * x
+
+    assert doble(2) == doble(2) == 4
+    assert llamadas == [2]
+    monkeypatch.setattr(cache, "version_cache", lambda: "otra")
+    assert doble(2) == 4
+    assert llamadas == [2, 2]
+
+
+def test_huella_cambia_con_las_constantes_de_datos(monkeypatch):
+    antes = cache.huella()
+    monkeypatch.setitem(datos.FLOTA_RUTAS, "costo_km", datos.FLOTA_RUTAS["costo_km"] + 1)
+    cache.huella.cache_clear()
+    try:
+        assert cache.huella() != antes
+    finally:
+        monkeypatch.undo()
+        cache.huella.cache_clear()
+    assert cache.huella() == antes
+
+
+def test_exportados_no_tapan_submodulos():
+    assert not set(logistica.__all__) & set(logistica._EXPORTADOS)
@@ -0,0 +1,44 @@
+import csv
+import io
+
+import pandas as pd
+import pytest
+
+from logistica import cli, nucleo, resultados
+
+_FILAS = [
+    "tamano,region,volumen,tiene_bodega,alta_rotacion,retiro_tienda,foco_control_marca",
+    "M1,Región Metropolitana,10,si,no,no,no",
+    "S,Otra región,300,NO,x,0,SÍ",
+    "L/XL,Región Metropolitana ,60,true,False,no,yes",
+]
+
+
+def test_puntuar_csv_y_compacto_coinciden(tmp_path):
+    entrada = tmp_path / "escenarios.csv"
+    entrada.write_text("\n".join(_FILAS) + "\n", encoding="utf-8")
+    assert cli.main(["puntuar", str(entrada), "-o", str(tmp_path / "r.csv")]) == 0
+    assert cli.main(["puntuar", str(entrada), "-o", str(tmp_path / "r.arrow")]) == 0
+
+    with open(tmp_path / "r.csv", newline="", encoding="utf-8") as f:
+        por_fila = [[fila[o] for o in nucleo.ORDINALES] for fila in csv.DictReader(f)]
+    compactos = resultados.cargar(tmp_path / "r.arrow")
+    por_lote = pd.DataFrame({o: pd.Categorical.from_codes(compactos.columnas[o], nucleo.MODALIDADES)
+                             for o in nucleo.ORDINALES})
+    assert por_lote.astype(str).values.tolist() == por_fila
+
+
+def test_comparar_sin_columnas_opcionales(tmp_path, capsys):
+    entrada = tmp_path / "escenarios.csv"
+    escenarios = pd.read_csv(io.StringIO("\n".join(_FILAS))).drop(columns="retiro_tienda")
+    escenarios.assign(region=escenarios["region"].str.strip()).to_csv(entrada, index=False)
+    assert cli.main(["comparar", str(entrada)]) == 0
+    assert capsys.readouterr().out.startswith("3 escenarios")
+
+
+def test_comparar_region_no_reconocida(tmp_path):
+    entrada = tmp_path / "escenarios.csv"
+    entrada.write_text(_FILAS[0] + "\nM1,RM,10,Sí,No,No,No\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as salida:
+        cli.main(["comparar", str(entrada)])
+    assert salida.value.code == 2
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logistica import catalogo, consolidacion, devoluciones, fulfillment, primera_milla, sensibilidad
+from logistica.datos import CLASES
+
+
+# ── Catálogo ─────────────────────────────────────────────────────────────────
+def _catalogo():
+    return pd.DataFrame({"sku": ["a", "b", "c"], "clase": ["SP", "G", "P2"], "precio": [1000, 30000, 5000],
+                         "rotacion": ["alta", "baja", "Sí"], "unidades": [2, 1, 3]})
+
+
+def test_catalogo_costos_por_sku():
+    resultado = catalogo.puntuar_catalogo(_catalogo(), tiene_bodega=True, tasa_devolucion=0.5)
+    assert list(resultado["modalidad"]) == ["Fulfillment", "Crossdock", "Fulfillment"]
+    assert list(resultado["costo_primera_milla"]) == [0, 12990, 0]
+    assert list(resultado["costo_inversa_esperado"]) == [2800, 11950, 9000]
+
+
+def test_catalogo_en_bloques_coincide():
+    grande = pd.concat([_catalogo()] * 50, ignore_index=True)
+    por_bloques = catalogo.lanzar(grande, True, tasa_devolucion=0.1, tamano_bloque=7).resultado()
+    pd.testing.assert_frame_equal(por_bloques, catalogo.puntuar_catalogo(grande, True, tasa_devolucion=0.1))
+
+
+def test_catalogo_vacio_se_rechaza():
+    with pytest.raises(ValueError, match="no tiene filas"):
+        catalogo.lanzar(_catalogo().iloc[:0], True)
+
+
+def test_catalogo_columnas_faltantes():
+    with pytest.raises(ValueError, match="faltan columnas: rotacion"):
+        catalogo.validar(_catalogo().drop(columns="rotacion"))
+
+
+# ── Devoluciones ─────────────────────────────────────────────────────────────
+def _ventas(marcas):
+    n = len(marcas)
+    return pd.DataFrame({"seller": ["s"] * n, "modalidad": ["Crossdock"] * n, "categoria": ["x"] * n,
+                         "clase": ["SP", "SP", "G", "G"][:n],
+                         "fecha": ["2024-01-05", "2024-01-06", "2024-02-01", "2024-02-02"][:n],
+                         "retornado": marcas})
+
+
+@pytest.mark.parametrize("marcas", [["Sí", "No", "true", "0"], [True, False, True, False], [1, 0, 2, 0]])
+def test_devoluciones_columna_de_marca(marcas):
+    agregado = devoluciones.acumular(_ventas(marcas), columna_devuelto="retornado")
+    assert agregado["lineas"].tolist() == [2, 2]
+    assert agregado["devueltas"].tolist() == [1, 1]
+
+
+def test_devoluciones_columna_de_marca_desde_csv(tmp_path):
+    ruta = tmp_path / "ventas.csv"
+    _ventas(["Sí", "No", "No", "No"]).to_csv(ruta, index=False)
+    agregado = devoluciones.acumular(ruta, columna_devuelto="retornado")
+    assert agregado["devueltas"].tolist() == [1, 0]
+
+
+def test_devoluciones_marca_no_reconocida():
+    with pytest.raises(ValueError, match="retornado"):
+        devoluciones.acumular(_ventas(["quizás", "No", "No", "No"]), columna_devuelto="retornado")
+
+
+# ── Consolidación ────────────────────────────────────────────────────────────
+def _consolidar_por_unidad(lineas, max_items, grupo):
+    """Referencia directa: una fila por unidad, ordenada de mayor a menor nivel y cortada."""
+    nivel = primera_milla.nivel_tarifa(lineas["clase"], lineas["precio"], lineas["modalidad"])
+    paquetes = []
+    for _, filas in lineas.assign(nivel=nivel)[nivel >= 0].groupby(grupo, sort=False):
+        unidades = np.repeat(filas["nivel"].to_numpy(), filas["cantidad"].to_numpy())
+        unidades = np.sort(unidades)[::-1]
+        corte = max_items or max(len(unidades), 1)
+        paquetes += [(len(p), p[0]) for p in np.split(unidades, range(corte, len(unidades), corte)) if len(p)]
+    return paquetes
+
+
+@pytest.mark.parametrize("max_items", [None, 1, 3, 7])
+def test_consolidar_coincide_con_corte_por_unidad(max_items):
+    rng = np.random.default_rng(max_items or 0)
+    n = 300
+    lineas = pd.DataFrame({
+        "order_id": rng.integers(0, 40, n), "cliente": rng.integers(0, 8, n),
+        "clase": rng.choice(CLASES, n), "precio": rng.uniform(1000, 60000, n),
+        "modalidad": rng.choice(["Operador Logístico", "Crossdock", "Fulfillment"], n),
+        "cantidad": rng.integers(0, 12, n),
+    })
+    propuesta = consolidacion.consolidar(lineas, max_items, grupo="cliente")
+    esperado = _consolidar_por_unidad(lineas, max_items, "cliente")
+    obtenido = list(zip(propuesta.paquetes["unidades"],
+                        pd.Categorical(propuesta.paquetes["tarifa"]).codes))
+    assert obtenido == esperado
+    # Las piezas reparten exactamente las unidades de cada línea
+    por_linea = propuesta.piezas.groupby("linea")["unidades"].sum()
+    aplica = lineas["cantidad"].to_numpy() > 0
+    aplica &= primera_milla.nivel_tarifa(lineas["clase"], lineas["precio"], lineas["modalidad"]) >= 0
+    assert por_linea.to_dict() == lineas["cantidad"][aplica].to_dict()
+
+
+def test_consolidar_ahorra_al_agrupar_por_cliente():
+    lineas = pd.DataFrame({"order_id": [1, 2, 3], "cliente": ["a", "a", "a"], "clase": ["SP", "P2", "G"],
+                           "precio": [1000, 5000, 30000], "modalidad": "Crossdock"})
+    resumen = consolidacion.consolidar(lineas, grupo="cliente").resumen()
+    assert (resumen["envios_actuales"], resumen["envios_propuestos"]) == (3, 1)
+    assert resumen["costo_propuesto"] == 12990
+    assert resumen["ahorro"] == 1000 + 6690
+
+
+def test_consolidar_sin_lineas_que_apliquen():
+    lineas = pd.DataFrame({"order_id": [1], "clase": ["SP"], "precio": [1000], "modalidad": ["Fulfillment"]})
+    resumen = consolidacion.consolidar(lineas).resumen()
+    assert (resumen["envios_propuestos"], resumen["lineas_sin_primera_milla"]) == (0, 1)
+
+
+# ── Primera milla por archivo ────────────────────────────────────────────────
+def test_facturar_archivo_desordenado_y_ordenado(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 5000
+    lineas = pd.DataFrame({"order_id": rng.integers(0, 800, n), "sku": 1, "clase": rng.choice(CLASES, n),
+                           "precio": rng.uniform(1000, 60000, n),
+                           "modalidad": rng.choice(["Crossdock", "Fulfillment"], n)})
+    esperado = primera_milla.primera_milla_ordenes(lineas).set_index("order_id").sort_index()
+
+    desordenado = tmp_path / "desordenado.csv"
+    lineas.to_csv(desordenado, index=False)
+    obtenido = pd.concat(primera_milla.facturar_archivo(desordenado, tamano_bloque=700, particiones=4))
+    pd.testing.assert_frame_equal(obtenido.set_index("order_id").sort_index(), esperado)
+    with pytest.raises(ValueError, match="no está ordenado"):
+        list(primera_milla.facturar_archivo(desordenado, tamano_bloque=700, ordenado=True))
+
+    ordenado = tmp_path / "ordenado.csv"
+    lineas.sort_values("order_id", kind="stable").to_csv(ordenado, index=False)
+    obtenido = pd.concat(primera_milla.facturar_archivo(ordenado, tamano_bloque=700, ordenado=True))
+    pd.testing.assert_frame_equal(obtenido.set_index("order_id"), esperado)
+
+
+# ── Fulfillment y sensibilidad ───────────────────────────────────────────────
+def test_fulfillment_serie_sin_dias():
+    vacia = np.zeros((2, 0))
+    resultado = fulfillment.simular_almacenamiento(vacia, vacia, ["S", "M1"], acumulado=np.zeros((2, 0)))
+    assert resultado["arriendo"].tolist() == [0.0, 0.0]
+
+
+def test_fulfillment_rechaza_ventas_fraccionarias():
+    with pytest.raises(ValueError, match="enteras"):
+        fulfillment.simular_almacenamiento(np.ones((1, 2)), np.array([[0.5, 1.0]]), ["S"])
+
+
+def test_sensibilidad_rechaza_cero_muestras():
+    with pytest.raises(ValueError, match="n_muestras"):
+        sensibilidad.sensibilidad(n_muestras=0)
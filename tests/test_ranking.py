@@ -0,0 +1,117 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logistica import incremental, nucleo, ranking, resultados, tarifas
+from logistica.comparacion import espacio_completo
+from logistica.datos import FLOTA_ENV, FLOTA_RUTAS, FIRST_MILE
+
+
+def _escenarios():
+    """Rejilla v6 más un barrido de volúmenes alrededor de cada umbral de Flota Propia."""
+    umbrales = {u for u in nucleo.UMBRALES_VOLUMEN_FLOTA.values() if np.isfinite(u)}
+    volumenes = sorted({0, 1, 500} | {u + d for u in umbrales for d in (-1, 0, 1)})
+    filas = itertools.product(nucleo.TAMANOS, nucleo.REGIONES, volumenes, ("Sí", "No"),
+                              (False, True), (False, True), (False, True))
+    barrido = pd.DataFrame(list(filas), columns=list(nucleo.COLUMNAS_ESCENARIO))
+    return pd.concat([espacio_completo(), barrido], ignore_index=True)
+
+
+def test_lote_coincide_con_escalar():
+    escenarios = _escenarios()
+    lote = ranking.rank_modalidades_lote(escenarios)
+    for i, fila in enumerate(escenarios.itertuples(index=False)):
+        escalar = nucleo.rank_modalidades(*fila)
+        assert [m for m, _ in escalar] == [lote[o].iat[i] for o in nucleo.ORDINALES]
+        for modalidad, score in escalar:
+            assert lote[f"score {modalidad}"].iat[i] == score
+
+
+def test_compactar_coincide_con_lote():
+    escenarios = _escenarios()
+    lote = ranking.rank_modalidades_lote(escenarios)
+    compactos = resultados.compactar(escenarios)
+    for i, ordinal in enumerate(nucleo.ORDINALES):
+        esperado = pd.Categorical(lote[ordinal], categories=nucleo.MODALIDADES).codes
+        assert np.array_equal(compactos.columnas[ordinal], esperado)
+
+
+def _cartera(n=20_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "tamano": pd.Categorical.from_codes(rng.integers(0, len(nucleo.TAMANOS), n), categories=nucleo.TAMANOS),
+        "region": pd.Categorical.from_codes(rng.integers(0, 2, n), categories=nucleo.REGIONES),
+        "volumen": rng.integers(0, 400, n).astype(float),
+        "tiene_bodega": rng.integers(0, 2, n).astype(bool),
+        "alta_rotacion": rng.integers(0, 2, n).astype(bool),
+        "retiro_tienda": False,
+        "foco_control_marca": rng.integers(0, 2, n).astype(bool),
+        "precio": rng.uniform(1000, 60000, n),
+    })
+
+
+def _iguales(a, b):
+    assert set(a.columnas) == set(b.columnas)
+    for c in a.columnas:
+        assert np.array_equal(a.columnas[c], b.columnas[c]), c
+
+
+def test_actualizar_tarifas_coincide_con_recalculo_completo():
+    cartera = _cartera()
+    base = resultados.compactar(cartera)
+    primera = {k: dict(v) for k, v in FIRST_MILE.items()}
+    primera["G"] = {k: v + 500 for k, v in primera["G"].items()}
+    nuevo = tarifas.compilar(first_mile=primera, flota={k: v * 6 for k, v in FLOTA_ENV.items()})
+
+    actualizacion = incremental.actualizar(base, nuevo)
+    _iguales(actualizacion.resultados, resultados.compactar(cartera, tarifario=nuevo))
+    assert 0 < len(actualizacion.filas) < len(cartera)
+
+
+def test_actualizar_usa_los_parametros_de_rutas_guardados(monkeypatch):
+    cartera = _cartera()
+    with monkeypatch.context() as m:
+        m.setitem(FLOTA_RUTAS, "costo_vehiculo_dia", 40_000)
+        # Un tarifario distinto de TARIFARIO recalcula los umbrales con FLOTA_RUTAS
+        base = resultados.compactar(cartera, tarifario=tarifas.compilar())
+    actualizacion = incremental.actualizar(base, tarifas.compilar())
+
+    _iguales(actualizacion.resultados, resultados.compactar(cartera))
+    cambios = actualizacion.cambios
+    assert ((cambios["tabla"] == "FLOTA_RUTAS") & (cambios["celda"] == "costo_vehiculo_dia")).any()
+    assert (cambios["tabla"] == "umbral Flota Propia").any()
+
+
+def test_actualizar_rechaza_otro_corte_de_precio(monkeypatch):
+    base = resultados.compactar(_cartera(100))
+    monkeypatch.setattr(incremental, "UMBRAL_PRECIO_SP", 30_000)
+    with pytest.raises(ValueError, match="UMBRAL_PRECIO_SP"):
+        incremental.actualizar(base)
+
+
+@pytest.mark.parametrize("si, no", [("si", "no"), ("SÍ", "NO"), ("true", "false"), ("yes", "0"), ("x", "")])
+def test_respuestas_con_otras_grafias(si, no):
+    escenarios = pd.DataFrame({"tamano": ["M1", "M1"], "region": ["Región Metropolitana", " Otra región "],
+                               "volumen": [10, 300], "tiene_bodega": [si, no], "alta_rotacion": [no, si],
+                               "retiro_tienda": [no, no], "foco_control_marca": [no, si]})
+    lote = ranking.rank_modalidades_lote(escenarios)
+    for i, fila in enumerate(escenarios.to_dict("records")):
+        escalar = nucleo.rank_modalidades(*nucleo.normalizar_escenario(fila))
+        assert [m for m, _ in escalar] == [lote[o].iat[i] for o in nucleo.ORDINALES]
+
+
+@pytest.mark.parametrize("columna, valor, mensaje", [
+    ("tiene_bodega", "quizás", "no es Sí/No"),
+    ("alta_rotacion", None, "vacíos"),
+    ("foco_control_marca", np.nan, "vacíos"),
+    ("region", "RM", "Regiones no reconocidas"),
+    ("tamano", "XL", "Tamaños no reconocidos"),
+])
+def test_codificar_rechaza_valores_desconocidos(columna, valor, mensaje):
+    escenarios = pd.DataFrame({"tamano": ["M1"], "region": ["Región Metropolitana"], "volumen": [10.0],
+                               "tiene_bodega": ["Sí"], "alta_rotacion": [False], "foco_control_marca": [0.0]})
+    escenarios[columna] = pd.Series([valor], dtype=object)
+    with pytest.raises(ValueError, match=mensaje):
+        ranking.codificar_escenarios(escenarios)